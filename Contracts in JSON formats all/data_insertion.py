@@ -9,44 +9,176 @@ Changes in this version:
   - The 'tender_items' table is removed.
   - We have added 'ocid' to 'contract_transactions'.
   - We also added columns in 'releases' for that single additionalClassification.
+  - Party aliases go to the 'party_aliases' table through PartyAliasStore instead
+    of being appended to the comma-joined 'parties.alias_parties' string (the
+    column is gone, see table_creation.migrate_alias_parties).
+  - Loading is split in two steps: transform_release() turns a release into plain
+    row tuples per table (no SQL), and write_row_batch() writes a batch of those
+    rows with parameterized statements. pipeline.py runs the two on separate threads.
+  - The optional sections in OPTIONAL_SECTIONS (tender documents, party details,
+    contract amendments, related processes) are only loaded when requested.
+  - References are resolved per batch with set-based anti-joins (#ref_keys):
+    placeholder awards are added in one INSERT ... SELECT, and bids whose party
+    is not known yet wait in DeferredBids until the end of the file.
+  - Rows are namedtuple records (Release, Party, Bid, ...) generated from
+    table_creation.TABLE_COLUMNS rather than dicts or bare tuples.
+  - The row batches of a file can be kept in a parse_cache.ParseCache
+    (load_row_batches), so unchanged files are not decoded again.
+  - Batches are sent through bulk_writer.ExecutemanyBackend (pyodbc
+    fast_executemany), as in the XML loader.
 """
 
+import hashlib
 import json
 import logging
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
 
-def escape_single_quotes(text):
-    return text.replace("'", "''") if isinstance(text, str) else text
+from table_creation import record_type
 
-def parse_date(date_str):
+# bulk_writer.py and parse_cache.py are shared with the XML loader
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from bulk_writer import ExecutemanyBackend
+from parse_cache import file_digest
 
+@lru_cache(maxsize=8192)
+def parse_date(date_str):
+    """
+    Returns an ISO 8601 date string as 'YYYY-MM-DD HH:MM:SS' (or 'YYYY-MM-DD' for
+    date-only values) ready to be bound to a DATETIME parameter; None if empty or invalid.
+    Memoized: the same dates come back across releases and files, and
+    datetime.fromisoformat is already the fast path for the SEAO layout.
+    """
     if not date_str:
-        return "NULL"
-    
+        return None
+
     try:
-        from datetime import datetime
         # Handle "Z" timezone (UTC) explicitly
         if date_str.endswith('Z'):
             date_str = date_str.replace('Z', '+00:00')
-        
+
         # Parse ISO 8601 datetime with timezone
         dt = datetime.fromisoformat(date_str)
-        
+
         # Format for SQL Server DATETIME2 (YYYY-MM-DD HH:MM:SS)
-        return f"'{dt.strftime('%Y-%m-%d %H:%M:%S')}'"
+        return dt.strftime('%Y-%m-%d %H:%M:%S')
     except ValueError:
         # Fallback: Try parsing date-only (YYYY-MM-DD)
         try:
             cleaned_date = date_str.strip().split('T')[0]
             year, month, day = cleaned_date.split('-')
             if len(year) != 4 or len(month) != 2 or len(day) != 2:
-                return "NULL"
+                return None
             datetime.strptime(cleaned_date, '%Y-%m-%d')
-            return f"'{cleaned_date}'"
+            return cleaned_date
         except (ValueError, IndexError):
-            return "NULL"
-
-def insert_json_data(cursor, file_path):
-    """Reads a JSON file and inserts/updates data in the database."""
+            return None
+
+def alias_hash(alias):
+    """
+    SHA2-256 of the alias as UTF-16LE, i.e. the same bytes that
+    HASHBYTES('SHA2_256', <NVARCHAR>) produces on the server.
+    """
+    return hashlib.sha256(alias.encode('utf-16-le')).digest()
+
+class PartyAliasStore:
+    """
+    Set-based view of 'party_aliases' for the duration of one load.
+
+    Each party's stored hashes are fetched once (a seek on the primary key),
+    after which membership checks are set lookups. New aliases are queued
+    and written in a single batch by flush().
+    """
+
+    def __init__(self):
+        self.known = set()          # {(party_id, alias_hash)}
+        self.loaded_parties = set() # party_ids whose hashes are in 'known'
+        self.pending = []           # [(party_id, alias_hash, alias)]
+
+    def _load_party(self, cursor, party_id):
+        cursor.execute(
+            "SELECT alias_hash FROM party_aliases WHERE party_id = ?",
+            (party_id,)
+        )
+        for (stored_hash,) in cursor.fetchall():
+            self.known.add((party_id, bytes(stored_hash)))
+        self.loaded_parties.add(party_id)
+
+    def load(self, cursor, party_ids):
+        """Fetches the hashes of the `party_ids` not loaded yet, with one join on #ref_keys."""
+        party_ids = set(party_ids) - self.loaded_parties
+        if not party_ids:
+            return
+        _load_ref_keys(cursor, dict.fromkeys(party_ids))
+        cursor.execute(
+            "SELECT a.party_id, a.alias_hash FROM party_aliases a "
+            "JOIN #ref_keys k ON k.ref_id = a.party_id"
+        )
+        for party_id, stored_hash in cursor.fetchall():
+            self.known.add((party_id, bytes(stored_hash)))
+        self.loaded_parties |= party_ids
+
+    def add(self, cursor, party_id, alias):
+        """Queues `alias` for `party_id` unless it is already known. Returns True if queued."""
+        if party_id not in self.loaded_parties:
+            self._load_party(cursor, party_id)
+
+        key = (party_id, alias_hash(alias))
+        if key in self.known:
+            return False
+        self.known.add(key)
+        self.pending.append((party_id, key[1], alias))
+        return True
+
+    def flush(self, cursor):
+        if not self.pending:
+            return
+        ExecutemanyBackend(cursor).execute(
+            "INSERT INTO party_aliases (party_id, alias_hash, alias) VALUES (?, ?, ?)",
+            self.pending
+        )
+        self.pending = []
+
+def select_tender_item(items):
+    """
+    Picks the single tender item stored in 'releases':
+      - exactly one item: take it as is;
+      - several: drop the "Classification UNSPSC principale" entries, then prefer
+        the first whose classification.id has letters AND digits, else the first left.
+    """
+    if len(items) == 1:
+        return items[0]
+    if len(items) > 1:
+        filtered_items = [
+            it for it in items
+            if "Classification UNSPSC principale" not in (it.get('description') or "")
+        ]
+        for it in filtered_items:
+            c_id = it.get('classification', {}).get('id', '')
+            if any(c.isalpha() for c in c_id) and any(c.isdigit() for c in c_id):
+                return it
+        if filtered_items:
+            return filtered_items[0]
+    return None
+
+def select_additional_classification(item):
+    """
+    Picks one additionalClassification of `item`: the first whose id has letters
+    AND digits (e.g. "S3"), else the first one. Returns None if there is none.
+    """
+    addcs = item.get('additionalClassifications', [])
+    for ac in addcs:
+        ac_id_str = ac.get('id', '')
+        if any(ch.isalpha() for ch in ac_id_str) and any(ch.isdigit() for ch in ac_id_str):
+            return ac
+    return addcs[0] if addcs else None
+
+def load_releases(file_path):
+    """Reads a SEAO JSON file and returns its releases, or None if it has none."""
     msg = f"  → Loading JSON data from: {file_path}"
     print(msg)
     logging.info(msg)
@@ -58,725 +190,759 @@ def insert_json_data(cursor, file_path):
         warn_msg = f"  ⚠ WARNING: No 'releases' key found in {file_path}. Skipping."
         print(warn_msg)
         logging.warning(warn_msg)
+        return None
+
+    return data['releases']
+
+# --------------------------------------------------------
+# Optional OCDS sections. A target loads the ones it lists (see targets.py);
+# everything else in a release is always loaded.
+# --------------------------------------------------------
+OPTIONAL_SECTIONS = frozenset({
+    'tender.documents',      # releases.tender_documents
+    'parties.details',       # parties.details
+    'contracts.amendments',  # contract_amendments
+    'relatedProcesses',      # related_processes
+})
+
+# Column left out of the INSERT/UPDATE statements when its section is excluded,
+# so an existing value is kept rather than overwritten with NULL.
+SECTION_COLUMNS = {
+    'tender.documents': ('releases', 'tender_documents'),
+    'parties.details': ('parties', 'details'),
+}
+
+def prune_sections(releases, sections):
+    """
+    Removes the optional sections not in `sections` from decoded releases, in place.
+    json.load() cannot skip keys while parsing, so this frees them as early as
+    possible; transform_release() ignores excluded sections either way.
+    """
+    excluded = OPTIONAL_SECTIONS - set(sections)
+    if not excluded:
         return
-
-    for release in data['releases']:
-        ocid = release.get('ocid', '')
-        if not ocid:
+    for release in releases:
+        if 'tender.documents' in excluded:
+            release.get('tender', {}).pop('documents', None)
+        if 'parties.details' in excluded:
+            for party in release.get('parties', []):
+                party.pop('details', None)
+        if 'contracts.amendments' in excluded:
+            for contract in release.get('contracts', []):
+                contract.pop('amendments', None)
+        if 'relatedProcesses' in excluded:
+            release.pop('relatedProcesses', None)
+
+# --------------------------------------------------------
+# Row records produced by transform_release(), one per table row.
+# --------------------------------------------------------
+Release        = record_type('releases', 'Release', module=__name__)
+Lot            = record_type('lots', 'Lot', module=__name__)
+Party          = record_type('parties', 'Party', exclude=('role',), module=__name__)
+ReleaseParty   = record_type('release_parties', 'ReleaseParty', module=__name__)
+Bid            = record_type('bids', 'Bid', module=__name__)
+Award          = record_type('awards', 'Award', module=__name__)
+SupplierAward  = record_type('suppliers_awards', 'SupplierAward', module=__name__)
+Contract       = record_type('contracts', 'Contract', module=__name__)
+Amendment      = record_type('contract_amendments', 'Amendment', module=__name__)
+Transaction    = record_type('contract_transactions', 'Transaction', module=__name__)
+RelatedProcess = record_type('related_processes', 'RelatedProcess', module=__name__)
+# Suppliers not listed in the release's 'parties' get a minimal row.
+SupplierParty  = namedtuple('SupplierParty', ('party_id', 'name'))
+# Contracts whose award is not in the file get a 'placeholder' award.
+PlaceholderAward = namedtuple('PlaceholderAward', ('award_id', 'ocid'))
+
+RECORD_TYPES = {
+    'releases': Release,
+    'lots': Lot,
+    'parties': Party,
+    'release_parties': ReleaseParty,
+    'bids': Bid,
+    'awards': Award,
+    'supplier_parties': SupplierParty,
+    'suppliers_awards': SupplierAward,
+    'placeholder_awards': PlaceholderAward,
+    'contracts': Contract,
+    'contract_amendments': Amendment,
+    'contract_transactions': Transaction,
+    'related_processes': RelatedProcess,
+}
+ROW_COLUMNS = {table: record._fields for table, record in RECORD_TYPES.items()}
+
+# Order in which write_row_batch() writes a batch (parents before children).
+WRITE_ORDER = (
+    'releases', 'lots', 'parties', 'release_parties', 'bids', 'awards',
+    'supplier_parties', 'suppliers_awards', 'placeholder_awards', 'contracts',
+    'contract_amendments', 'contract_transactions', 'related_processes',
+)
+
+def new_row_batch():
+    """Returns an empty {table: [row, ...]} batch."""
+    return {table: [] for table in WRITE_ORDER}
+
+# Version of load_releases() + transform_release(), part of the parse cache
+# keys: bump it whenever they change the rows they produce.
+PARSER_VERSION = 1
+# Cached batches are stored as one table per row table, each row prefixed
+# with the number of its batch.
+CACHE_COLUMNS = {table: ('batch_no',) + columns for table, columns in ROW_COLUMNS.items()}
+
+def transform_release(release, batch, select_item=select_tender_item, sections=OPTIONAL_SECTIONS):
+    """
+    Appends the rows of one release to `batch` (see ROW_COLUMNS). Pure Python,
+    no database access. Optional sections not in `sections` produce no rows
+    (or None in their column). Returns False if the release has no ocid and was skipped.
+    """
+    ocid = release.get('ocid', '')
+    if not ocid:
+        return False
+
+    # -----------------------------------------------------
+    # 1. 'releases' (including TENDER columns + single item)
+    # -----------------------------------------------------
+    tender_data   = release.get('tender', {})
+    tender_period = tender_data.get('tenderPeriod', {})
+    docs_str      = None
+    if 'tender.documents' in sections:
+        docs     = tender_data.get('documents', [])
+        docs_str = ",".join(d.get('url', '') for d in docs if 'url' in d)
+    with_details  = 'parties.details' in sections
+
+    # ----- Select a single item -----
+    selected_item = select_item(tender_data.get('items', []))
+
+    # Now extract item fields if selected_item
+    item_id_val = ''
+    desc_val    = ''
+    c_scheme    = ''
+    c_id        = ''
+    c_desc      = ''
+    addc_scheme = ''
+    addc_id     = ''
+    addc_desc   = ''
+
+    if selected_item:
+        item_id_val = str(selected_item.get('id', ''))
+        desc_val    = selected_item.get('description', '')
+
+        classif  = selected_item.get('classification', {})
+        c_scheme = classif.get('scheme', '')
+        c_id     = classif.get('id', '')
+        c_desc   = classif.get('description', '')
+
+        # Now handle the single additionalClassification from item:
+        chosen_ac = select_additional_classification(selected_item)
+        if chosen_ac:
+            addc_scheme = chosen_ac.get('scheme', '')
+            addc_id     = chosen_ac.get('id', '')
+            addc_desc   = chosen_ac.get('description', '')
+
+    batch['releases'].append(Release(
+        ocid,
+        release.get('id', ''),
+        parse_date(release.get('date', '')),
+        ",".join(release.get('tag', [])),
+        release.get('initiationType', ''),
+        release.get('language', ''),
+
+        tender_data.get('id', ''),
+        tender_data.get('title', ''),
+        tender_data.get('status', ''),
+        tender_data.get('procurementMethod', ''),
+        tender_data.get('procurementMethodDetails', ''),
+        tender_data.get('procurementMethodRationale', ''),
+        tender_data.get('mainProcurementCategory', ''),
+        ",".join(tender_data.get('additionalProcurementCategories', [])),
+        tender_data.get('procuringEntity', {}).get('id', ''),
+        parse_date(tender_period.get('startDate', '')),
+        parse_date(tender_period.get('endDate', '')),
+        tender_period.get('durationInDay') or None,
+        tender_data.get('numberOfTenderers') or None,
+        docs_str,
+
+        item_id_val,
+        desc_val,
+        c_scheme,
+        c_id,
+        c_desc,
+
+        addc_scheme,
+        addc_id,
+        addc_desc,
+    ))
+
+    # -----------------------------------------------------
+    # 2. LOTS (to satisfy bids referencing relatedLot)
+    # -----------------------------------------------------
+    for lot in tender_data.get('lots', []):
+        lot_id = str(lot.get('id', ''))
+        if not lot_id:
             continue
+        cp = lot.get('contractPeriod', {})
+        batch['lots'].append(Lot(
+            lot_id,
+            ocid,
+            lot.get('title', ''),
+            lot.get('status', ''),
+            parse_date(cp.get('startDate', '')),
+            parse_date(cp.get('endDate', '')),
+        ))
+
+    # -----------------------------------------------------
+    # 3. PARTIES + RELEASE_PARTIES
+    # -----------------------------------------------------
+    for party in release.get('parties', []):
+        party_id = party.get('id', '').strip()
+        address  = party.get('address', {})
+        batch['parties'].append(Party(
+            party_id,
+            party.get('name', '').strip(),
+            address.get('streetAddress', '').strip(),
+            address.get('locality', '').strip(),
+            address.get('region', '').strip(),
+            address.get('postalCode', '').strip(),
+            address.get('countryName', '').strip(),
+            # Storing "details" as JSON text
+            json.dumps(party.get('details', {})) if with_details else None,
+        ))
+        for role_val in party.get('roles', []):
+            batch['release_parties'].append(ReleaseParty(ocid, party_id, role_val.strip()))
+
+    # -----------------------------------------------------
+    # 4. BIDS (one row per related lot, related_lot = None if there is none)
+    # -----------------------------------------------------
+    for bid in release.get('bids', []):
+        bid_party_id = str(bid.get('id', ''))
+        values = (
+            bid.get('admissible'),
+            bid.get('conform'),
+            bid.get('value'),
+            bid.get('valueUnit') or None,
+        )
+        for rl in bid.get('relatedLots', []) or [None]:
+            batch['bids'].append(
+                Bid(bid_party_id, ocid, None if rl is None else str(rl), *values)
+            )
 
-        # -----------------------------------------------------
-        # 1. Insert/Update 'releases' (including TENDER columns + single item)
-        # -----------------------------------------------------
-        release_id_val = release.get('id', '')
-        date_val       = parse_date(release.get('date', ''))
-        tag_val        = escape_single_quotes(",".join(release.get('tag', [])))
-        init_val       = escape_single_quotes(release.get('initiationType', ''))
-        lang_val       = escape_single_quotes(release.get('language', ''))
-
-        tender_data    = release.get('tender', {})
-        tender_id_val  = escape_single_quotes(tender_data.get('id', ''))
-        tender_title   = escape_single_quotes(tender_data.get('title', ''))
-        tender_status  = escape_single_quotes(tender_data.get('status', ''))
-        pm             = escape_single_quotes(tender_data.get('procurementMethod', ''))
-        pm_details     = escape_single_quotes(tender_data.get('procurementMethodDetails', ''))
-        pm_rationale   = escape_single_quotes(tender_data.get('procurementMethodRationale', ''))
-        main_cat       = escape_single_quotes(tender_data.get('mainProcurementCategory', ''))
-        addl_cats      = escape_single_quotes(",".join(tender_data.get('additionalProcurementCategories', [])))
-        pe_id          = escape_single_quotes(tender_data.get('procuringEntity', {}).get('id', ''))
-
-        tender_period  = tender_data.get('tenderPeriod', {})
-        tstart         = parse_date(tender_period.get('startDate', ''))
-        tend           = parse_date(tender_period.get('endDate', ''))
-        tduration      = tender_period.get('durationInDay', 'NULL') or 'NULL'
-        tnum           = tender_data.get('numberOfTenderers', 'NULL') or 'NULL'
-
-        docs           = tender_data.get('documents', [])
-        doc_urls       = [d.get('url', '') for d in docs if 'url' in d]
-        docs_str       = escape_single_quotes(",".join(doc_urls))
-
-        # ----- Select a single item -----
-        items = tender_data.get('items', [])
-        selected_item = None
-
-        if len(items) == 1:
-            # If exactly one item, take it as is
-            selected_item = items[0]
-        elif len(items) > 1:
-            # Exclude any item whose description has "Classification UNSPSC principale"
-            filtered_items = [
-                it for it in items
-                if "Classification UNSPSC principale" not in (it.get('description') or "")
-            ]
-            # Among filtered items, prefer one whose classification.id has letters AND digits
-            # if found; else pick the first.
-            chosen = None
-            for it in filtered_items:
-                classif = it.get('classification', {})
-                c_id = classif.get('id', '')
-                if any(c.isalpha() for c in c_id) and any(c.isdigit() for c in c_id):
-                    chosen = it
-                    break
-            if chosen:
-                selected_item = chosen
-            elif filtered_items:
-                selected_item = filtered_items[0]
-
-        # Now extract item fields if selected_item
-        item_id_val = ''
-        desc_val    = ''
-        c_scheme    = ''
-        c_id        = ''
-        c_desc      = ''
-        addc_scheme = ''
-        addc_id     = ''
-        addc_desc   = ''
-
-        if selected_item:
-            item_id_val = str(selected_item.get('id', ''))
-            desc_val    = escape_single_quotes(selected_item.get('description', ''))
-
-            classif = selected_item.get('classification', {})
-            c_scheme = escape_single_quotes(classif.get('scheme', ''))
-            c_id     = escape_single_quotes(classif.get('id', ''))
-            c_desc   = escape_single_quotes(classif.get('description', ''))
-
-            # Now handle the single additionalClassification from item:
-            addcs = selected_item.get('additionalClassifications', [])
-            if addcs:
-                # If there's more than one, prefer the alpha+digit ID:
-                chosen_ac = None
-                for ac in addcs:
-                    ac_id_str = ac.get('id', '')
-                    if any(ch.isalpha() for ch in ac_id_str) and any(ch.isdigit() for ch in ac_id_str):
-                        chosen_ac = ac
-                        break
-                if not chosen_ac:
-                    # If none found with alpha+digit, just take the first
-                    chosen_ac = addcs[0]
-
-                # Set final single additionalClassification
-                addc_scheme = escape_single_quotes(chosen_ac.get('scheme', ''))
-                addc_id     = escape_single_quotes(chosen_ac.get('id', ''))
-                addc_desc   = escape_single_quotes(chosen_ac.get('description', ''))
-
-        # Build the SQL upsert for 'releases'
-        sql_release = f"""
-        IF EXISTS (SELECT 1 FROM releases WHERE ocid = '{escape_single_quotes(ocid)}')
-        BEGIN
-            UPDATE releases
-            SET
-                release_id   = '{escape_single_quotes(release_id_val)}',
-                date         = {date_val},
-                tag          = '{tag_val}',
-                initiation_type = '{init_val}',
-                language     = '{lang_val}',
-
-                tender_id    = '{tender_id_val}',
-                tender_title = '{tender_title}',
-                tender_status= '{tender_status}',
-                tender_procurement_method = '{pm}',
-                tender_procurement_method_details = '{pm_details}',
-                tender_procurement_method_rationale = '{pm_rationale}',
-                tender_main_procurement_category = '{main_cat}',
-                tender_additional_procurement_categories = '{addl_cats}',
-                tender_procuring_entity_id = '{pe_id}',
-                tender_start_date = {tstart},
-                tender_end_date   = {tend},
-                tender_duration_in_days = {tduration},
-                tender_number_of_tenderers = {tnum},
-                tender_documents = '{docs_str}',
-
-                tender_item_id = '{item_id_val}',
-                tender_item_description = '{desc_val}',
-                tender_item_classification_scheme = '{c_scheme}',
-                tender_item_classification_id = '{c_id}',
-                tender_item_classification_description = '{c_desc}',
-
-                tender_item_additional_scheme = '{addc_scheme}',
-                tender_item_additional_id = '{addc_id}',
-                tender_item_additional_description = '{addc_desc}'
-
-            WHERE ocid = '{escape_single_quotes(ocid)}';
-        END
-        ELSE
-        BEGIN
-            INSERT INTO releases (
-                ocid, release_id, date, tag, initiation_type, language,
-                tender_id, tender_title, tender_status,
-                tender_procurement_method, tender_procurement_method_details,
-                tender_procurement_method_rationale, tender_main_procurement_category,
-                tender_additional_procurement_categories, tender_procuring_entity_id,
-                tender_start_date, tender_end_date, tender_duration_in_days,
-                tender_number_of_tenderers, tender_documents,
-                tender_item_id, tender_item_description,
-                tender_item_classification_scheme, tender_item_classification_id,
-                tender_item_classification_description,
-                tender_item_additional_scheme, tender_item_additional_id,
-                tender_item_additional_description
+    # -----------------------------------------------------
+    # 5. AWARDS + SUPPLIERS_AWARDS
+    # -----------------------------------------------------
+    for award in release.get('awards', []):
+        award_id = str(award.get('id', ''))
+        val_aw   = award.get('value', {})
+        batch['awards'].append(Award(
+            award_id,
+            ocid,
+            award.get('status', ''),
+            parse_date(award.get('date', '')),
+            val_aw.get('amount'),
+            val_aw.get('currency', ''),
+            val_aw.get('totalAmount'),
+        ))
+        for supplier in award.get('suppliers', []):
+            supp_id = str(supplier.get('id', ''))
+            batch['supplier_parties'].append(SupplierParty(supp_id, supplier.get('name', '')))
+            batch['suppliers_awards'].append(SupplierAward(award_id, supp_id, ocid))
+
+    # -----------------------------------------------------
+    # 6. CONTRACTS + AMENDMENTS + TRANSACTIONS
+    # -----------------------------------------------------
+    for contract in release.get('contracts', []):
+        con_id   = str(contract.get('id', ''))
+        award_id = str(contract.get('awardID', ''))
+        period   = contract.get('period', {})
+        val_c    = contract.get('value', {})
+
+        batch['placeholder_awards'].append(PlaceholderAward(award_id, ocid))
+        batch['contracts'].append(Contract(
+            con_id,
+            ocid,
+            award_id,
+            contract.get('status', ''),
+            parse_date(period.get('endDate', '')),
+            val_c.get('amount'),
+            val_c.get('currency', ''),
+            parse_date(contract.get('dateSigned', '')),
+        ))
+
+        # 6a. Contract amendments
+        amendments = contract.get('amendments', []) if 'contracts.amendments' in sections else ()
+        for amendment in amendments:
+            batch['contract_amendments'].append(Amendment(
+                str(amendment.get('id', '')),
+                con_id,
+                amendment.get('rationale', ''),
+                parse_date(amendment.get('date', '')),
+            ))
+
+        # 6b. Contract transactions: PK is (ocid, transaction_id)
+        implementation = contract.get('implementation', {})
+        for txn in implementation.get('transactions', []):
+            txn_val = txn.get('value', {})
+            batch['contract_transactions'].append(Transaction(
+                ocid,
+                str(txn.get('id', '')),
+                con_id,
+                txn.get('source', ''),
+                parse_date(txn.get('date', '')),
+                txn_val.get('amount'),
+                txn_val.get('currency', ''),
+            ))
+
+    # -----------------------------------------------------
+    # 7. RELATED_PROCESSES
+    # -----------------------------------------------------
+    processes = release.get('relatedProcesses', []) if 'relatedProcesses' in sections else ()
+    for process in processes:
+        batch['related_processes'].append(RelatedProcess(
+            str(process.get('id', '')),
+            ocid,
+            process.get('identifier', ''),
+            process.get('uri', ''),
+            ",".join(process.get('relationship', [])),
+            process.get('title', ''),
+            process.get('scheme', ''),
+        ))
+
+    return True
+
+# --------------------------------------------------------
+# Parameterized statements used by write_row_batch().
+# --------------------------------------------------------
+def upsert_statement(table, columns, key_columns, null_columns=(), skip_columns=()):
+    """
+    Builds "IF EXISTS ... UPDATE ... ELSE INSERT ..." for rows laid out as
+    `columns`, plus a function mapping a row to the statement's parameters.
+    Columns in `null_columns` are matched with IS NULL and left out of the INSERT;
+    columns in `skip_columns` are not written at all.
+    """
+    positions = {c: i for i, c in enumerate(columns)}
+    key_pos   = [positions[c] for c in key_columns]
+    written   = [c for c in columns if c not in null_columns and c not in skip_columns]
+    set_pos   = [positions[c] for c in written if c not in key_columns]
+    ins_cols  = written
+    ins_pos   = [positions[c] for c in ins_cols]
+
+    where = " AND ".join([f"{c} = ?" for c in key_columns] + [f"{c} IS NULL" for c in null_columns])
+    sql = (
+        f"IF EXISTS (SELECT 1 FROM {table} WHERE {where})\n"
+        f"    UPDATE {table} SET {', '.join(f'{columns[i]} = ?' for i in set_pos)}\n"
+        f"    WHERE {where};\n"
+        f"ELSE\n"
+        f"    INSERT INTO {table} ({', '.join(ins_cols)})\n"
+        f"    VALUES ({', '.join('?' for _ in ins_pos)});"
+    )
+
+    def params(row):
+        key = [row[i] for i in key_pos]
+        return key + [row[i] for i in set_pos] + key + [row[i] for i in ins_pos]
+
+    return sql, params
+
+def insert_missing_statement(table, columns, key_columns, extra=None):
+    """
+    Builds "IF NOT EXISTS ... INSERT ..." (rows that already exist are left alone).
+    `extra` is an optional {column: SQL literal} added to the INSERT.
+    """
+    positions = {c: i for i, c in enumerate(columns)}
+    key_pos   = [positions[c] for c in key_columns]
+    extra     = extra or {}
+
+    where = " AND ".join(f"{c} = ?" for c in key_columns)
+    sql = (
+        f"IF NOT EXISTS (SELECT 1 FROM {table} WHERE {where})\n"
+        f"    INSERT INTO {table} ({', '.join(list(columns) + list(extra))})\n"
+        f"    VALUES ({', '.join(['?'] * len(columns) + list(extra.values()))});"
+    )
+
+    def params(row):
+        return [row[i] for i in key_pos] + list(row)
+
+    return sql, params
+
+@lru_cache(maxsize=None)
+def statements(sections=OPTIONAL_SECTIONS):
+    """Parameterized statements used by write_row_batch(), leaving out the columns of excluded sections."""
+    skipped = {}
+    for section, (table, column) in SECTION_COLUMNS.items():
+        if section not in sections:
+            skipped.setdefault(table, []).append(column)
+
+    def upsert(table, key_columns, **kwargs):
+        return upsert_statement(
+            table, ROW_COLUMNS[table], key_columns,
+            skip_columns=tuple(skipped.get(table, ())), **kwargs
+        )
+
+    return {
+        'releases': upsert('releases', ('ocid',)),
+        'lots': upsert('lots', ('lot_id',)),
+        'release_parties': insert_missing_statement(
+            'release_parties', ROW_COLUMNS['release_parties'], ('ocid', 'party_id', 'role')
+        ),
+        # 'bids' rows with and without a related lot use different keys.
+        'bids_lot': upsert('bids', ('party_id', 'ocid', 'related_lot')),
+        'bids_no_lot': upsert('bids', ('party_id', 'ocid'), null_columns=('related_lot',)),
+        'awards': upsert('awards', ('award_id',)),
+        'supplier_parties': insert_missing_statement(
+            'parties', ROW_COLUMNS['supplier_parties'], ('party_id',)
+        ),
+        'suppliers_awards': insert_missing_statement(
+            'suppliers_awards', ROW_COLUMNS['suppliers_awards'],
+            ('award_id', 'supplier_id', 'supplier_ocid')
+        ),
+        'contracts': upsert('contracts', ('contract_id',)),
+        'contract_amendments': upsert('contract_amendments', ('amendment_id', 'contract_id')),
+        'contract_transactions': upsert('contract_transactions', ('ocid', 'transaction_id')),
+        'related_processes': upsert('related_processes', ('id',)),
+    }
+
+def _execute_rows(cursor, stmts, statement, rows):
+    sql, params = stmts[statement]
+    if rows:
+        ExecutemanyBackend(cursor).execute(sql, [params(row) for row in rows])
+
+# --------------------------------------------------------
+# Set-based reference checks. The keys of a batch go into the session temp table
+# #ref_keys, then one anti-join finds (or fills) the missing ones.
+# --------------------------------------------------------
+_REF_KEYS_RESET = """
+IF OBJECT_ID('tempdb..#ref_keys') IS NULL
+    CREATE TABLE #ref_keys (
+        ref_id NVARCHAR(255) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY,
+        ocid   NVARCHAR(100) COLLATE DATABASE_DEFAULT NULL
+    );
+ELSE
+    TRUNCATE TABLE #ref_keys;
+"""
+
+def _load_ref_keys(cursor, keys):
+    """Replaces the content of #ref_keys with `keys`, a {ref_id: ocid} dict."""
+    cursor.execute(_REF_KEYS_RESET)
+    ExecutemanyBackend(cursor).execute(
+        "INSERT INTO #ref_keys (ref_id, ocid) VALUES (?, ?)", list(keys.items())
+    )
+
+def _missing_parties(cursor, party_ids):
+    """Returns the ids in `party_ids` that are not in 'parties'."""
+    if not party_ids:
+        return set()
+    _load_ref_keys(cursor, dict.fromkeys(party_ids))
+    cursor.execute(
+        "SELECT k.ref_id FROM #ref_keys k "
+        "WHERE NOT EXISTS (SELECT 1 FROM parties p WHERE p.party_id = k.ref_id)"
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+def _insert_placeholder_awards(cursor, rows):
+    """
+    Adds a 'placeholder' award for every award_id referenced by a contract but
+    not in 'awards'. The ocid is the one of the first contract referencing it.
+    """
+    if not rows:
+        return
+    keys = {}
+    for award_id, ocid in rows:
+        keys.setdefault(award_id, ocid)
+    _load_ref_keys(cursor, keys)
+    cursor.execute(
+        "INSERT INTO awards (award_id, ocid, status) "
+        "SELECT k.ref_id, k.ocid, 'placeholder' FROM #ref_keys k "
+        "WHERE NOT EXISTS (SELECT 1 FROM awards a WHERE a.award_id = k.ref_id)"
+    )
+
+def _write_bids(cursor, stmts, rows):
+    _execute_rows(cursor, stmts, 'bids_lot', [bid for bid in rows if bid.related_lot is not None])
+    _execute_rows(cursor, stmts, 'bids_no_lot', [bid for bid in rows if bid.related_lot is None])
+
+class DeferredBids:
+    """
+    Bids whose party is not in 'parties' yet, for the duration of one file.
+
+    The party may be listed by a later release of the same file, so these bids
+    are retried by flush() once the whole file has been written. Bids still
+    without a party are then dropped with a single summary warning.
+    """
+
+    def __init__(self):
+        self.pending = {}  # {(party_id, ocid, related_lot): bid row}
+
+    def hold(self, bid):
+        self.pending[(bid.party_id, bid.ocid, bid.related_lot)] = bid
+
+    def discard(self, bid):
+        """A newer version of the same bid was written; the held one is stale."""
+        self.pending.pop((bid.party_id, bid.ocid, bid.related_lot), None)
+
+    def flush(self, cursor, sections=OPTIONAL_SECTIONS):
+        """Writes the held bids whose party has arrived. Returns the number dropped."""
+        if not self.pending:
+            return 0
+        rows = list(self.pending.values())
+        self.pending = {}
+
+        missing = _missing_parties(cursor, {bid.party_id for bid in rows})
+        _write_bids(cursor, statements(frozenset(sections)),
+                    [bid for bid in rows if bid.party_id not in missing])
+
+        # counted as errors by the pipeline's progress; the details at DEBUG level
+        dropped = [bid for bid in rows if bid.party_id in missing]
+        if dropped:
+            examples = ", ".join(f"{bid.party_id} ({bid.ocid})" for bid in dropped[:5])
+            logging.debug(
+                f"Skipped {len(dropped)} bid(s) whose party is missing from 'parties' "
+                f"({len(missing)} party id(s)), e.g. {examples}"
             )
-            VALUES (
-                '{escape_single_quotes(ocid)}',
-                '{escape_single_quotes(release_id_val)}',
-                {date_val},
-                '{tag_val}',
-                '{init_val}',
-                '{lang_val}',
-
-                '{tender_id_val}',
-                '{tender_title}',
-                '{tender_status}',
-                '{pm}',
-                '{pm_details}',
-                '{pm_rationale}',
-                '{main_cat}',
-                '{addl_cats}',
-                '{pe_id}',
-                {tstart},
-                {tend},
-                {tduration},
-                {tnum},
-                '{docs_str}',
-
-                '{item_id_val}',
-                '{desc_val}',
-                '{c_scheme}',
-                '{c_id}',
-                '{c_desc}',
-
-                '{addc_scheme}',
-                '{addc_id}',
-                '{addc_desc}'
-            );
-        END;
-        """
-        cursor.execute(sql_release)
-
-        # -----------------------------------------------------
-        # 2. LOTS (to satisfy bids referencing relatedLot)
-        # -----------------------------------------------------
-        for lot in tender_data.get('lots', []):
-            lot_id = str(lot.get('id', ''))
-            if not lot_id:
-                continue
-
-            lot_title = lot.get('title', '')
-            lot_status = lot.get('status', '')
-            cp = lot.get('contractPeriod', {})
-            start_date = parse_date(cp.get('startDate', ''))
-            end_date   = parse_date(cp.get('endDate', ''))
-
-            sql_check_lot = f"""
-            SELECT 1 FROM lots
-            WHERE lot_id = '{escape_single_quotes(lot_id)}'
-            """
-            cursor.execute(sql_check_lot)
-            existing_lot = cursor.fetchone()
-
-            if existing_lot:
-                sql_update_lot = f"""
-                UPDATE lots
-                SET
-                    ocid = '{escape_single_quotes(ocid)}',
-                    title = '{escape_single_quotes(lot_title)}',
-                    status = '{escape_single_quotes(lot_status)}',
-                    contract_period_start_date = {start_date},
-                    contract_period_end_date   = {end_date}
-                WHERE lot_id = '{escape_single_quotes(lot_id)}';
-                """
-                cursor.execute(sql_update_lot)
-            else:
-                sql_insert_lot = f"""
-                INSERT INTO lots (
-                    lot_id, ocid, title, status,
-                    contract_period_start_date, contract_period_end_date
-                )
-                VALUES (
-                    '{escape_single_quotes(lot_id)}',
-                    '{escape_single_quotes(ocid)}',
-                    '{escape_single_quotes(lot_title)}',
-                    '{escape_single_quotes(lot_status)}',
-                    {start_date},
-                    {end_date}
-                );
-                """
-                cursor.execute(sql_insert_lot)
-
-        # -----------------------------------------------------
-        # 3. PARTIES + RELEASE_PARTIES
-        # -----------------------------------------------------
-        for party in release.get('parties', []):
-            party_id = party.get('id', '').strip()
-            address  = party.get('address', {})
-            name     = party.get('name','').strip()
-            street   = address.get('streetAddress','').strip()
-            locality = address.get('locality','').strip()
-            region   = address.get('region','').strip()
-            postal   = address.get('postalCode','').strip()
-            country  = address.get('countryName','').strip()
-            # Storing "details" as JSON text
-            import json as pyjson
-            details  = pyjson.dumps(party.get('details',{}))
-
-            new_alias = f"{name}|{street}|{locality}|{region}|{postal}|{country}"
-
-            sql_check_party = f"""
-            SELECT name, street_address, locality, region, postal_code, country_name, alias_parties
-            FROM parties
-            WHERE party_id = '{escape_single_quotes(party_id)}'
-            """
-            cursor.execute(sql_check_party)
-            row_party = cursor.fetchone()
-
-            if not row_party:
-                sql_insert_party = f"""
-                INSERT INTO parties (
-                    party_id, name, street_address, locality, region, postal_code,
-                    country_name, details, alias_parties
-                )
-                VALUES (
-                    '{escape_single_quotes(party_id)}',
-                    '{escape_single_quotes(name)}',
-                    '{escape_single_quotes(street)}',
-                    '{escape_single_quotes(locality)}',
-                    '{escape_single_quotes(region)}',
-                    '{escape_single_quotes(postal)}',
-                    '{escape_single_quotes(country)}',
-                    '{escape_single_quotes(details)}',
-                    NULL
-                );
-                """
-                cursor.execute(sql_insert_party)
-            else:
-                stored_name, stored_street, stored_loc, stored_reg, stored_post, stored_ctry, stored_alias = row_party
-                stored_name  = stored_name  or ""
-                stored_street= stored_street or ""
-                stored_loc   = stored_loc   or ""
-                stored_reg   = stored_reg   or ""
-                stored_post  = stored_post  or ""
-                stored_ctry  = stored_ctry  or ""
-                stored_alias = stored_alias or ""
-
-                stored_core  = f"{stored_name}|{stored_street}|{stored_loc}|{stored_reg}|{stored_post}|{stored_ctry}"
-
-                sql_update_party = f"""
-                UPDATE parties
-                SET
-                    name = '{escape_single_quotes(name)}',
-                    street_address = '{escape_single_quotes(street)}',
-                    locality       = '{escape_single_quotes(locality)}',
-                    region         = '{escape_single_quotes(region)}',
-                    postal_code    = '{escape_single_quotes(postal)}',
-                    country_name   = '{escape_single_quotes(country)}',
-                    details        = '{escape_single_quotes(details)}'
-                """
-                if new_alias != stored_core:
-                    old_aliases = stored_alias.split(',') if stored_alias else []
-                    if new_alias not in old_aliases:
-                        updated_alias = (stored_alias + ',' + new_alias) if stored_alias else new_alias
-                        sql_update_party += f", alias_parties = '{escape_single_quotes(updated_alias)}'"
-
-                sql_update_party += f" WHERE party_id = '{escape_single_quotes(party_id)}';"
-                cursor.execute(sql_update_party)
-
-            # release_parties
-            for role_val in party.get('roles', []):
-                role_val = role_val.strip()
-                sql_rp_check = f"""
-                SELECT 1 FROM release_parties
-                WHERE ocid = '{escape_single_quotes(ocid)}'
-                  AND party_id = '{escape_single_quotes(party_id)}'
-                  AND role = '{escape_single_quotes(role_val)}'
-                """
-                cursor.execute(sql_rp_check)
-                rp_found = cursor.fetchone()
-                if not rp_found:
-                    sql_insert_rp = f"""
-                    INSERT INTO release_parties (ocid, party_id, role)
-                    VALUES (
-                        '{escape_single_quotes(ocid)}',
-                        '{escape_single_quotes(party_id)}',
-                        '{escape_single_quotes(role_val)}'
-                    );
-                    """
-                    cursor.execute(sql_insert_rp)
-
-        # -----------------------------------------------------
-        # 4. BIDS
-        # -----------------------------------------------------
-        for bid in release.get('bids', []):
-            bid_party_id = str(bid.get('id',''))
-            rel_lots     = bid.get('relatedLots', [])
-            # Check if party is in parties
-            sql_check_bid_party = f"SELECT 1 FROM parties WHERE party_id = '{escape_single_quotes(bid_party_id)}'"
-            cursor.execute(sql_check_bid_party)
-            if not cursor.fetchone():
-                warn_b = f"⚠️ Missing party: {bid_party_id} in release {ocid}. Skipping bid."
-                print(warn_b)
-                logging.warning(warn_b)
-                continue
-
-            admissible = bid.get('admissible','NULL')
-            conform    = bid.get('conform','NULL')
-            value_b    = bid.get('value','NULL')
-            value_u    = bid.get('valueUnit','')
-            if not value_u:
-                value_u = 'NULL'
-            else:
-                value_u = f"'{escape_single_quotes(value_u)}'"
-
-            if not rel_lots:
-                # single row, related_lot = NULL
-                sql_exists_bid = f"""
-                SELECT bid_row_id FROM bids
-                WHERE party_id = '{escape_single_quotes(bid_party_id)}'
-                  AND ocid = '{escape_single_quotes(ocid)}'
-                  AND related_lot IS NULL
-                """
-                cursor.execute(sql_exists_bid)
-                row_bid = cursor.fetchone()
-                if row_bid:
-                    # update
-                    sql_update_bid = f"""
-                    UPDATE bids
-                    SET
-                        admissible = {admissible},
-                        conform    = {conform},
-                        value      = {value_b},
-                        value_unit = {value_u}
-                    WHERE bid_row_id = {row_bid[0]};
-                    """
-                    cursor.execute(sql_update_bid)
-                else:
-                    # insert
-                    sql_insert_bid = f"""
-                    INSERT INTO bids (
-                        party_id, ocid, related_lot,
-                        admissible, conform, value, value_unit
-                    )
-                    VALUES (
-                        '{escape_single_quotes(bid_party_id)}',
-                        '{escape_single_quotes(ocid)}',
-                        NULL,
-                        {admissible},
-                        {conform},
-                        {value_b},
-                        {value_u}
-                    );
-                    """
-                    cursor.execute(sql_insert_bid)
-            else:
-                for l in rel_lots:
-                    rl = escape_single_quotes(str(l))
-                    sql_exists_bid_rl = f"""
-                    SELECT bid_row_id FROM bids
-                    WHERE party_id = '{escape_single_quotes(bid_party_id)}'
-                      AND ocid = '{escape_single_quotes(ocid)}'
-                      AND related_lot = '{rl}'
-                    """
-                    cursor.execute(sql_exists_bid_rl)
-                    row_bid_rl = cursor.fetchone()
-                    if row_bid_rl:
-                        # update
-                        sql_update_bid_rl = f"""
-                        UPDATE bids
-                        SET
-                            admissible = {admissible},
-                            conform = {conform},
-                            value = {value_b},
-                            value_unit = {value_u}
-                        WHERE bid_row_id = {row_bid_rl[0]};
-                        """
-                        cursor.execute(sql_update_bid_rl)
-                    else:
-                        # insert
-                        sql_insert_bid_rl = f"""
-                        INSERT INTO bids (
-                            party_id, ocid, related_lot,
-                            admissible, conform, value, value_unit
-                        )
-                        VALUES (
-                            '{escape_single_quotes(bid_party_id)}',
-                            '{escape_single_quotes(ocid)}',
-                            '{rl}',
-                            {admissible},
-                            {conform},
-                            {value_b},
-                            {value_u}
-                        );
-                        """
-                        cursor.execute(sql_insert_bid_rl)
-
-        # -----------------------------------------------------
-        # 5. AWARDS + SUPPLIERS_AWARDS
-        # -----------------------------------------------------
-        for award in release.get('awards', []):
-            award_id = str(award.get('id',''))
-            val_aw   = award.get('value',{})
-            a_check  = f"SELECT 1 FROM awards WHERE award_id = '{escape_single_quotes(award_id)}'"
-            cursor.execute(a_check)
-            award_exists = cursor.fetchone()
-
-            if award_exists:
-                sql_update_award = f"""
-                UPDATE awards
-                SET
-                    ocid = '{escape_single_quotes(ocid)}',
-                    status = '{escape_single_quotes(award.get('status',''))}',
-                    date   = {parse_date(award.get('date',''))},
-                    value_amount = {val_aw.get('amount','NULL')},
-                    value_currency = '{escape_single_quotes(val_aw.get('currency',''))}',
-                    value_total_amount = {val_aw.get('totalAmount','NULL')}
-                WHERE award_id = '{escape_single_quotes(award_id)}';
-                """
-                cursor.execute(sql_update_award)
-            else:
-                sql_insert_award = f"""
-                INSERT INTO awards (
-                    award_id, ocid, status, date,
-                    value_amount, value_currency, value_total_amount
-                )
-                VALUES (
-                    '{escape_single_quotes(award_id)}',
-                    '{escape_single_quotes(ocid)}',
-                    '{escape_single_quotes(award.get('status',''))}',
-                    {parse_date(award.get('date',''))},
-                    {val_aw.get('amount','NULL')},
-                    '{escape_single_quotes(val_aw.get('currency',''))}',
-                    {val_aw.get('totalAmount','NULL')}
-                );
-                """
-                cursor.execute(sql_insert_award)
-
-            for supplier in award.get('suppliers', []):
-                supp_id  = str(supplier.get('id',''))
-                # ensure party
-                s_check  = f"SELECT party_id FROM parties WHERE party_id = '{escape_single_quotes(supp_id)}'"
-                cursor.execute(s_check)
-                if not cursor.fetchone():
-                    sup_name = escape_single_quotes(supplier.get('name',''))
-                    s_insert = f"""
-                    INSERT INTO parties (party_id, name)
-                    VALUES ('{escape_single_quotes(supp_id)}', '{sup_name}');
-                    """
-                    cursor.execute(s_insert)
-
-                # link in suppliers_awards
-                s_aw_check = f"""
-                SELECT 1 FROM suppliers_awards
-                WHERE award_id = '{escape_single_quotes(award_id)}'
-                  AND supplier_id = '{escape_single_quotes(supp_id)}'
-                  AND supplier_ocid = '{escape_single_quotes(ocid)}'
-                """
-                cursor.execute(s_aw_check)
-                if not cursor.fetchone():
-                    s_aw_insert = f"""
-                    INSERT INTO suppliers_awards (award_id, supplier_id, supplier_ocid)
-                    VALUES (
-                        '{escape_single_quotes(award_id)}',
-                        '{escape_single_quotes(supp_id)}',
-                        '{escape_single_quotes(ocid)}'
-                    );
-                    """
-                    cursor.execute(s_aw_insert)
-
-        # -----------------------------------------------------
-        # 6. CONTRACTS + AMENDMENTS + TRANSACTIONS
-        # -----------------------------------------------------
-        for contract in release.get('contracts', []):
-            con_id     = str(contract.get('id',''))
-            award_id   = str(contract.get('awardID',''))
-            period     = contract.get('period',{})
-            val_c      = contract.get('value',{})
-
-            # If award missing, insert placeholder
-            aw_check = f"SELECT 1 FROM awards WHERE award_id = '{escape_single_quotes(award_id)}'"
-            cursor.execute(aw_check)
-            if not cursor.fetchone():
-                s_insert_pl = f"""
-                IF NOT EXISTS (SELECT * FROM awards WHERE award_id = '{escape_single_quotes(award_id)}')
-                BEGIN
-                    INSERT INTO awards (
-                        award_id, ocid, status, date, value_amount,
-                        value_currency, value_total_amount
-                    )
-                    VALUES (
-                        '{escape_single_quotes(award_id)}',
-                        '{escape_single_quotes(ocid)}',
-                        'placeholder',
-                        NULL,
-                        NULL,
-                        NULL,
-                        NULL
-                    );
-                END;
-                """
-                cursor.execute(s_insert_pl)
-
-            sql_check_contract = f"""
-            SELECT 1 FROM contracts WHERE contract_id = '{escape_single_quotes(con_id)}'
-            """
-            cursor.execute(sql_check_contract)
-            contract_exists = cursor.fetchone()
-
-            if contract_exists:
-                sql_update_contract = f"""
-                UPDATE contracts
-                SET
-                    ocid = '{escape_single_quotes(ocid)}',
-                    award_id = '{escape_single_quotes(award_id)}',
-                    status = '{escape_single_quotes(contract.get('status',''))}',
-                    period_end_date = {parse_date(period.get('endDate',''))},
-                    value_amount = {val_c.get('amount','NULL')},
-                    value_currency = '{escape_single_quotes(val_c.get('currency',''))}',
-                    date_signed = {parse_date(contract.get('dateSigned',''))}
-                WHERE contract_id = '{escape_single_quotes(con_id)}';
-                """
-                cursor.execute(sql_update_contract)
-            else:
-                sql_insert_contract = f"""
-                INSERT INTO contracts (
-                    contract_id, ocid, award_id, status, period_end_date,
-                    value_amount, value_currency, date_signed
-                )
-                VALUES (
-                    '{escape_single_quotes(con_id)}',
-                    '{escape_single_quotes(ocid)}',
-                    '{escape_single_quotes(award_id)}',
-                    '{escape_single_quotes(contract.get('status',''))}',
-                    {parse_date(period.get('endDate',''))},
-                    {val_c.get('amount','NULL')},
-                    '{escape_single_quotes(val_c.get('currency',''))}',
-                    {parse_date(contract.get('dateSigned',''))}
-                );
-                """
-                cursor.execute(sql_insert_contract)
-
-            # 6a. Contract amendments
-            for amendment in contract.get('amendments', []):
-                amend_id = str(amendment.get('id',''))
-                rationale= amendment.get('rationale','')
-                a_date   = parse_date(amendment.get('date',''))
-                check_am = f"""
-                SELECT 1 FROM contract_amendments
-                WHERE amendment_id = '{escape_single_quotes(amend_id)}'
-                  AND contract_id  = '{escape_single_quotes(con_id)}'
-                """
-                cursor.execute(check_am)
-                am_exists = cursor.fetchone()
-                if am_exists:
-                    sql_up_am = f"""
-                    UPDATE contract_amendments
-                    SET
-                        rationale = '{escape_single_quotes(rationale)}',
-                        amendment_date = {a_date}
-                    WHERE
-                        amendment_id = '{escape_single_quotes(amend_id)}'
-                        AND contract_id = '{escape_single_quotes(con_id)}';
-                    """
-                    cursor.execute(sql_up_am)
-                else:
-                    sql_ins_am = f"""
-                    INSERT INTO contract_amendments (
-                        amendment_id, contract_id, rationale, amendment_date
-                    )
-                    VALUES (
-                        '{escape_single_quotes(amend_id)}',
-                        '{escape_single_quotes(con_id)}',
-                        '{escape_single_quotes(rationale)}',
-                        {a_date}
-                    );
-                    """
-                    cursor.execute(sql_ins_am)
-
-            # 6b. Contract transactions: PK is now (ocid, transaction_id)
-            implementation = contract.get('implementation', {})
-            for txn in implementation.get('transactions', []):
-                txn_id = str(txn.get('id', ''))
-                txn_source = txn.get('source','')
-                txn_date   = parse_date(txn.get('date',''))
-                txn_val    = txn.get('value', {})
-                txn_amt    = txn_val.get('amount','NULL')
-                txn_curr   = escape_single_quotes(txn_val.get('currency',''))
-
-                # Check if this transaction (ocid, txn_id) already exists
-                check_txn = f"""
-                SELECT 1 FROM contract_transactions
-                WHERE ocid = '{escape_single_quotes(ocid)}'
-                  AND transaction_id = '{escape_single_quotes(txn_id)}'
-                """
-                cursor.execute(check_txn)
-                txn_exists = cursor.fetchone()
-
-                if txn_exists:
-                    # We do an UPDATE
-                    sql_up_txn = f"""
-                    UPDATE contract_transactions
-                    SET
-                        contract_id     = '{escape_single_quotes(con_id)}',
-                        source         = '{escape_single_quotes(txn_source)}',
-                        date           = {txn_date},
-                        value_amount   = {txn_amt},
-                        value_currency = '{txn_curr}'
-                    WHERE ocid = '{escape_single_quotes(ocid)}'
-                      AND transaction_id = '{escape_single_quotes(txn_id)}';
-                    """
-                    cursor.execute(sql_up_txn)
-                else:
-                    # We do an INSERT
-                    sql_ins_txn = f"""
-                    INSERT INTO contract_transactions (
-                        ocid, transaction_id, contract_id, source, date,
-                        value_amount, value_currency
-                    )
-                    VALUES (
-                        '{escape_single_quotes(ocid)}',
-                        '{escape_single_quotes(txn_id)}',
-                        '{escape_single_quotes(con_id)}',
-                        '{escape_single_quotes(txn_source)}',
-                        {txn_date},
-                        {txn_amt},
-                        '{txn_curr}'
-                    );
-                    """
-                    cursor.execute(sql_ins_txn)
-
-        # -----------------------------------------------------
-        # 7. RELATED_PROCESSES
-        # -----------------------------------------------------
-        for process in release.get('relatedProcesses', []):
-            rp_id = str(process.get('id',''))
-            sql_check_proc = f"SELECT 1 FROM related_processes WHERE id = '{escape_single_quotes(rp_id)}'"
-            cursor.execute(sql_check_proc)
-            if cursor.fetchone():
-                sql_update_proc = f"""
-                UPDATE related_processes
-                SET
-                    ocid = '{escape_single_quotes(ocid)}',
-                    identifier = '{escape_single_quotes(process.get('identifier',''))}',
-                    uri = '{escape_single_quotes(process.get('uri',''))}',
-                    relationship = '{escape_single_quotes(",".join(process.get('relationship',[])))}',
-                    title = '{escape_single_quotes(process.get('title',''))}',
-                    scheme= '{escape_single_quotes(process.get('scheme',''))}'
-                WHERE id = '{escape_single_quotes(rp_id)}';
-                """
-                cursor.execute(sql_update_proc)
+        return len(dropped)
+
+def _stored_parties(cursor, party_ids, columns):
+    """
+    {party_id: stored values of `columns`} of the `party_ids` already in
+    'parties' (`columns` starts with party_id, returned as spelled in `party_ids`).
+    """
+    _load_ref_keys(cursor, dict.fromkeys(party_ids))
+    cursor.execute(
+        f"SELECT {', '.join(['k.ref_id'] + ['p.' + c for c in columns[1:]])} FROM parties p "
+        "JOIN #ref_keys k ON k.ref_id = p.party_id"
+    )
+    return {row[0]: tuple(value or "" for value in row) for row in cursor.fetchall()}
+
+def _write_parties(cursor, rows, alias_store, with_details=True):
+    """
+    Inserts new parties and updates the existing ones that changed; an
+    existing party whose name/address changed gets the new combination
+    recorded as an alias. The stored parties of the batch are read with one
+    join on #ref_keys. Without `with_details` the 'details' column is left
+    untouched.
+    """
+    if not rows:
+        return
+    columns = list(ROW_COLUMNS['parties'] if with_details else ROW_COLUMNS['parties'][:-1])
+    stored = _stored_parties(cursor, {row.party_id for row in rows}, columns)
+
+    inserts, updates, aliases = {}, {}, []
+    for row in rows:
+        party_id = row.party_id
+        row = tuple(row[:len(columns)])
+        values = tuple(value or "" for value in row)
+        previous = stored.get(party_id)
+        stored[party_id] = values
+        if previous is None:
+            inserts[party_id] = row
+            continue
+        if values == previous:
+            continue
+        if party_id in inserts:
+            inserts[party_id] = row
+        else:
+            updates[party_id] = list(row[1:]) + [party_id]
+        if values[1:7] != previous[1:7]:
+            aliases.append((party_id, "|".join(values[1:7])))
+
+    if inserts:
+        ExecutemanyBackend(cursor).execute(
+            f"INSERT INTO parties ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['?'] * len(columns))})",
+            list(inserts.values())
+        )
+    if updates:
+        ExecutemanyBackend(cursor).execute(
+            f"UPDATE parties SET {', '.join(f'{c} = ?' for c in columns[1:])} WHERE party_id = ?",
+            list(updates.values())
+        )
+    if aliases:
+        alias_store.load(cursor, {party_id for party_id, _ in aliases})
+        for party_id, alias in aliases:
+            alias_store.add(cursor, party_id, alias)
+
+def write_row_batch(cursor, batch, alias_store, deferred_bids, sections=OPTIONAL_SECTIONS):
+    """
+    Writes a batch built by transform_release() in WRITE_ORDER. Bids whose
+    party is not in 'parties' yet are held in `deferred_bids` (see DeferredBids).
+    `sections` must match the one given to transform_release().
+    """
+    stmts = statements(frozenset(sections))
+    _execute_rows(cursor, stmts, 'releases', batch['releases'])
+    _execute_rows(cursor, stmts, 'lots', batch['lots'])
+    _write_parties(cursor, batch['parties'], alias_store, 'parties.details' in sections)
+    _execute_rows(cursor, stmts, 'release_parties', batch['release_parties'])
+
+    bids = batch['bids']
+    if bids:
+        missing = _missing_parties(cursor, {bid.party_id for bid in bids})
+        kept = []
+        for bid in bids:
+            if bid.party_id in missing:
+                deferred_bids.hold(bid)
             else:
-                sql_insert_proc = f"""
-                INSERT INTO related_processes (
-                    id, ocid, identifier, uri, relationship, title, scheme
-                )
-                VALUES (
-                    '{escape_single_quotes(rp_id)}',
-                    '{escape_single_quotes(ocid)}',
-                    '{escape_single_quotes(process.get('identifier',''))}',
-                    '{escape_single_quotes(process.get('uri',''))}',
-                    '{escape_single_quotes(",".join(process.get('relationship',[])))}',
-                    '{escape_single_quotes(process.get('title',''))}',
-                    '{escape_single_quotes(process.get('scheme',''))}'
-                );
-                """
-                cursor.execute(sql_insert_proc)
+                deferred_bids.discard(bid)
+                kept.append(bid)
+        _write_bids(cursor, stmts, kept)
+
+    _execute_rows(cursor, stmts, 'awards', batch['awards'])
+    _execute_rows(cursor, stmts, 'supplier_parties', batch['supplier_parties'])
+    _execute_rows(cursor, stmts, 'suppliers_awards', batch['suppliers_awards'])
+    _insert_placeholder_awards(cursor, batch['placeholder_awards'])
+    for table in ('contracts', 'contract_amendments', 'contract_transactions', 'related_processes'):
+        _execute_rows(cursor, stmts, table, batch[table])
+
+def iter_row_batches(releases, accepts=None, select_item=select_tender_item,
+                     sections=OPTIONAL_SECTIONS, batch_size=500):
+    """
+    Yields the row batches of the releases for which `accepts(release)` is true
+    (all of them if `accepts` is None), `batch_size` releases per batch.
+    `select_item` chooses the tender item kept in 'releases', `sections` the
+    optional sections transformed.
+    """
+    batch = new_row_batch()
+    in_batch = 0
+    for release in releases:
+        if accepts is not None and not accepts(release):
+            continue
+        if not transform_release(release, batch, select_item, sections):
+            continue
+        in_batch += 1
+        if in_batch >= batch_size:
+            yield batch
+            batch = new_row_batch()
+            in_batch = 0
+    if in_batch:
+        yield batch
+
+def write_row_batches(cursor, batches, sections=OPTIONAL_SECTIONS):
+    """
+    Writes the row batches of one file, then the bids and aliases they left
+    pending. Returns the number of releases written.
+    """
+    alias_store = PartyAliasStore()
+    deferred_bids = DeferredBids()
+    written = 0
+
+    for batch in batches:
+        write_row_batch(cursor, batch, alias_store, deferred_bids, sections)
+        written += len(batch['releases'])
+
+    dropped = deferred_bids.flush(cursor, sections)
+    if dropped:
+        logging.warning(f"Skipped {dropped} bid(s) whose party is missing from 'parties'")
+    alias_store.flush(cursor)
+    return written
+
+def insert_releases(cursor, releases, accepts=None, select_item=select_tender_item,
+                    sections=OPTIONAL_SECTIONS, batch_size=500):
+    """
+    Inserts/updates every release for which `accepts(release)` is true (all of them
+    if `accepts` is None). `select_item` chooses the tender item kept in 'releases',
+    `sections` the optional sections loaded.
+    Single-threaded; pipeline.run_pipeline() does the same work with the transform
+    and the writes overlapping. Returns the number of releases written.
+    """
+    batches = iter_row_batches(releases, accepts, select_item, sections, batch_size)
+    return write_row_batches(cursor, batches, sections)
+
+# --------------------------------------------------------
+# Parse cache
+# --------------------------------------------------------
+@lru_cache(maxsize=None)
+def _module_digest(module_name):
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    return file_digest(path)[:16] if path else None
+
+# shared modules the target filters take their category codes from
+FILTER_MODULES = ('categories', 'cleaning')
+
+def _filter_key(func):
+    """
+    Cache key part of a target filter: its name and a digest of the module
+    that defines it and of FILTER_MODULES, so that editing the filter or the
+    category sets (categories.CATEGORY_SETS) does not load batches it filtered
+    before.
+    """
+    if func is None:
+        return None
+    modules = (func.__module__,) + FILTER_MODULES
+    return f"{func.__module__}.{func.__qualname__}", tuple(_module_digest(name) for name in modules)
+
+def _batches_to_tables(batches):
+    return {
+        table: [(batch_no,) + tuple(row) for batch_no, batch in enumerate(batches)
+                for row in batch[table]]
+        for table in WRITE_ORDER
+    }
+
+def _tables_to_batches(tables, count):
+    batches = [new_row_batch() for _ in range(count)]
+    for table in WRITE_ORDER:
+        record = RECORD_TYPES[table]
+        for row in tables[table] or ():
+            batches[row[0]][table].append(record._make(row[1:]))
+    return batches
+
+def load_row_batches(file_path, specs, batch_size, cache=None):
+    """
+    Row batches of a JSON file for each of `specs`, a list of
+    (target name, accepts, select_item, sections) tuples.
+
+    Returns None if the file has no releases, else
+    ({target name: (row batches, releases kept)}, number of releases).
+    With a parse_cache.ParseCache `cache`, the batches of a target are taken
+    from it when they are there (the file is only decoded if one of the
+    targets is missing), and stored in it otherwise. The entries are keyed by
+    the filters (with the source of their module) and sections of a target,
+    not by its name.
+    """
+    keys = {}
+    per_target = {}
+    total = None
+    if cache is not None:
+        for name, accepts, select_item, sections in specs:
+            keys[name] = cache.key(
+                file_path, 'releases', PARSER_VERSION, _filter_key(accepts),
+                _filter_key(select_item), sorted(sections), batch_size
+            )
+            entry = cache.load(keys[name], CACHE_COLUMNS)
+            if entry is not None:
+                tables, meta = entry
+                per_target[name] = (_tables_to_batches(tables, meta['batches']), meta['kept'])
+                total = meta['total']
+
+    missing = [spec for spec in specs if spec[0] not in per_target]
+    if not missing:
+        return per_target, total
+
+    releases = load_releases(file_path)
+    if releases is None:
+        return None
+    prune_sections(releases, frozenset().union(*(spec[3] for spec in missing)))
+
+    for name, accepts, select_item, sections in missing:
+        batches = list(iter_row_batches(releases, accepts, select_item, sections, batch_size))
+        kept = sum(len(batch['releases']) for batch in batches)
+        per_target[name] = (batches, kept)
+        if cache is not None:
+            cache.save(keys[name], _batches_to_tables(batches), CACHE_COLUMNS,
+                       {'batches': len(batches), 'kept': kept, 'total': len(releases)})
+
+    return per_target, len(releases)
+
+def insert_json_data(cursor, file_path, cache=None):
+    """
+    Reads a JSON file and inserts/updates data in the database. With a
+    parse_cache.ParseCache `cache`, the rows of an unchanged file are read
+    from the cache instead.
+    """
+    if cache is None:
+        releases = load_releases(file_path)
+        if releases is None:
+            return
+        insert_releases(cursor, releases)
+    else:
+        specs = [('all', None, select_tender_item, OPTIONAL_SECTIONS)]
+        result = load_row_batches(file_path, specs, 500, cache)
+        if result is None:
+            return
+        per_target, _ = result
+        write_row_batches(cursor, per_target['all'][0])
 
     done_msg = f"  → Finished inserting/updating data from: {file_path}"
     print(done_msg)
@@ -4,21 +4,32 @@ Script for processing multiple JSON data files from SEAO into a SQL database.
 
 In this updated version:
   - We still call `create_tables` to set up both main and history tables (with triggers).
-  - We call `insert_json_data` for each JSON file, which now inserts/updates data (including
-    contract transactions).
+  - JSON files are loaded through pipeline.run_pipeline(): they are decoded and transformed
+    in parallel worker processes and committed in date order, with per-stage throughput
+    logged at the end.
   - We also extract date ranges (start_date, end_date) from the filenames, then sort files
     by those dates before processing.
   - On UPDATE, triggers log old rows into the _history tables automatically.
+  - Each file is parsed once and its releases are routed to every target in
+    targets.TARGETS (JSONtest2 for all releases, ConstructionDB for the
+    construction subset), each through its own connection.
 """
 
+import argparse
 import logging
 import pyodbc
 import traceback
 import os
 import re
+import sys
 
+# parse_cache.py is shared with the XML loader
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from parse_cache import PARSE_CACHE_DIR, ParseCache
 from table_creation import create_tables
-from data_insertion import insert_json_data
+from pipeline import run_pipeline
+from targets import TARGETS
 
 # Configure logging: messages will be written to process.log and also printed to the console.
 logging.basicConfig(
@@ -28,12 +39,11 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-def get_connection():
+def get_connection(database='JSONtest2'):
     """
     Update with your server and DB details. This example uses Windows authentication.
     """
     server = 'DESKTOP-91AK8MU\\SQLEXPRESS'  # <-- Change to your server
-    database = 'JSONtest2'             # <-- Change to your DB name
     connection_string = (
         "DRIVER={ODBC Driver 17 for SQL Server};"
         f"SERVER={server};"
@@ -42,7 +52,7 @@ def get_connection():
     )
     try:
         conn = pyodbc.connect(connection_string)
-        msg = "✅ Database connection established."
+        msg = f"✅ Database connection established ({database})."
         print(msg)
         logging.info(msg)
         return conn
@@ -64,16 +74,28 @@ def extract_date_from_filename(filename):
         return match.group(1), match.group(2)
     return None, None
 
-def main():
-    conn = get_connection()
-    cursor = conn.cursor()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Loads the SEAO JSON files into every target.")
+    parser.add_argument("--cache-dir", default=PARSE_CACHE_DIR,
+                        help="parse cache: row batches of unchanged files are read from here "
+                             "instead of decoding the JSON again")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="decode every file, without reading or filling the parse cache")
+    args = parser.parse_args(argv)
+    cache = None if args.no_cache else ParseCache(args.cache_dir)
+
+    targets = TARGETS
+    for target in targets:
+        target.conn = get_connection(target.database)
+        target.cursor = target.conn.cursor()
 
     try:
         msg = "\n🔨 Creating tables (with history) if they don't exist..."
         print(msg)
         logging.info(msg)
-        create_tables(cursor)
-        conn.commit()
+        for target in targets:
+            create_tables(target.cursor)
+            target.conn.commit()
 
         msg = "✅ Tables (and history tables) are ready.\n"
         print(msg)
@@ -100,24 +122,10 @@ def main():
             # If start_date or end_date is None, treat them as '' for sorting
             files_with_dates.sort(key=lambda x: (x[0] or '', x[1] or '', x[2]))
 
-            # Process files in sorted order
-            for start_date, end_date, filename, file_path in files_with_dates:
-                msg = f"  → Inserting data from: {file_path}"
-                print(msg)
-                logging.info(msg)
-                try:
-                    insert_json_data(cursor, file_path=file_path)
-                    conn.commit()
-                    msg_done = f"✅ Done processing {filename}"
-                    print(msg_done)
-                    logging.info(msg_done)
-                except Exception as ex:
-                    msg_error = f"❌ Error inserting {filename}: {ex}"
-                    print(msg_error)
-                    logging.error(msg_error)
-                    traceback.print_exc()
-                    conn.rollback()
-                    # We continue processing remaining files
+            # Process files in sorted order: each file is parsed once, several files are
+            # decoded at a time, and they are committed in this order.
+            run_pipeline([file_path for _, _, _, file_path in files_with_dates], targets,
+                         cache=cache)
 
             msg = "✅ All JSON files processed.\n"
             print(msg)
@@ -132,10 +140,12 @@ def main():
         print(msg)
         logging.exception(msg)
         traceback.print_exc()
-        conn.rollback()
+        for target in targets:
+            target.conn.rollback()
     finally:
-        cursor.close()
-        conn.close()
+        for target in targets:
+            target.cursor.close()
+            target.conn.close()
         msg = "\n🔌 Database connection closed."
         print(msg)
         logging.info("Database connection closed.")
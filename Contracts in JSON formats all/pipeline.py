@@ -0,0 +1,305 @@
+"""
+pipeline.py
+Staged JSON ingest. Files are decoded and transformed in parallel worker
+processes, put back in date order by a reorder buffer, and written by one
+thread per target, so a long backfill is bounded by the database writes rather
+than by single-core JSON decoding.
+
+    workers (processes) ──► scheduler / reorder buffer ──► writer (one per target)
+
+  - workers   : json.load() of a file, drop the optional sections no target
+                loads, then filter and transform the releases of every target
+                into row batches (decode_and_transform, no database access),
+                or take the batches from the parse cache if the file is unchanged.
+  - scheduler : keeps up to REORDER_WINDOW files in flight, and hands finished
+                files to the writers strictly in the order given (the callers
+                sort by the dates in the file names), whatever order they finish in.
+  - writer    : write_row_batch() for each batch, commit per file.
+
+Target filters (accepts / select_item) are sent to the worker processes, so
+they must be module-level functions (no lambdas).
+
+Every stage keeps a StageCounter (items, busy time, time spent waiting on its
+queues). The counters are logged at the end of the run: the stage with the most
+busy time and the least waiting is the bottleneck. While the run goes, each
+writer reports its files done, ETA and errors (failed files, bids dropped for a
+missing party) through a progress.Progress, at most once per interval.
+"""
+
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from data_insertion import DeferredBids, PartyAliasStore, load_row_batches, write_row_batch
+
+# progress.py is shared with the migration scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from progress import Progress
+
+# Leave one core for the scheduler and the writer threads.
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Files in flight per worker (decoding, or done and waiting for an earlier file).
+REORDER_WINDOW = 2
+BATCH_QUEUE_SIZE = 8
+BATCH_SIZE = 500
+
+_STOP = None  # end-of-stream marker put on every writer queue
+
+
+class StageCounter:
+    """
+    Throughput counters for one pipeline stage.
+
+    busy : seconds spent doing the stage's own work.
+    wait : seconds blocked on an empty input queue or a full output queue.
+    """
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.busy = 0.0
+        self.wait = 0.0
+
+    def get(self, q):
+        start = time.perf_counter()
+        item = q.get()
+        self.wait += time.perf_counter() - start
+        return item
+
+    def put(self, q, item):
+        start = time.perf_counter()
+        q.put(item)
+        self.wait += time.perf_counter() - start
+
+    def timed(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.busy += time.perf_counter() - start
+
+    def summary(self):
+        rate = self.items / self.busy if self.busy else 0.0
+        return (
+            f"{self.name:<24} {self.items:>9} {self.unit:<9} "
+            f"busy {self.busy:9.1f}s  waiting {self.wait:9.1f}s  "
+            f"{rate:10.1f} {self.unit}/busy-s"
+        )
+
+
+def _log(msg, level=logging.INFO):
+    print(msg)
+    logging.log(level, msg)
+
+
+def decode_and_transform(file_path, specs, batch_size, cache=None):
+    """
+    Runs in a worker process. `specs` is a list of
+    (target name, accepts, select_item, sections) tuples; `cache` an optional
+    parse_cache.ParseCache (see data_insertion.load_row_batches).
+
+    Returns None if the file has no releases, else
+    ({target name: (row batches, releases kept)}, number of releases, busy seconds).
+    """
+    start = time.perf_counter()
+    result = load_row_batches(file_path, specs, batch_size, cache)
+    if result is None:
+        return None
+    per_target, total = result
+    return per_target, total, time.perf_counter() - start
+
+
+def _schedule(file_paths, targets, target_qs, counter, workers, batch_size, cache, errors):
+    """
+    Submits files to the worker pool and forwards their batches to the writer
+    queues in file order. Finished files that are ahead of the next one to
+    write wait in `buffer` (the reorder buffer). A file that could not be
+    read is forwarded as a 'failed' item, so the writers count it. An
+    exception that stops the scheduler (e.g. a broken worker pool) is
+    appended to `errors`.
+    """
+    specs = [(t.name, t.accepts, t.select_item, t.sections) for t in targets]
+    window = workers * REORDER_WINDOW
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}  # future -> position in file_paths
+            buffer = {}     # position -> finished future
+            submitted = 0
+            next_pos = 0
+
+            while next_pos < len(file_paths):
+                while submitted < len(file_paths) and len(in_flight) + len(buffer) < window:
+                    future = pool.submit(
+                        decode_and_transform, file_paths[submitted], specs, batch_size, cache
+                    )
+                    in_flight[future] = submitted
+                    submitted += 1
+
+                if next_pos not in buffer:
+                    start = time.perf_counter()
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    counter.wait += time.perf_counter() - start
+                    for future in done:
+                        buffer[in_flight.pop(future)] = future
+                    continue
+
+                future = buffer.pop(next_pos)
+                file_path = file_paths[next_pos]
+                next_pos += 1
+                try:
+                    result = future.result()
+                except Exception as ex:
+                    _log(f"❌ Error reading {file_path}: {ex}", logging.ERROR)
+                    for target in targets:
+                        counter.put(target_qs[target.name], ('failed', file_path, None))
+                    continue
+                if result is None:
+                    for target in targets:
+                        counter.put(target_qs[target.name], ('end', file_path, (0, 0)))
+                    continue
+
+                per_target, total, busy = result
+                counter.items += total
+                counter.busy += busy
+                for target in targets:
+                    batches, kept = per_target[target.name]
+                    for batch in batches:
+                        counter.put(target_qs[target.name], ('batch', file_path, batch))
+                    counter.put(target_qs[target.name], ('end', file_path, (kept, total)))
+    except Exception as ex:
+        _log(f"❌ Scheduler stopped: {ex}", logging.ERROR)
+        traceback.print_exc()
+        errors.append(ex)
+    finally:
+        for target in targets:
+            target_qs[target.name].put(_STOP)
+
+
+def _rollback(target, file_path):
+    """Rolls back the file's transaction; a failed rollback (e.g. lost connection) is only logged."""
+    try:
+        target.conn.rollback()
+    except Exception as ex:
+        _log(f"❌ Error rolling back {file_path} in {target.name}: {ex}", logging.ERROR)
+
+
+def _writer(target, in_q, counter, progress):
+    """
+    Writes batches for one target. A failing file is rolled back and the rest
+    of its batches are discarded; the writer keeps draining its queue until
+    _STOP, whatever fails, so the upstream stages never block on it.
+    `progress` counts the files ('end' and 'failed' items) and the errors.
+    """
+    alias_store = PartyAliasStore()
+    deferred_bids = DeferredBids()
+    failed = None  # file_path whose remaining batches are discarded
+
+    while True:
+        item = counter.get(in_q)
+        if item is _STOP:
+            break
+        kind, file_path, payload = item
+
+        if kind == 'failed':
+            # the file could not be read: nothing of it was written
+            progress.error()
+            progress.advance()
+            continue
+
+        if kind == 'batch':
+            if failed == file_path:
+                continue
+            try:
+                counter.timed(
+                    write_row_batch, target.cursor, payload, alias_store, deferred_bids,
+                    target.sections
+                )
+                counter.items += len(payload['releases'])
+            except Exception as ex:
+                _log(f"❌ Error inserting {file_path} into {target.name}: {ex}", logging.ERROR)
+                traceback.print_exc()
+                _rollback(target, file_path)
+                failed = file_path
+                progress.error()
+            continue
+
+        # 'end': commit the file, or roll back the one whose batches failed
+        try:
+            if failed != file_path:
+                dropped = counter.timed(deferred_bids.flush, target.cursor, target.sections)
+                counter.timed(alias_store.flush, target.cursor)
+                counter.timed(target.conn.commit)
+                written, total = payload
+                progress.error(dropped)
+                logging.debug(f"Done processing {file_path} → {target.name}: {written}/{total} releases")
+            else:
+                _rollback(target, file_path)
+        except Exception as ex:
+            _log(f"❌ Error committing {file_path} into {target.name}: {ex}", logging.ERROR)
+            traceback.print_exc()
+            _rollback(target, file_path)
+            progress.error()
+        progress.advance()
+        alias_store = PartyAliasStore()
+        deferred_bids = DeferredBids()
+        failed = None
+
+
+def run_pipeline(file_paths, targets, workers=DEFAULT_WORKERS, batch_size=BATCH_SIZE,
+                 cache=None):
+    """
+    Loads `file_paths` (in order) into every target. Each target must already
+    have an open `conn` and `cursor`. `cache` is an optional
+    parse_cache.ParseCache for the row batches. Returns the list of StageCounters.
+    If the scheduler stopped before every file was handed to the writers, its
+    exception is raised once the stages are joined and logged.
+    """
+    target_qs = {target.name: queue.Queue(maxsize=BATCH_QUEUE_SIZE) for target in targets}
+
+    # busy = decode + transform time summed over the worker processes;
+    # wait = scheduler time spent waiting for the next file in order.
+    worker_counter = StageCounter(f'decode/transform x{workers}', 'releases')
+    writer_counters = [StageCounter(f'writer[{target.name}]', 'releases') for target in targets]
+    file_paths = list(file_paths)
+    scheduler_errors = []
+    progresses = [Progress(target.name, total=len(file_paths), unit='files', log=_log)
+                  for target in targets]
+
+    threads = [
+        threading.Thread(
+            target=_schedule,
+            args=(file_paths, targets, target_qs, worker_counter, workers, batch_size, cache,
+                  scheduler_errors),
+            name='scheduler', daemon=True
+        ),
+    ]
+    for target, counter, progress in zip(targets, writer_counters, progresses):
+        threads.append(threading.Thread(
+            target=_writer, args=(target, target_qs[target.name], counter, progress),
+            name=f'writer-{target.name}', daemon=True
+        ))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    for progress in progresses:
+        progress.done()
+    counters = [worker_counter] + writer_counters
+    _log(f"\n📊 Pipeline stages ({elapsed:.1f}s wall clock):")
+    for counter in counters:
+        _log("   " + counter.summary())
+    if scheduler_errors:
+        raise scheduler_errors[0]
+    return counters
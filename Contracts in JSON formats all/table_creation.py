@@ -8,8 +8,272 @@ In this updated version:
   - We have removed the 'tender_items' table entirely.
   - We add an 'ocid' column to the 'contract_transactions' table.
   - We add columns for a single 'additionalClassification' as well.
+  - The *_update triggers only archive rows whose values actually changed, so a
+    re-run of an already-loaded file leaves the _history tables untouched.
+  - Party aliases are stored in 'party_aliases'; the old 'parties.alias_parties'
+    column is carried over and dropped by create_tables().
+  - record_type() generates the row record classes used by the loader from TABLE_COLUMNS.
 """
 
+from collections import namedtuple
+
+# --------------------------------------------------------
+# Column layout of every table that has a _history copy.
+# Kept in step with the CREATE TABLE statements below; the history triggers
+# are generated from it.
+# --------------------------------------------------------
+TABLE_COLUMNS = {
+    'releases': (
+        ('ocid', 'NVARCHAR(100)'),
+        ('release_id', 'NVARCHAR(255)'),
+        ('date', 'DATETIME'),
+        ('tag', 'NVARCHAR(MAX)'),
+        ('initiation_type', 'NVARCHAR(255)'),
+        ('language', 'NVARCHAR(255)'),
+        ('tender_id', 'NVARCHAR(100)'),
+        ('tender_title', 'NVARCHAR(MAX)'),
+        ('tender_status', 'NVARCHAR(255)'),
+        ('tender_procurement_method', 'NVARCHAR(255)'),
+        ('tender_procurement_method_details', 'NVARCHAR(MAX)'),
+        ('tender_procurement_method_rationale', 'NVARCHAR(MAX)'),
+        ('tender_main_procurement_category', 'NVARCHAR(255)'),
+        ('tender_additional_procurement_categories', 'NVARCHAR(MAX)'),
+        ('tender_procuring_entity_id', 'NVARCHAR(100)'),
+        ('tender_start_date', 'DATETIME'),
+        ('tender_end_date', 'DATETIME'),
+        ('tender_duration_in_days', 'INT'),
+        ('tender_number_of_tenderers', 'INT'),
+        ('tender_documents', 'NVARCHAR(MAX)'),
+        ('tender_item_id', 'NVARCHAR(100)'),
+        ('tender_item_description', 'NVARCHAR(MAX)'),
+        ('tender_item_classification_scheme', 'NVARCHAR(100)'),
+        ('tender_item_classification_id', 'NVARCHAR(100)'),
+        ('tender_item_classification_description', 'NVARCHAR(MAX)'),
+        ('tender_item_additional_scheme', 'NVARCHAR(100)'),
+        ('tender_item_additional_id', 'NVARCHAR(100)'),
+        ('tender_item_additional_description', 'NVARCHAR(MAX)'),
+    ),
+    'parties': (
+        ('party_id', 'NVARCHAR(100)'),
+        ('name', 'NVARCHAR(255)'),
+        ('role', 'NVARCHAR(255)'),
+        ('street_address', 'NVARCHAR(MAX)'),
+        ('locality', 'NVARCHAR(255)'),
+        ('region', 'NVARCHAR(255)'),
+        ('postal_code', 'NVARCHAR(20)'),
+        ('country_name', 'NVARCHAR(255)'),
+        ('details', 'NVARCHAR(MAX)'),
+    ),
+    'release_parties': (
+        ('ocid', 'NVARCHAR(100)'),
+        ('party_id', 'NVARCHAR(100)'),
+        ('role', 'NVARCHAR(255)'),
+    ),
+    'lots': (
+        ('lot_id', 'NVARCHAR(100)'),
+        ('ocid', 'NVARCHAR(100)'),
+        ('title', 'NVARCHAR(MAX)'),
+        ('status', 'NVARCHAR(255)'),
+        ('contract_period_start_date', 'DATETIME'),
+        ('contract_period_end_date', 'DATETIME'),
+    ),
+    'bids': (
+        ('bid_row_id', 'INT IDENTITY(1,1)'),
+        ('party_id', 'NVARCHAR(100)'),
+        ('ocid', 'NVARCHAR(100)'),
+        ('related_lot', 'NVARCHAR(100)'),
+        ('admissible', 'BIT'),
+        ('conform', 'BIT'),
+        ('value', 'DECIMAL(15, 2)'),
+        ('value_unit', 'NVARCHAR(255)'),
+    ),
+    'awards': (
+        ('award_id', 'NVARCHAR(255)'),
+        ('ocid', 'NVARCHAR(100)'),
+        ('status', 'NVARCHAR(255)'),
+        ('date', 'DATETIME'),
+        ('value_amount', 'DECIMAL(15, 2)'),
+        ('value_currency', 'NVARCHAR(10)'),
+        ('value_total_amount', 'DECIMAL(15, 2)'),
+    ),
+    'suppliers_awards': (
+        ('award_id', 'NVARCHAR(255)'),
+        ('supplier_id', 'NVARCHAR(100)'),
+        ('supplier_ocid', 'NVARCHAR(100)'),
+    ),
+    'contracts': (
+        ('contract_id', 'NVARCHAR(255)'),
+        ('ocid', 'NVARCHAR(100)'),
+        ('award_id', 'NVARCHAR(255)'),
+        ('status', 'NVARCHAR(255)'),
+        ('period_end_date', 'DATETIME'),
+        ('value_amount', 'DECIMAL(15, 2)'),
+        ('value_currency', 'NVARCHAR(10)'),
+        ('date_signed', 'DATETIME'),
+    ),
+    'contract_amendments': (
+        ('amendment_id', 'NVARCHAR(100)'),
+        ('contract_id', 'NVARCHAR(255)'),
+        ('rationale', 'NVARCHAR(MAX)'),
+        ('amendment_date', 'DATETIME'),
+    ),
+    'contract_transactions': (
+        ('ocid', 'NVARCHAR(100)'),
+        ('transaction_id', 'NVARCHAR(255)'),
+        ('contract_id', 'NVARCHAR(255)'),
+        ('source', 'NVARCHAR(MAX)'),
+        ('date', 'DATETIME'),
+        ('value_amount', 'DECIMAL(15,2)'),
+        ('value_currency', 'NVARCHAR(10)'),
+    ),
+    'related_processes': (
+        ('id', 'NVARCHAR(255)'),
+        ('ocid', 'NVARCHAR(100)'),
+        ('identifier', 'NVARCHAR(255)'),
+        ('uri', 'NVARCHAR(MAX)'),
+        ('relationship', 'NVARCHAR(MAX)'),
+        ('title', 'NVARCHAR(MAX)'),
+        ('scheme', 'NVARCHAR(255)'),
+    ),
+}
+
+# Key used to pair each 'deleted' row with its 'inserted' counterpart.
+# suppliers_awards has no primary key, so its rows are matched on all columns.
+TABLE_KEYS = {
+    'releases': ('ocid',),
+    'parties': ('party_id',),
+    'release_parties': ('ocid', 'party_id', 'role'),
+    'lots': ('lot_id',),
+    'bids': ('bid_row_id',),
+    'awards': ('award_id',),
+    'suppliers_awards': (),
+    'contracts': ('contract_id',),
+    'contract_amendments': ('amendment_id', 'contract_id'),
+    'contract_transactions': ('ocid', 'transaction_id'),
+    'related_processes': ('id',),
+}
+
+
+def record_type(table, typename, exclude=(), module=None):
+    """
+    Tuple-backed record class (namedtuple) with one field per column of `table`,
+    in TABLE_COLUMNS order, leaving out server-generated columns (IDENTITY,
+    DEFAULT) and those in `exclude`. Pass module=__name__ from the module that
+    binds the class so its records can be pickled.
+    """
+    fields = [
+        name for name, sql_type in TABLE_COLUMNS[table]
+        if 'IDENTITY' not in sql_type and 'DEFAULT' not in sql_type and name not in exclude
+    ]
+    return namedtuple(typename, fields, module=module)
+
+
+# An alias is 'name|street|locality|region|postal|country' (see
+# data_insertion._write_parties); the old alias_parties column joined them
+# with ','.
+ALIAS_FIELDS = 6
+
+def split_alias_parties(text):
+    """
+    The aliases of an old alias_parties value. Names and addresses can hold
+    commas, so the value is cut on '|': the field after every fifth '|' is
+    the country of an alias, followed by ',' and the name of the next one
+    (countries have no comma).
+    """
+    fields = text.split('|')
+    aliases = []
+    current = [fields[0]]
+    for field in fields[1:]:
+        if len(current) < ALIAS_FIELDS - 1:
+            current.append(field)
+            continue
+        country, sep, following = field.partition(',')
+        aliases.append('|'.join(current + [country]))
+        current = [following] if sep else []
+    if current and any(current):
+        aliases.append('|'.join(current))
+    return aliases
+
+
+def migrate_alias_parties(cursor):
+    """
+    Moves the aliases of the old 'parties.alias_parties' column, if the table
+    still has it, to 'party_aliases', then drops the column. Alias fragments
+    left there by an earlier migration that split the column on every ','
+    (aliases without their five '|') are deleted first.
+    """
+    cursor.execute("SELECT COL_LENGTH('dbo.parties', 'alias_parties')")
+    if cursor.fetchone()[0] is None:
+        return
+    cursor.execute("""
+    DELETE FROM dbo.party_aliases
+    WHERE (DATALENGTH(alias) - DATALENGTH(REPLACE(alias, N'|', N''))) / 2 <> ?
+    """, ALIAS_FIELDS - 1)
+    cursor.execute(
+        "SELECT party_id, alias_parties FROM dbo.parties WHERE alias_parties IS NOT NULL"
+    )
+    rows = {
+        (party_id, alias): None
+        for party_id, text in cursor.fetchall()
+        for alias in split_alias_parties(text)
+    }
+    if rows:
+        cursor.executemany("""
+        INSERT INTO dbo.party_aliases (party_id, alias_hash, alias)
+        SELECT ?, HASHBYTES('SHA2_256', a.alias), a.alias
+        FROM (SELECT CAST(? AS NVARCHAR(MAX)) AS alias) a
+        WHERE NOT EXISTS (SELECT 1 FROM dbo.party_aliases p
+                          WHERE p.party_id = ? AND p.alias_hash = HASHBYTES('SHA2_256', a.alias))
+        """, [(party_id, alias, party_id) for party_id, alias in rows])
+    cursor.execute("ALTER TABLE dbo.parties DROP COLUMN alias_parties")
+
+
+def history_trigger_sql(table):
+    """
+    Builds the AFTER UPDATE trigger that copies old rows of `table` into
+    `table`_history.
+
+    A 'deleted' row is archived only when no 'inserted' row with the same key
+    holds exactly the same values. The comparison uses INTERSECT, which treats
+    two NULLs as equal, so no-op updates (every column unchanged) write nothing.
+    CREATE OR ALTER lets existing databases pick up a new trigger body.
+    Nothing is archived while the session sets skip_history: the XML migration
+    sets it when it writes a database of this schema (see set_skip_history in
+    'xml to json/table_creation.py').
+    """
+    columns = [name for name, _ in TABLE_COLUMNS[table]]
+    column_list = ", ".join(columns)
+    deleted_cols = ", ".join(f"d.{c}" for c in columns)
+    inserted_cols = ", ".join(f"i.{c}" for c in columns)
+    key_match = "".join(f"i.{k} = d.{k} AND " for k in TABLE_KEYS[table])
+
+    return f"""
+    CREATE OR ALTER TRIGGER dbo.trg_{table}_update
+    ON dbo.{table}
+    AFTER UPDATE
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        IF SESSION_CONTEXT(N'skip_history') = 1 RETURN;
+
+        INSERT INTO dbo.{table}_history
+            ({column_list}, modified_date)
+        SELECT
+            {deleted_cols}, GETDATE()
+        FROM deleted d
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM inserted i
+            WHERE {key_match}EXISTS (
+                SELECT {inserted_cols}
+                INTERSECT
+                SELECT {deleted_cols}
+            )
+        );
+    END
+    """
+
+
 def create_tables(cursor):
     # --------------------------------------------------------
     # 1. 'releases' table (with tender fields + single tender item columns)
@@ -105,66 +369,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_releases_history)
 
-    sql_trg_releases_update = """
-    IF OBJECT_ID('dbo.trg_releases_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_releases_update
-        ON dbo.releases
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.releases_history
-                (ocid, release_id, date, tag, initiation_type, language,
-                 tender_id, tender_title, tender_status,
-                 tender_procurement_method, tender_procurement_method_details,
-                 tender_procurement_method_rationale, tender_main_procurement_category,
-                 tender_additional_procurement_categories, tender_procuring_entity_id,
-                 tender_start_date, tender_end_date, tender_duration_in_days,
-                 tender_number_of_tenderers, tender_documents,
-                 tender_item_id, tender_item_description,
-                 tender_item_classification_scheme, tender_item_classification_id,
-                 tender_item_classification_description,
-                 tender_item_additional_scheme, tender_item_additional_id,
-                 tender_item_additional_description, modified_date)
-            SELECT
-                d.ocid,
-                d.release_id,
-                d.date,
-                d.tag,
-                d.initiation_type,
-                d.language,
-
-                d.tender_id,
-                d.tender_title,
-                d.tender_status,
-                d.tender_procurement_method,
-                d.tender_procurement_method_details,
-                d.tender_procurement_method_rationale,
-                d.tender_main_procurement_category,
-                d.tender_additional_procurement_categories,
-                d.tender_procuring_entity_id,
-                d.tender_start_date,
-                d.tender_end_date,
-                d.tender_duration_in_days,
-                d.tender_number_of_tenderers,
-                d.tender_documents,
-
-                d.tender_item_id,
-                d.tender_item_description,
-                d.tender_item_classification_scheme,
-                d.tender_item_classification_id,
-                d.tender_item_classification_description,
-                d.tender_item_additional_scheme,
-                d.tender_item_additional_id,
-                d.tender_item_additional_description,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_releases_update)
+    cursor.execute(history_trigger_sql('releases'))
 
     # --------------------------------------------------------
     # 2. 'parties' + 'release_parties'
@@ -181,8 +386,7 @@ def create_tables(cursor):
             region         NVARCHAR(255),
             postal_code    NVARCHAR(20),
             country_name   NVARCHAR(255),
-            details        NVARCHAR(MAX),
-            alias_parties  NVARCHAR(MAX) NULL
+            details        NVARCHAR(MAX)
         );
     END;
     """
@@ -202,43 +406,32 @@ def create_tables(cursor):
             postal_code    NVARCHAR(20),
             country_name   NVARCHAR(255),
             details        NVARCHAR(MAX),
-            alias_parties  NVARCHAR(MAX),
             modified_date  DATETIME DEFAULT GETDATE()
         );
     END;
     """
     cursor.execute(sql_parties_history)
 
-    sql_trg_parties_update = """
-    IF OBJECT_ID('dbo.trg_parties_update', 'TR') IS NULL
+    cursor.execute(history_trigger_sql('parties'))
+
+    # Party aliases: one row per (party_id, alias), keyed by the SHA2-256 hash
+    # of the alias text. Replaces the comma-joined 'alias_parties' column (see
+    # migrate_alias_parties).
+    sql_party_aliases = """
+    IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'party_aliases')
     BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_parties_update
-        ON dbo.parties
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.parties_history
-                (party_id, name, role, street_address, locality, region, postal_code,
-                 country_name, details, alias_parties, modified_date)
-            SELECT
-                d.party_id,
-                d.name,
-                d.role,
-                d.street_address,
-                d.locality,
-                d.region,
-                d.postal_code,
-                d.country_name,
-                d.details,
-                d.alias_parties,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
+        CREATE TABLE dbo.party_aliases (
+            party_id   NVARCHAR(100) NOT NULL,
+            alias_hash BINARY(32)    NOT NULL,
+            alias      NVARCHAR(MAX) NOT NULL,
+            created_at DATETIME DEFAULT GETDATE(),
+            PRIMARY KEY (party_id, alias_hash),
+            FOREIGN KEY (party_id) REFERENCES dbo.parties (party_id)
+        );
     END;
     """
-    cursor.execute(sql_trg_parties_update)
+    cursor.execute(sql_party_aliases)
+    migrate_alias_parties(cursor)
 
     sql_release_parties = """
     IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'release_parties')
@@ -269,28 +462,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_release_parties_history)
 
-    sql_trg_release_parties_update = """
-    IF OBJECT_ID('dbo.trg_release_parties_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_release_parties_update
-        ON dbo.release_parties
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.release_parties_history
-                (ocid, party_id, role, modified_date)
-            SELECT
-                d.ocid,
-                d.party_id,
-                d.role,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_release_parties_update)
+    cursor.execute(history_trigger_sql('release_parties'))
 
     # --------------------------------------------------------
     # (No separate 'tender_items' table anymore)
@@ -332,32 +504,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_lots_history)
 
-    sql_trg_lots_update = """
-    IF OBJECT_ID('dbo.trg_lots_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_lots_update
-        ON dbo.lots
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.lots_history
-                (lot_id, ocid, title, status, contract_period_start_date,
-                 contract_period_end_date, modified_date)
-            SELECT
-                d.lot_id,
-                d.ocid,
-                d.title,
-                d.status,
-                d.contract_period_start_date,
-                d.contract_period_end_date,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_lots_update)
+    cursor.execute(history_trigger_sql('lots'))
 
     # --------------------------------------------------------
     # 5. 'bids'
@@ -400,34 +547,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_bids_history)
 
-    sql_trg_bids_update = """
-    IF OBJECT_ID('dbo.trg_bids_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_bids_update
-        ON dbo.bids
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.bids_history
-                (bid_row_id, party_id, ocid, related_lot, admissible, conform,
-                 value, value_unit, modified_date)
-            SELECT
-                d.bid_row_id,
-                d.party_id,
-                d.ocid,
-                d.related_lot,
-                d.admissible,
-                d.conform,
-                d.value,
-                d.value_unit,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_bids_update)
+    cursor.execute(history_trigger_sql('bids'))
 
     # --------------------------------------------------------
     # 6. 'awards'
@@ -467,33 +587,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_awards_history)
 
-    sql_trg_awards_update = """
-    IF OBJECT_ID('dbo.trg_awards_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_awards_update
-        ON dbo.awards
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.awards_history
-                (award_id, ocid, status, date, value_amount, value_currency,
-                 value_total_amount, modified_date)
-            SELECT
-                d.award_id,
-                d.ocid,
-                d.status,
-                d.date,
-                d.value_amount,
-                d.value_currency,
-                d.value_total_amount,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_awards_update)
+    cursor.execute(history_trigger_sql('awards'))
 
     # --------------------------------------------------------
     # 7. 'suppliers_awards'
@@ -526,28 +620,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_suppliers_awards_history)
 
-    sql_trg_suppliers_awards_update = """
-    IF OBJECT_ID('dbo.trg_suppliers_awards_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_suppliers_awards_update
-        ON dbo.suppliers_awards
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.suppliers_awards_history
-                (award_id, supplier_id, supplier_ocid, modified_date)
-            SELECT
-                d.award_id,
-                d.supplier_id,
-                d.supplier_ocid,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_suppliers_awards_update)
+    cursor.execute(history_trigger_sql('suppliers_awards'))
 
     # --------------------------------------------------------
     # 8. 'contracts'
@@ -590,34 +663,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_contracts_history)
 
-    sql_trg_contracts_update = """
-    IF OBJECT_ID('dbo.trg_contracts_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_contracts_update
-        ON dbo.contracts
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.contracts_history
-                (contract_id, ocid, award_id, status, period_end_date, value_amount,
-                 value_currency, date_signed, modified_date)
-            SELECT
-                d.contract_id,
-                d.ocid,
-                d.award_id,
-                d.status,
-                d.period_end_date,
-                d.value_amount,
-                d.value_currency,
-                d.date_signed,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_contracts_update)
+    cursor.execute(history_trigger_sql('contracts'))
 
     # --------------------------------------------------------
     # 9. 'contract_amendments'
@@ -652,29 +698,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_amendments_history)
 
-    sql_trg_amendments_update = """
-    IF OBJECT_ID('dbo.trg_contract_amendments_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_contract_amendments_update
-        ON dbo.contract_amendments
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.contract_amendments_history
-                (amendment_id, contract_id, rationale, amendment_date, modified_date)
-            SELECT
-                d.amendment_id,
-                d.contract_id,
-                d.rationale,
-                d.amendment_date,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_amendments_update)
+    cursor.execute(history_trigger_sql('contract_amendments'))
 
      # --------------------------------------------------------
     # 10) 'contract_transactions' with NEW PK: (ocid, transaction_id)
@@ -722,33 +746,7 @@ def create_tables(cursor):
     """
     cursor.execute(sql_contract_transactions_history)
 
-    sql_trg_contract_transactions_update = """
-    IF OBJECT_ID('dbo.trg_contract_transactions_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_contract_transactions_update
-        ON dbo.contract_transactions
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.contract_transactions_history
-                (ocid, transaction_id, contract_id, source, date, value_amount,
-                 value_currency, modified_date)
-            SELECT
-                d.ocid,
-                d.transaction_id,
-                d.contract_id,
-                d.source,
-                d.date,
-                d.value_amount,
-                d.value_currency,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_contract_transactions_update)
+    cursor.execute(history_trigger_sql('contract_transactions'))
 
     # --------------------------------------------------------
     # 11. 'related_processes'
@@ -788,29 +786,4 @@ def create_tables(cursor):
     """
     cursor.execute(sql_related_processes_history)
 
-    sql_trg_related_processes_update = """
-    IF OBJECT_ID('dbo.trg_related_processes_update', 'TR') IS NULL
-    BEGIN
-        EXEC('
-        CREATE TRIGGER dbo.trg_related_processes_update
-        ON dbo.related_processes
-        AFTER UPDATE
-        AS
-        BEGIN
-            INSERT INTO dbo.related_processes_history
-                (id, ocid, identifier, uri, relationship, title, scheme, modified_date)
-            SELECT
-                d.id,
-                d.ocid,
-                d.identifier,
-                d.uri,
-                d.relationship,
-                d.title,
-                d.scheme,
-                GETDATE()
-            FROM deleted d;
-        END
-        ')
-    END;
-    """
-    cursor.execute(sql_trg_related_processes_update)
+    cursor.execute(history_trigger_sql('related_processes'))
@@ -0,0 +1,85 @@
+"""
+targets.py
+Databases fed by a single JSON ingest run.
+
+Each JSON file is parsed once; every release is then offered to each target,
+which keeps it or not according to its own filter and writes it through its
+own connection:
+  - 'all'          : every release, into JSONtest2.
+  - 'construction' : only releases with a construction category, into
+                     ConstructionDB (this replaces the former standalone
+                     construction loader).
+
+A target can also load only some of data_insertion.OPTIONAL_SECTIONS, e.g.
+    IngestTarget('lean', 'JSONlean', sections={'contracts.amendments'})
+skips tender documents, party details and related processes: they are not
+transformed or written, and existing values in those columns are kept.
+"""
+
+import os
+import sys
+
+from data_insertion import OPTIONAL_SECTIONS, select_tender_item
+
+# The construction set is the one of the XML loader (categories.CATEGORY_SETS)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from categories import in_category_set
+
+def is_construction_description(description):
+    """
+    True if the category code of `description` is in the construction set, so
+    its spelling variants ('G25 - Constructions préfabriquées' / 'préfabriqués',
+    'Imm1' / 'IMM1') all match.
+    """
+    return in_category_set(description, 'construction')
+
+def select_construction_item(items):
+    """
+    Returns the first item whose description, or the description of one of its
+    additionalClassifications, is a construction category. None if no item matches.
+    """
+    for it in items:
+        if is_construction_description(it.get('description', '')):
+            return it
+        for ac in it.get('additionalClassifications', []):
+            if is_construction_description(ac.get('description', '')):
+                return it
+    return None
+
+def is_construction_release(release):
+    items = release.get('tender', {}).get('items', [])
+    return select_construction_item(items) is not None
+
+
+class IngestTarget:
+    """
+    One database written by the ingest.
+
+    accepts(release)   -> bool, which releases go to this target (None = all).
+    select_item(items) -> the tender item stored in 'releases'.
+    sections           -> optional OCDS sections loaded (default: all of them).
+    """
+
+    def __init__(self, name, database, accepts=None, select_item=select_tender_item,
+                 sections=OPTIONAL_SECTIONS):
+        unknown = set(sections) - OPTIONAL_SECTIONS
+        if unknown:
+            raise ValueError(f"Unknown OCDS sections for target '{name}': {sorted(unknown)}")
+        self.name = name
+        self.database = database
+        self.accepts = accepts
+        self.select_item = select_item
+        self.sections = frozenset(sections)
+        self.conn = None
+        self.cursor = None
+
+
+TARGETS = [
+    IngestTarget('all', 'JSONtest2'),
+    IngestTarget(
+        'construction', 'ConstructionDB',
+        accepts=is_construction_release,
+        select_item=select_construction_item
+    ),
+]
@@ -0,0 +1,126 @@
+"""
+benchmark_normalizer.py
+Micro-benchmark of normalize.py against the per-field helpers it replaced
+(escape_single_quotes / to_date, copied below as they were).
+
+Builds synthetic depense records (mostly plain ASCII, some accents, curly
+quotes and control characters, dates drawn from a small pool as in the SEAO
+exports), checks that both produce the same literals, then times them.
+
+    python benchmark_normalizer.py [number of records]
+"""
+
+import random
+import re
+import sys
+import time
+import unicodedata
+from datetime import datetime
+
+from data_insertion import DEPENSE_NORMALIZER, Depense
+
+# --------------------------------------------------------
+# Former helpers, kept verbatim for the comparison
+# --------------------------------------------------------
+def legacy_to_date(date_str):
+    if not date_str or not date_str.strip():
+        return "NULL"
+
+    raw = date_str.strip()
+    formats = ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+    for fmt in formats:
+        try:
+            dt = datetime.strptime(raw, fmt)
+            return f"'{dt.strftime('%Y-%m-%d %H:%M:%S')}'"
+        except ValueError:
+            pass
+    return "NULL"
+
+def legacy_escape_single_quotes(value):
+    if not value:
+        return "NULL"
+
+    txt = str(value).replace("\r", "").replace("\n", " ")
+    txt = re.sub(r"[\x00-\x1F]+", " ", txt)
+    txt = txt.replace("’", "'").replace("‘", "'")
+    txt = txt.replace("ʼ", "'").replace("‛", "'")
+    txt = txt.replace("“", '"').replace("”", '"')
+    txt = unicodedata.normalize("NFKC", txt)
+    txt = txt.replace("'", "''")
+    return f"N'{txt}'"
+
+def legacy_row(depense):
+    neq_str = depense.neqcontractant.strip().replace("'", "''")
+    return (
+        f"({legacy_escape_single_quotes(depense.numeroseao.strip())}, "
+        f"{legacy_escape_single_quotes(depense.numero.strip())}, "
+        f"{legacy_to_date(depense.datedepense)}, {legacy_to_date(depense.datepublicationdepense)}, "
+        f"{depense.montantdepense}, {legacy_escape_single_quotes(depense.description)}, "
+        f"{legacy_escape_single_quotes(depense.nomcontractant)}, '{neq_str}')"
+    )
+
+# --------------------------------------------------------
+# Synthetic data
+# --------------------------------------------------------
+DESCRIPTIONS = [
+    "Travaux de pavage rue Principale",
+    "Services professionnels d'ingénierie",
+    "Réfection de l’aqueduc – phase 2",
+    "Achat de sel de déglaçage\r\n(lot 3)",
+    "Entretien\tménager des édifices",
+    "“Contrat” de déneigement",
+    "",
+]
+NAMES = ["Construction ABC inc.", "Les Entreprises D'Amours", "Pavage Québec ltée", "Béton Provincial"]
+
+def make_records(count, seed=1):
+    rng = random.Random(seed)
+    dates = [f"2023-{m:02d}-{d:02d}" for m in range(1, 13) for d in (1, 15, 28)]
+    dates += [f"2023-{m:02d}-10 09:30" for m in range(1, 13)] + ["", "2023-1-5", "n/d"]
+    return [
+        Depense(
+            numeroseao=str(1_000_000 + i // 3),
+            numero=f"AO-{i // 3}",
+            datedepense=rng.choice(dates),
+            datepublicationdepense=rng.choice(dates),
+            montantdepense=f"{rng.uniform(100, 100000):.2f}",
+            description=rng.choice(DESCRIPTIONS),
+            nomcontractant=rng.choice(NAMES),
+            neqcontractant=str(rng.randint(1140000000, 1179999999)),
+        )
+        for i in range(count)
+    ]
+
+def timed(label, func, records, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(records)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<28} {best:8.3f}s  {len(records) / best:12,.0f} records/s")
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    records = make_records(count)
+
+    legacy = [legacy_row(r) for r in records]
+    compiled = DEPENSE_NORMALIZER.literals(records)
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"{count:,} depense records, {mismatches} mismatching rows")
+    if mismatches:
+        for a, b in zip(legacy, compiled):
+            if a != b:
+                print("  legacy  :", a)
+                print("  compiled:", b)
+                break
+        sys.exit(1)
+
+    t_legacy = timed("per-field helpers", lambda rs: [legacy_row(r) for r in rs], records)
+    t_new = timed("TableNormalizer.literals", DEPENSE_NORMALIZER.literals, records)
+    timed("TableNormalizer.clean", DEPENSE_NORMALIZER.clean, records)
+    print(f"  speed-up (literals): x{t_legacy / t_new:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,66 @@
 import logging
+import os
+import sys
 import xml.etree.ElementTree as ET
-import unicodedata
-import re
-from datetime import datetime
+
+from normalize import TableNormalizer, clean_text, sql_date, sql_text
+from table_creation import TABLE_COLUMNS, record_type
+
+# bulk_writer.py, categories.py and parse_cache.py are shared with the other loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from bulk_writer import BulkWriter
+from categories import category_code
+from parse_cache import cached_parse
+
+##############################################################################
+# Records (generated from table_creation.TABLE_COLUMNS)
+##############################################################################
+
+Avis            = record_type('avis', 'Avis', exclude=('category_id', 'source_file'),
+                              module=__name__)
+Fournisseur     = record_type('fournisseurs', 'Fournisseur',
+                              exclude=('existing_neq', 'source_file'), module=__name__)
+AvisFournisseur = record_type('avis_fournisseurs', 'AvisFournisseur',
+                              exclude=('source_file',), module=__name__)
+Contrat         = record_type('contrats', 'Contrat', exclude=('source_file',), module=__name__)
+Depense         = record_type('depenses', 'Depense', exclude=('source_file',), module=__name__)
+
+# Version of the parse_*_file() functions, part of the parse cache keys: bump it
+# whenever one of them changes the records it returns.
+PARSER_VERSION = 1
+
+# SQL Server accepts at most 1000 rows in one INSERT ... VALUES.
+INSERT_BATCH_ROWS = 1000
+
+# Batch writers render whole lists of records through these.
+AVIS_FOURNISSEUR_NORMALIZER = TableNormalizer('avis_fournisseurs', AvisFournisseur)
+DEPENSE_NORMALIZER = TableNormalizer(
+    'depenses', Depense, overrides={'neqcontractant': 'raw_text'}
+)
 
 ##############################################################################
 # Helper functions
 ##############################################################################
 
+def write_bulk(backend, table, normalizer, records, source_file):
+    """
+    Writes `records` and their source file through a bulk_writer backend, as
+    typed values (normalizer.clean) instead of INSERT literals.
+    """
+    types = dict(TABLE_COLUMNS[table])
+    columns = [(field, types[field]) for field in normalizer.fields + ('source_file',)]
+    source = clean_text(source_file)
+    with BulkWriter(backend, table, columns) as writer:
+        writer.extend(row + (source,) for row in normalizer.clean(records))
+
 def to_date(date_str):
     """
     Converts a date string like "YYYY-MM-DD" or "YYYY-MM-DD HH:MM[:SS]" into a
     SQL DATETIME literal: 'YYYY-MM-DD HH:MM:SS'.
     Returns "NULL" if empty or if parsing fails.
     """
-    if not date_str or not date_str.strip():
-        return "NULL"
-    
-    raw = date_str.strip()
-    formats = ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(raw, fmt)
-            return f"'{dt.strftime('%Y-%m-%d %H:%M:%S')}'"
-        except ValueError:
-            pass
-    return "NULL"
+    return sql_date(date_str)
 
 def parse_bit(node):
     """
@@ -47,26 +82,9 @@ def escape_single_quotes(value):
       - Replace curly quotes
       - Double any ASCII apostrophes
       - Wrap in N'...' or return "NULL" if empty
+    (normalize.sql_text; plain ASCII values take a fast path.)
     """
-    if not value:
-        return "NULL"
-
-
-    txt = str(value).replace("\r", "").replace("\n", " ")
-
-    txt = re.sub(r"[\x00-\x1F]+", " ", txt)
-
-
-    txt = txt.replace("’", "'").replace("‘", "'")
-    txt = txt.replace("ʼ", "'").replace("‛", "'")
-
-    txt = txt.replace("“", '"').replace("”", '"')
-
-    txt = unicodedata.normalize("NFKC", txt)
-
-    txt = txt.replace("'", "''")
-
-    return f"N'{txt}'"
+    return sql_text(value)
 
 def safe_text(parent, tag):
     node = parent.find(tag)
@@ -74,23 +92,44 @@ def safe_text(parent, tag):
         return node.text.strip()
     return ''
 
+def read_xml_nodes(file_path, tag):
+    """The `tag` elements of a SEAO XML file (the root itself if it is one)."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        xml_content = f.read()
+    xml_content = xml_content.replace("&", "&amp;")
+    root = ET.fromstring(xml_content)
+    nodes = root.findall(tag)
+    if not nodes and root.tag == tag:
+        nodes = [root]
+    return nodes
+
+def parsed_records(cache, file_path, parser, parse, record_types):
+    """
+    {table: [record, ...]} of `file_path`, read by parse(file_path) or taken
+    from the parse_cache.ParseCache `cache` (None: no cache).
+    """
+    columns = {table: record._fields for table, record in record_types.items()}
+    tables = cached_parse(cache, file_path, parser, PARSER_VERSION, parse, columns)
+    return {table: [record._make(row) for row in tables[table]]
+            for table, record in record_types.items()}
+
 ##############################################################################
 #  Fournisseurs 
 ##############################################################################
 
-def insert_or_update_fournisseur(cursor, fournisseur_data, source_file):
+def insert_or_update_fournisseur(cursor, fournisseur, source_file):
  
     sf_str = escape_single_quotes(source_file)
 
-    raw_neq  = (fournisseur_data.get('neq') or '').strip()
-    name_raw = (fournisseur_data.get('nomorganisation') or '').strip()
+    raw_neq  = (fournisseur.neq or '').strip()
+    name_raw = (fournisseur.nomorganisation or '').strip()
 
-    adr1_str = escape_single_quotes(fournisseur_data.get('adresse1',''))
-    adr2_str = escape_single_quotes(fournisseur_data.get('adresse2',''))
-    ville_str = escape_single_quotes(fournisseur_data.get('ville',''))
-    province  = (fournisseur_data.get('province','')).replace("'", "''")
-    pays      = (fournisseur_data.get('pays','')).replace("'", "''")
-    codep     = (fournisseur_data.get('codepostal','')).replace("'", "''")
+    adr1_str = escape_single_quotes(fournisseur.adresse1)
+    adr2_str = escape_single_quotes(fournisseur.adresse2)
+    ville_str = escape_single_quotes(fournisseur.ville)
+    province  = fournisseur.province.replace("'", "''")
+    pays      = fournisseur.pays.replace("'", "''")
+    codep     = fournisseur.codepostal.replace("'", "''")
 
     name_str = escape_single_quotes(name_raw)
     neq_str  = escape_single_quotes(raw_neq)
@@ -232,59 +271,90 @@ def delete_avis_fournisseurs(cursor, numeroseao):
     sql_delete = f"DELETE FROM avis_fournisseurs WHERE numeroseao = {numeroseao_str};"
     cursor.execute(sql_delete)
 
-def insert_avis_fournisseur(cursor, link_data, source_file):
-
-    numeroseao = link_data.get('numeroseao', '')
-    numero     = link_data.get('numero', '')
-    neq        = link_data.get('neq', '')
-    nomorg     = link_data.get('nomorganisation', '')
-
-    numeroseao_str = escape_single_quotes(numeroseao)
-    numero_str     = escape_single_quotes(numero)
-    nomorg_str     = escape_single_quotes(nomorg)
-    sf_str         = escape_single_quotes(source_file)
-
-    insert_neq = f"'{neq}'" if neq else "NULL"
-
-    adm_val       = link_data.get('admissible', 'NULL')
-    conf_val      = link_data.get('conforme', 'NULL')
-    adj_val       = link_data.get('adjudicataire', 'NULL')
-    mont_soumis   = link_data.get('montantsoumis', 'NULL')
-    mont_soumis_u = link_data.get('montantssoumisunite', 'NULL')
-    mont_contrat  = link_data.get('montantcontrat', 'NULL')
-    mont_total    = link_data.get('montanttotalcontrat', 'NULL')
-
-    sql_insert = f"""
-    INSERT INTO avis_fournisseurs (
-        numeroseao, numero, neq, nomorganisation,
-        admissible, conforme, adjudicataire,
-        montantsoumis, montantssoumisunite,
-        montantcontrat, montanttotalcontrat,
-        source_file
-    )
-    VALUES (
-        {numeroseao_str},
-        {numero_str},
-        {insert_neq},
-        {nomorg_str},
-        {adm_val},
-        {conf_val},
-        {adj_val},
-        {mont_soumis},
-        {mont_soumis_u},
-        {mont_contrat},
-        {mont_total},
-        {sf_str}
-    );
+def insert_avis_fournisseurs(cursor, links, source_file, bulk=None):
+    """
+    Inserts AvisFournisseur records, INSERT_BATCH_ROWS rows per statement, or
+    through the bulk_writer backend `bulk`.
     """
-    cursor.execute(sql_insert)
+    if bulk is not None:
+        write_bulk(bulk, 'avis_fournisseurs', AVIS_FOURNISSEUR_NORMALIZER, links, source_file)
+        return
+    sf_str = escape_single_quotes(source_file)
+    rows = AVIS_FOURNISSEUR_NORMALIZER.literals(links, extra=(sf_str,))
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        values = ",\n".join(rows[start:start + INSERT_BATCH_ROWS])
+        sql_insert = f"""
+        INSERT INTO avis_fournisseurs (
+            numeroseao, numero, neq, nomorganisation,
+            admissible, conforme, adjudicataire,
+            montantsoumis, montantssoumisunite,
+            montantcontrat, montanttotalcontrat,
+            source_file
+        )
+        VALUES
+        {values};
+        """
+        cursor.execute(sql_insert)
 
 ##############################################################################
 # Avis 
 ##############################################################################
 
-def insert_or_update_avis(cursor, avis_data, source_file):
-    numeroseao = avis_data.get('numeroseao','').strip()
+class CategoryIds:
+    """
+    {code: category_id} of the categories dimension for one run, read from the
+    table once; a code not seen yet is inserted, with its label. The codes of
+    the category sets come without a label: the first avis using one sets it.
+
+    The ids inserted since the last commit() are dropped by rollback(), so
+    call them along with the connection's.
+    """
+
+    def __init__(self):
+        self.ids = None
+        self.unlabeled = set()
+        self.pending = set()
+
+    def _load(self, cursor):
+        cursor.execute("SELECT code, category_id, label FROM categories")
+        self.ids = {}
+        for code, category_id, label in cursor.fetchall():
+            self.ids[code] = category_id
+            if label is None:
+                self.unlabeled.add(code)
+
+    def sql(self, cursor, categorieseao):
+        """category_id of `categorieseao` as a literal for the avis row (NULL without a category)."""
+        code = category_code(categorieseao)
+        if code is None:
+            return "NULL"
+        if self.ids is None:
+            self._load(cursor)
+        code_str = escape_single_quotes(code)
+        label = escape_single_quotes(categorieseao)
+        if code not in self.ids:
+            cursor.execute(f"""
+            INSERT INTO categories (code, label)
+            OUTPUT inserted.category_id
+            VALUES ({code_str}, {label});
+            """)
+            self.ids[code] = cursor.fetchone()[0]
+            self.pending.add(code)
+        elif code in self.unlabeled and label != "NULL":
+            cursor.execute(f"UPDATE categories SET label = {label} WHERE code = {code_str};")
+            self.unlabeled.discard(code)
+        return str(self.ids[code])
+
+    def commit(self):
+        self.pending.clear()
+
+    def rollback(self):
+        for code in self.pending:
+            del self.ids[code]
+        self.pending.clear()
+
+def insert_or_update_avis(cursor, avis, source_file, categories):
+    numeroseao = avis.numeroseao.strip()
     if not numeroseao:
         return
 
@@ -297,40 +367,41 @@ def insert_or_update_avis(cursor, avis_data, source_file):
     row = cursor.fetchone()
 
     sf_str   = escape_single_quotes(source_file)
-    org_str  = escape_single_quotes(avis_data.get('organisme',''))
-    ad1_str  = escape_single_quotes(avis_data.get('adresse1',''))
-    ad2_str  = escape_single_quotes(avis_data.get('adresse2',''))
-    ville_str= escape_single_quotes(avis_data.get('ville',''))
-    province = escape_single_quotes(avis_data.get('province',''))
-    pays     = escape_single_quotes(avis_data.get('pays',''))
-    codep    = escape_single_quotes(avis_data.get('codepostal',''))
-    titre    = escape_single_quotes(avis_data.get('titre',''))
-
-    type_raw   = avis_data.get('type','').strip()
+    org_str  = escape_single_quotes(avis.organisme)
+    ad1_str  = escape_single_quotes(avis.adresse1)
+    ad2_str  = escape_single_quotes(avis.adresse2)
+    ville_str= escape_single_quotes(avis.ville)
+    province = escape_single_quotes(avis.province)
+    pays     = escape_single_quotes(avis.pays)
+    codep    = escape_single_quotes(avis.codepostal)
+    titre    = escape_single_quotes(avis.titre)
+
+    type_raw   = avis.type.strip()
     type_str   = escape_single_quotes(type_raw) if type_raw else "NULL"
 
-    nature_raw = avis_data.get('nature','').strip()
+    nature_raw = avis.nature.strip()
     nature_str = escape_single_quotes(nature_raw) if nature_raw else "NULL"
 
-    prec_raw   = avis_data.get('precision','').strip()
+    prec_raw   = avis.precision.strip()
     prec_str   = escape_single_quotes(prec_raw) if prec_raw else "NULL"
 
-    categorieseao = escape_single_quotes(avis_data.get('categorieseao',''))
-    datepublication     = to_date(avis_data.get('datepublication',''))
-    datefermeture       = to_date(avis_data.get('datefermeture',''))
-    datesaisieouverture = to_date(avis_data.get('datesaisieouverture',''))
-    datesaisieadjud     = to_date(avis_data.get('datesaisieadjudication',''))
-    dateadjudication    = to_date(avis_data.get('dateadjudication',''))
-    regionlivraison     = escape_single_quotes(avis_data.get('regionlivraison',''))
-    unspscprincipale    = escape_single_quotes(avis_data.get('unspscprincipale',''))
-    disposition         = escape_single_quotes(avis_data.get('disposition',''))
-    hyperlienseao       = escape_single_quotes(avis_data.get('hyperlienseao',''))
-
-    municipal_val = avis_data.get('municipal','NULL')
+    categorieseao = escape_single_quotes(avis.categorieseao)
+    category_id   = categories.sql(cursor, avis.categorieseao)
+    datepublication     = to_date(avis.datepublication)
+    datefermeture       = to_date(avis.datefermeture)
+    datesaisieouverture = to_date(avis.datesaisieouverture)
+    datesaisieadjud     = to_date(avis.datesaisieadjudication)
+    dateadjudication    = to_date(avis.dateadjudication)
+    regionlivraison     = escape_single_quotes(avis.regionlivraison)
+    unspscprincipale    = escape_single_quotes(avis.unspscprincipale)
+    disposition         = escape_single_quotes(avis.disposition)
+    hyperlienseao       = escape_single_quotes(avis.hyperlienseao)
+
+    municipal_val = avis.municipal
     if municipal_val.upper() != 'NULL' and not municipal_val.isdigit():
         municipal_val = 'NULL'
 
-    numero_str = escape_single_quotes(avis_data.get('numero',''))
+    numero_str = escape_single_quotes(avis.numero)
 
     if row:
         sql_move = f"""
@@ -373,6 +444,7 @@ def insert_or_update_avis(cursor, avis_data, source_file):
             [nature] = {nature_str},
             [precision] = {prec_str},
             categorieseao = {categorieseao},
+            category_id = {category_id},
             datepublication = {datepublication},
             datefermeture = {datefermeture},
             datesaisieouverture = {datesaisieouverture},
@@ -392,7 +464,7 @@ def insert_or_update_avis(cursor, avis_data, source_file):
         INSERT INTO avis (
             numeroseao, numero, organisme, municipal,
             adresse1, adresse2, ville, province, pays, codepostal,
-            titre, [type], [nature], [precision], categorieseao,
+            titre, [type], [nature], [precision], categorieseao, category_id,
             datepublication, datefermeture, datesaisieouverture,
             datesaisieadjudication, dateadjudication,
             regionlivraison, unspscprincipale, disposition,
@@ -401,7 +473,7 @@ def insert_or_update_avis(cursor, avis_data, source_file):
         VALUES (
             '{numeroseao}', {numero_str}, {org_str}, {municipal_val},
             {ad1_str}, {ad2_str}, {ville_str}, {province}, {pays}, {codep},
-            {titre}, {type_str}, {nature_str}, {prec_str}, {categorieseao},
+            {titre}, {type_str}, {nature_str}, {prec_str}, {categorieseao}, {category_id},
             {datepublication}, {datefermeture}, {datesaisieouverture},
             {datesaisieadjud}, {dateadjudication},
             {regionlivraison}, {unspscprincipale}, {disposition},
@@ -410,88 +482,79 @@ def insert_or_update_avis(cursor, avis_data, source_file):
         """
         cursor.execute(sql_insert)
 
-def process_avis_file(cursor, file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        xml_content = f.read()
-    xml_content = xml_content.replace("&", "&amp;")
-    tree = ET.ElementTree(ET.fromstring(xml_content))
-    root = tree.getroot()
-
-    avis_nodes = root.findall('avis')
-    if not avis_nodes and root.tag == 'avis':
-        avis_nodes = [root]
-
-    for a_node in avis_nodes:
-        avis_data = {
-            'numeroseao':           safe_text(a_node, 'numeroseao'),
-            'numero':               safe_text(a_node, 'numero'),
-            'organisme':            safe_text(a_node, 'organisme'),
-            'municipal':            safe_text(a_node, 'municipal'),
-            'adresse1':             safe_text(a_node, 'adresse1'),
-            'adresse2':             safe_text(a_node, 'adresse2'),
-            'ville':                safe_text(a_node, 'ville'),
-            'province':             safe_text(a_node, 'province'),
-            'pays':                 safe_text(a_node, 'pays'),
-            'codepostal':           safe_text(a_node, 'codepostal'),
-            'titre':                safe_text(a_node, 'titre'),
-            'type':                 safe_text(a_node, 'type'),
-            'nature':               safe_text(a_node, 'nature'),
-            'precision':            safe_text(a_node, 'precision'),
-            'categorieseao':        safe_text(a_node, 'categorieseao'),
-            'datepublication':      safe_text(a_node, 'datepublication'),
-            'datefermeture':        safe_text(a_node, 'datefermeture'),
-            'datesaisieouverture':  safe_text(a_node, 'datesaisieouverture'),
-            'datesaisieadjudication': safe_text(a_node, 'datesaisieadjudication'),
-            'dateadjudication':     safe_text(a_node, 'dateadjudication'),
-            'regionlivraison':      safe_text(a_node, 'regionlivraison'),
-            'unspscprincipale':     safe_text(a_node, 'unspscprincipale'),
-            'disposition':          safe_text(a_node, 'disposition'),
-            'hyperlienseao':        safe_text(a_node, 'hyperlienseao')
-        }
-
-        insert_or_update_avis(cursor, avis_data, file_path)
-        delete_avis_fournisseurs(cursor, avis_data['numeroseao'])
-        
+def parse_avis_file(file_path):
+    """Avis, Fournisseur and AvisFournisseur records of an avis XML file."""
+    avis_records = []
+    fournisseurs = []
+    # A numeroseao seen again replaces its links, like the per-avis delete
+    # does in the table.
+    links = {}
+    for a_node in read_xml_nodes(file_path, 'avis'):
+        avis = Avis._make(safe_text(a_node, field) for field in Avis._fields)
+        avis_records.append(avis)
+        avis_links = links[avis.numeroseao] = []
+
         fournisseur_parent = a_node.find('fournisseurs')
         if fournisseur_parent is not None:
             for f_elem in fournisseur_parent.findall('fournisseur'):
-                fournisseur_data = {
-                    'neq':              safe_text(f_elem, 'neq'),
-                    'nomorganisation':  safe_text(f_elem, 'nomorganisation'),
-                    'adresse1':         safe_text(f_elem, 'adresse1'),
-                    'adresse2':         safe_text(f_elem, 'adresse2'),
-                    'ville':            safe_text(f_elem, 'ville'),
-                    'province':         safe_text(f_elem, 'province'),
-                    'pays':             safe_text(f_elem, 'pays'),
-                    'codepostal':       safe_text(f_elem, 'codepostal')
-                }
-                insert_or_update_fournisseur(cursor, fournisseur_data, file_path)
-
-                link_data = {
-                    'numeroseao':      avis_data['numeroseao'],
-                    'numero':          avis_data['numero'],
-                    'neq':             fournisseur_data['neq'],
-                    'nomorganisation': fournisseur_data['nomorganisation'],
-                    'admissible':      parse_bit(f_elem.find('admissible')),
-                    'conforme':        parse_bit(f_elem.find('conforme')),
-                    'adjudicataire':   parse_bit(f_elem.find('adjudicataire')),
-                    'montantsoumis':       safe_text(f_elem, 'montantsoumis')       or 'NULL',
-                    'montantssoumisunite': safe_text(f_elem, 'montantssoumisunite') or 'NULL',
-                    'montantcontrat':      safe_text(f_elem, 'montantcontrat')      or 'NULL',
-                    'montanttotalcontrat': safe_text(f_elem, 'montanttotalcontrat') or 'NULL'
-                }
-               
-                insert_avis_fournisseur(cursor, link_data, file_path)
+                fournisseur = Fournisseur._make(
+                    safe_text(f_elem, field) for field in Fournisseur._fields
+                )
+                fournisseurs.append(fournisseur)
+
+                avis_links.append(AvisFournisseur(
+                    numeroseao          = avis.numeroseao,
+                    numero              = avis.numero,
+                    neq                 = fournisseur.neq,
+                    nomorganisation     = fournisseur.nomorganisation,
+                    admissible          = parse_bit(f_elem.find('admissible')),
+                    conforme            = parse_bit(f_elem.find('conforme')),
+                    adjudicataire       = parse_bit(f_elem.find('adjudicataire')),
+                    montantsoumis       = safe_text(f_elem, 'montantsoumis')       or 'NULL',
+                    montantssoumisunite = safe_text(f_elem, 'montantssoumisunite') or 'NULL',
+                    montantcontrat      = safe_text(f_elem, 'montantcontrat')      or 'NULL',
+                    montanttotalcontrat = safe_text(f_elem, 'montanttotalcontrat') or 'NULL'
+                ))
+
+    return {
+        'avis': avis_records,
+        'fournisseurs': fournisseurs,
+        'avis_fournisseurs': [link for avis_links in links.values() for link in avis_links],
+    }
+
+AVIS_RECORDS = {'avis': Avis, 'fournisseurs': Fournisseur, 'avis_fournisseurs': AvisFournisseur}
+
+def process_avis_file(cursor, file_path, bulk=None, cache=None, categories=None):
+    """
+    Loads an avis file. `categories` is the run's CategoryIds (default: a new
+    one, which reads the categories table again).
+    """
+    records = parsed_records(cache, file_path, 'avis', parse_avis_file, AVIS_RECORDS)
+    if categories is None:
+        categories = CategoryIds()
+
+    # Links are inserted in one batch at the end of the file.
+    for avis in records['avis']:
+        insert_or_update_avis(cursor, avis, file_path, categories)
+        delete_avis_fournisseurs(cursor, avis.numeroseao)
+    for fournisseur in records['fournisseurs']:
+        insert_or_update_fournisseur(cursor, fournisseur, file_path)
+
+    # The links replace rows deleted in this transaction: a bulk backend that
+    # commits on its own connection is not used for them.
+    if bulk is not None and not bulk.in_transaction:
+        bulk = None
+    insert_avis_fournisseurs(cursor, records['avis_fournisseurs'], file_path, bulk)
 
 ##############################################################################
 # 5) Contrats 
 ##############################################################################
 
-def insert_or_update_contrats(cursor, contrat_data, source_file):
+def insert_or_update_contrats(cursor, contrat, source_file):
     sf_str = escape_single_quotes(source_file)
 
-    raw_numeroseao = contrat_data.get('numeroseao', '').strip()
-    raw_numero     = contrat_data.get('numero', '').strip()
+    raw_numeroseao = contrat.numeroseao.strip()
+    raw_numero     = contrat.numero.strip()
 
     if not raw_numeroseao or not raw_numero:
         logging.error(f"Cannot process contrat record from {source_file} because primary key field is missing: numeroseao='{raw_numeroseao}', numero='{raw_numero}'")
@@ -500,14 +563,14 @@ def insert_or_update_contrats(cursor, contrat_data, source_file):
     numeroseao_str = escape_single_quotes(raw_numeroseao)
     numero_str     = escape_single_quotes(raw_numero)
 
-    datefinale    = to_date(contrat_data.get('datefinale', ''))
-    datepubfinale = to_date(contrat_data.get('datepublicationfinale', ''))
-    montantfinal  = contrat_data.get('montantfinal', 'NULL')
+    datefinale    = to_date(contrat.datefinale)
+    datepubfinale = to_date(contrat.datepublicationfinale)
+    montantfinal  = contrat.montantfinal
 
-    raw_neq = contrat_data.get('neqcontractant', '').strip()
+    raw_neq = contrat.neqcontractant.strip()
     neqcontractant_str = raw_neq.replace("'", "''")
 
-    nomc_str = escape_single_quotes(contrat_data.get('nomcontractant', ''))
+    nomc_str = escape_single_quotes(contrat.nomcontractant)
 
     sql_check = f"""
     SELECT numeroseao
@@ -569,88 +632,60 @@ def insert_or_update_contrats(cursor, contrat_data, source_file):
         """
         cursor.execute(sql_insert)
 
-def process_contrats_file(cursor, file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        xml_content = f.read()
-    xml_content = xml_content.replace("&", "&amp;")
-    tree = ET.ElementTree(ET.fromstring(xml_content))
-    root = tree.getroot()
-
-    contrat_nodes = root.findall('contrat')
-
-    if not contrat_nodes and root.tag == 'contrat':
-        contrat_nodes = [root]
-
-    for c_node in contrat_nodes:
-        data = {
-            'numeroseao':           safe_text(c_node, 'numeroseao'),
-            'numero':               safe_text(c_node, 'numero'),
-            'datefinale':           safe_text(c_node, 'datefinale'),
-            'datepublicationfinale':safe_text(c_node, 'datepublicationfinale') or 'NULL',
-            'montantfinal':         safe_text(c_node, 'montantfinal') or 'NULL',
-            'nomcontractant':       safe_text(c_node, 'nomcontractant'),
-            'neqcontractant':       safe_text(c_node, 'neqcontractant')
-        }
-        insert_or_update_contrats(cursor, data, file_path)
+def parse_contrats_file(file_path):
+    """Contrat records of a contrats XML file."""
+    contrats = []
+    for c_node in read_xml_nodes(file_path, 'contrat'):
+        contrats.append(Contrat(
+            numeroseao            = safe_text(c_node, 'numeroseao'),
+            numero                = safe_text(c_node, 'numero'),
+            datefinale            = safe_text(c_node, 'datefinale'),
+            datepublicationfinale = safe_text(c_node, 'datepublicationfinale') or 'NULL',
+            montantfinal          = safe_text(c_node, 'montantfinal') or 'NULL',
+            nomcontractant        = safe_text(c_node, 'nomcontractant'),
+            neqcontractant        = safe_text(c_node, 'neqcontractant')
+        ))
+    return {'contrats': contrats}
+
+def process_contrats_file(cursor, file_path, cache=None):
+    records = parsed_records(
+        cache, file_path, 'contrats', parse_contrats_file, {'contrats': Contrat}
+    )
+    for contrat in records['contrats']:
+        insert_or_update_contrats(cursor, contrat, file_path)
 
 ##############################################################################
 # 6) Depenses 
 ##############################################################################
 
-def insert_depense_and_ignore_history(cursor, depense_data, source_file):
-
-    sf_str = escape_single_quotes(source_file)
-
-    raw_numeroseao = depense_data.get('numeroseao','').strip()
-    raw_numero     = depense_data.get('numero','').strip()
-
-    numeroseao_str = escape_single_quotes(raw_numeroseao)
-    numero_str     = escape_single_quotes(raw_numero)
-
-    desc_str = escape_single_quotes(depense_data.get('description',''))
-    nomc_str = escape_single_quotes(depense_data.get('nomcontractant',''))
-
-    datedep  = to_date(depense_data.get('datedepense',''))
-    datepub  = to_date(depense_data.get('datepublicationdepense',''))
-    montant  = depense_data.get('montantdepense','NULL')
-
-    raw_neq  = depense_data.get('neqcontractant','').strip()
-    neq_str  = raw_neq.replace("'", "''")
-
-    sql_insert = f"""
-    INSERT INTO depenses (
-        numeroseao, numero,
-        datedepense, datepublicationdepense,
-        montantdepense, description,
-        nomcontractant, neqcontractant, source_file
-    )
-    VALUES (
-        {numeroseao_str},
-        {numero_str},
-        {datedep},
-        {datepub},
-        {montant},
-        {desc_str},
-        {nomc_str},
-        '{neq_str}',
-        {sf_str}
-    );
+def insert_depenses_and_ignore_history(cursor, depenses, source_file, bulk=None):
     """
-    cursor.execute(sql_insert)
-
-def process_depenses_file(cursor, file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        xml_content = f.read()
-    xml_content = xml_content.replace("&", "&amp;")
-    tree = ET.ElementTree(ET.fromstring(xml_content))
-    root = tree.getroot()
-
-    avis_nodes = root.findall('avis')
-
-    if not avis_nodes and root.tag == 'avis':
-        avis_nodes = [root]
+    Inserts Depense records, INSERT_BATCH_ROWS rows per statement, or through
+    the bulk_writer backend `bulk`.
+    """
+    if bulk is not None:
+        write_bulk(bulk, 'depenses', DEPENSE_NORMALIZER, depenses, source_file)
+        return
+    sf_str = escape_single_quotes(source_file)
+    rows = DEPENSE_NORMALIZER.literals(depenses, extra=(sf_str,))
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        values = ",\n".join(rows[start:start + INSERT_BATCH_ROWS])
+        sql_insert = f"""
+        INSERT INTO depenses (
+            numeroseao, numero,
+            datedepense, datepublicationdepense,
+            montantdepense, description,
+            nomcontractant, neqcontractant, source_file
+        )
+        VALUES
+        {values};
+        """
+        cursor.execute(sql_insert)
 
-    for a_node in avis_nodes:
+def parse_depenses_file(file_path):
+    """Depense records of a depenses XML file."""
+    depenses = []
+    for a_node in read_xml_nodes(file_path, 'avis'):
         numeroseao = safe_text(a_node, 'numeroseao')
         numero     = safe_text(a_node, 'numero')
         depenses_parent = a_node.find('depenses')
@@ -658,14 +693,20 @@ def process_depenses_file(cursor, file_path):
             continue
 
         for d_node in depenses_parent.findall('depense'):
-            data = {
-                'numeroseao':             numeroseao,
-                'numero':                 numero,
-                'datedepense':           safe_text(d_node, 'datedepense'),
-                'datepublicationdepense': safe_text(d_node, 'datepublicationdepense'),
-                'montantdepense':         safe_text(d_node, 'montantdepense') or 'NULL',
-                'description':            safe_text(d_node, 'description'),
-                'nomcontractant':         safe_text(d_node, 'nomcontractant'),
-                'neqcontractant':         safe_text(d_node, 'neqcontractant')
-            }
-            insert_depense_and_ignore_history(cursor, data, file_path)
+            depenses.append(Depense(
+                numeroseao             = numeroseao,
+                numero                 = numero,
+                datedepense            = safe_text(d_node, 'datedepense'),
+                datepublicationdepense = safe_text(d_node, 'datepublicationdepense'),
+                montantdepense         = safe_text(d_node, 'montantdepense') or 'NULL',
+                description            = safe_text(d_node, 'description'),
+                nomcontractant         = safe_text(d_node, 'nomcontractant'),
+                neqcontractant         = safe_text(d_node, 'neqcontractant')
+            ))
+    return {'depenses': depenses}
+
+def process_depenses_file(cursor, file_path, bulk=None, cache=None):
+    records = parsed_records(
+        cache, file_path, 'depenses', parse_depenses_file, {'depenses': Depense}
+    )
+    insert_depenses_and_ignore_history(cursor, records['depenses'], file_path, bulk)
@@ -1,11 +1,19 @@
+import argparse
 import logging
 import pyodbc
 import traceback
 import os
 import re
+import sys
 
+# bulk_writer.py and parse_cache.py are shared with the other loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from bulk_writer import BulkCopyBackend, ExecutemanyBackend
+from parse_cache import PARSE_CACHE_DIR, ParseCache
 from table_creation import create_tables
 from data_insertion import (
+    CategoryIds,
     process_avis_file,
     process_contrats_file,
     process_depenses_file
@@ -18,9 +26,12 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+SERVER = 'DESKTOP-91AK8MU\\SQLEXPRESS'
+DATABASE = 'XMLData'
+
 def get_connection():
-    server = 'DESKTOP-91AK8MU\\SQLEXPRESS'
-    database = 'XMLData'
+    server = SERVER
+    database = DATABASE
     conn_str = (
         "DRIVER={ODBC Driver 17 for SQL Server};"
         f"SERVER={server};"
@@ -44,11 +55,38 @@ def extract_date_from_filename(filename):
         return match.group(1), match.group(2)
     return None, None
 
-def main():
+def bulk_backend(kind, cursor):
+    """
+    Backend of the batch inserts (avis_fournisseurs, depenses): None for the
+    INSERT ... VALUES literals, 'executemany' for fast_executemany on `cursor`,
+    'bcp' for a TDS bulk copy on a separate connection (depenses only, see
+    data_insertion.process_avis_file).
+    """
+    if kind == 'executemany':
+        return ExecutemanyBackend(cursor)
+    if kind == 'bcp':
+        return BulkCopyBackend(dsn=SERVER, database=DATABASE, use_sso=True)
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Loads the SEAO XML files into XMLData.")
+    parser.add_argument("--bulk", choices=('executemany', 'bcp'),
+                        help="write the avis_fournisseurs / depenses batches through bulk_writer")
+    parser.add_argument("--cache-dir", default=PARSE_CACHE_DIR,
+                        help="parse cache: records of unchanged files are read from here "
+                             "instead of parsing the XML again")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse every file, without reading or filling the parse cache")
+    args = parser.parse_args(argv)
+    cache = None if args.no_cache else ParseCache(args.cache_dir)
+
     conn = get_connection()
     cursor = conn.cursor()
+    bulk = None
+    categories = CategoryIds()
 
     try:
+        bulk = bulk_backend(args.bulk, cursor)
         print("Creating tables if they don't exist...")
         create_tables(cursor)
         conn.commit()
@@ -81,16 +119,17 @@ def main():
                 try:
                     lower_file = filename.lower()
                     if "avis" in lower_file:
-                        process_avis_file(cursor, file_path)
+                        process_avis_file(cursor, file_path, bulk, cache, categories)
                     elif "contrats" in lower_file:
-                        process_contrats_file(cursor, file_path)
+                        process_contrats_file(cursor, file_path, cache)
                     elif "depenses" in lower_file:
-                        process_depenses_file(cursor, file_path)
+                        process_depenses_file(cursor, file_path, bulk, cache)
                     else:
                         print(f" Unknown file type: {filename}")
                         logging.warning(f"Unknown file type: {filename}")
 
                     conn.commit()
+                    categories.commit()
                     print(f"Done with {filename}\n")
 
                 except Exception as ex:
@@ -98,6 +137,7 @@ def main():
                     logging.error(f"Error: {ex}")
                     traceback.print_exc()
                     conn.rollback()
+                    categories.rollback()
         else:
             print(f" No '{xml_dir}' folder found. Skipping.")
             logging.warning(f"No {xml_dir} folder found. Skipping.")
@@ -108,6 +148,8 @@ def main():
         traceback.print_exc()
         conn.rollback()
     finally:
+        if bulk is not None:
+            bulk.close()
         cursor.close()
         conn.close()
         print(" Database connection closed.")
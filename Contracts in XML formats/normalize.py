@@ -0,0 +1,117 @@
+"""
+normalize.py
+Field normalizers for the XML loader, compiled once per table from the column
+types in table_creation.TABLE_COLUMNS.
+
+Each value is first cleaned (plain Python value, None for NULL) and only then
+rendered as a T-SQL literal, so the same normalizer can feed both the literal
+INSERT statements and parameter binding.
+
+  - text  (NVARCHAR): drop CR, control characters -> one space, curly quotes ->
+          straight ones, NFKC. Plain printable ASCII skips all of it.
+  - date  (DATETIME): 'YYYY-MM-DD[ HH:MM[:SS]]', parsed by position, with a
+          bounded memo since the same dates come back across records.
+  - number (BIT / INT / DECIMAL): already parsed text, passed through.
+  - raw_text: quotes doubled, '' kept as '' (columns the loader never NULLs).
+
+The text and date cleaning are shared/cleaning.py's; category codes are in
+shared/categories.py.
+
+benchmark_normalizer.py compares these with the per-field helpers they replace.
+"""
+
+import os
+import sys
+
+from table_creation import TABLE_COLUMNS
+
+# cleaning.py is shared with the category codes and the OCDS converter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from cleaning import clean_date, clean_text
+
+# --------------------------------------------------------
+# Text
+# --------------------------------------------------------
+def text_literal(clean):
+    if clean is None:
+        return "NULL"
+    return "N'" + clean.replace("'", "''") + "'"
+
+def sql_text(value):
+    """N'...' literal or NULL; same output as the former escape_single_quotes()."""
+    return text_literal(clean_text(value))
+
+def raw_text_literal(value):
+    return "'" + (value or '').replace("'", "''") + "'"
+
+# --------------------------------------------------------
+# Dates
+# --------------------------------------------------------
+def date_literal(clean):
+    return "NULL" if clean is None else f"'{clean}'"
+
+def sql_date(value):
+    """'YYYY-MM-DD HH:MM:SS' literal or NULL; same output as the former to_date()."""
+    return date_literal(clean_date(value))
+
+# --------------------------------------------------------
+# Per-table normalizers
+# --------------------------------------------------------
+def _identity(value):
+    return value
+
+def _number_literal(value):
+    return "NULL" if value is None or value == '' else str(value)
+
+def _number_clean(value):
+    return None if value is None or value in ('', 'NULL') else value
+
+_KINDS = {
+    # kind: (clean, literal from clean value)
+    'text':     (clean_text, text_literal),
+    'date':     (clean_date, date_literal),
+    'number':   (_number_clean, _number_literal),
+    'raw_text': (_identity, raw_text_literal),
+}
+
+def column_kind(sql_type):
+    sql_type = sql_type.upper()
+    if sql_type.startswith('NVARCHAR'):
+        return 'text'
+    if sql_type.startswith('DATETIME'):
+        return 'date'
+    return 'number'
+
+class TableNormalizer:
+    """
+    Normalizer for the records of one table (a record_type() class).
+    `overrides` maps field -> kind for columns the loader renders differently.
+    """
+
+    def __init__(self, table, record_cls, overrides=None):
+        types = dict(TABLE_COLUMNS[table])
+        overrides = overrides or {}
+        self.table = table
+        self.fields = record_cls._fields
+        self.kinds = tuple(overrides.get(f) or column_kind(types[f]) for f in self.fields)
+        self._clean = tuple(_KINDS[k][0] for k in self.kinds)
+        self._literal = tuple(_KINDS[k][1] for k in self.kinds)
+
+    def clean(self, records):
+        """Tuples of cleaned values (None for NULL), for parameter binding."""
+        funcs = self._clean
+        return [tuple(f(v) for f, v in zip(funcs, record)) for record in records]
+
+    def literals(self, records, extra=()):
+        """
+        '(lit, lit, ...)' VALUES rows, one per record. `extra` literals (e.g. the
+        source file) are appended to every row.
+        """
+        clean = self._clean
+        literal = self._literal
+        tail = "".join(", " + lit for lit in extra) + ")"
+        return [
+            "(" + ", ".join(lit(f(v)) for f, lit, v in zip(clean, literal, record)) + tail
+            for record in records
+        ]
@@ -1,7 +1,143 @@
+import os
+import sys
 import pyodbc
+from collections import namedtuple
+
+# The category sets are shared with the JSON loader and the OCDS converter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from categories import CATEGORY_SETS, SQL_CATEGORY_CODE
+
+# --------------------------------------------------------
+# Column layout of the main tables, kept in step with the CREATE TABLE
+# statements below. The loader's record classes are generated from it.
+# --------------------------------------------------------
+TABLE_COLUMNS = {
+    'avis': (
+        ('numeroseao', 'NVARCHAR(50) NOT NULL PRIMARY KEY'),
+        ('numero', 'NVARCHAR(50)'),
+        ('organisme', 'NVARCHAR(MAX)'),
+        ('municipal', 'BIT'),
+        ('adresse1', 'NVARCHAR(MAX)'),
+        ('adresse2', 'NVARCHAR(MAX)'),
+        ('ville', 'NVARCHAR(MAX)'),
+        ('province', 'NVARCHAR(50)'),
+        ('pays', 'NVARCHAR(50)'),
+        ('codepostal', 'NVARCHAR(20)'),
+        ('titre', 'NVARCHAR(MAX)'),
+        ('type', 'NVARCHAR(100)'),
+        ('nature', 'NVARCHAR(100)'),
+        ('precision', 'NVARCHAR(100)'),
+        ('categorieseao', 'NVARCHAR(MAX)'),
+        ('category_id', 'INT'),
+        ('datepublication', 'DATETIME'),
+        ('datefermeture', 'DATETIME'),
+        ('datesaisieouverture', 'DATETIME'),
+        ('datesaisieadjudication', 'DATETIME'),
+        ('dateadjudication', 'DATETIME'),
+        ('regionlivraison', 'NVARCHAR(50)'),
+        ('unspscprincipale', 'NVARCHAR(50)'),
+        ('disposition', 'NVARCHAR(MAX)'),
+        ('hyperlienseao', 'NVARCHAR(MAX)'),
+        ('source_file', 'NVARCHAR(MAX)'),
+        ('imported_at', 'DATETIME DEFAULT GETDATE()'),
+    ),
+    'fournisseurs': (
+        ('fourn_id', 'INT IDENTITY(1,1) PRIMARY KEY'),
+        ('neq', 'NVARCHAR(50)'),
+        ('nomorganisation', 'NVARCHAR(MAX)'),
+        ('adresse1', 'NVARCHAR(MAX)'),
+        ('adresse2', 'NVARCHAR(MAX)'),
+        ('ville', 'NVARCHAR(MAX)'),
+        ('province', 'NVARCHAR(50)'),
+        ('pays', 'NVARCHAR(50)'),
+        ('codepostal', 'NVARCHAR(20)'),
+        ('existing_neq', 'NVARCHAR(50)'),
+        ('source_file', 'NVARCHAR(MAX)'),
+        ('imported_at', 'DATETIME DEFAULT GETDATE()'),
+    ),
+    'avis_fournisseurs': (
+        ('avis_fourn_id', 'INT IDENTITY(1,1) PRIMARY KEY'),
+        ('numeroseao', 'NVARCHAR(50)'),
+        ('numero', 'NVARCHAR(50)'),
+        ('neq', 'NVARCHAR(50)'),
+        ('nomorganisation', 'NVARCHAR(MAX)'),
+        ('admissible', 'BIT'),
+        ('conforme', 'BIT'),
+        ('adjudicataire', 'BIT'),
+        ('montantsoumis', 'DECIMAL(18,2)'),
+        ('montantssoumisunite', 'INT'),
+        ('montantcontrat', 'DECIMAL(18,2)'),
+        ('montanttotalcontrat', 'DECIMAL(18,2)'),
+        ('source_file', 'NVARCHAR(MAX)'),
+        ('imported_at', 'DATETIME DEFAULT GETDATE()'),
+    ),
+    'contrats': (
+        ('numeroseao', 'NVARCHAR(50)'),
+        ('numero', 'NVARCHAR(50)'),
+        ('datefinale', 'DATETIME'),
+        ('datepublicationfinale', 'DATETIME'),
+        ('montantfinal', 'DECIMAL(18,2)'),
+        ('nomcontractant', 'NVARCHAR(MAX)'),
+        ('neqcontractant', 'NVARCHAR(50)'),
+        ('source_file', 'NVARCHAR(MAX)'),
+        ('imported_at', 'DATETIME DEFAULT GETDATE()'),
+    ),
+    'depenses': (
+        ('depense_id', 'INT IDENTITY(1,1) PRIMARY KEY'),
+        ('numeroseao', 'NVARCHAR(50) NOT NULL'),
+        ('numero', 'NVARCHAR(50)'),
+        ('datedepense', 'DATETIME'),
+        ('datepublicationdepense', 'DATETIME'),
+        ('montantdepense', 'DECIMAL(18,2)'),
+        ('description', 'NVARCHAR(MAX)'),
+        ('nomcontractant', 'NVARCHAR(MAX)'),
+        ('neqcontractant', 'NVARCHAR(50)'),
+        ('source_file', 'NVARCHAR(MAX)'),
+        ('imported_at', 'DATETIME DEFAULT GETDATE()'),
+    ),
+}
+
+def record_type(table, typename, exclude=(), module=None):
+    """
+    Tuple-backed record class (namedtuple) with one field per column of `table`,
+    in TABLE_COLUMNS order, leaving out server-generated columns (IDENTITY,
+    DEFAULT) and those in `exclude`. Pass module=__name__ from the module that
+    binds the class so its records can be pickled.
+    """
+    fields = [
+        name for name, sql_type in TABLE_COLUMNS[table]
+        if 'IDENTITY' not in sql_type and 'DEFAULT' not in sql_type and name not in exclude
+    ]
+    return namedtuple(typename, fields, module=module)
 
 def create_tables(cursor):
 
+    # ---------- CATEGORIES + CATEGORY_SETS ----------
+    sql_categories = """
+    IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'categories')
+    BEGIN
+        CREATE TABLE categories (
+            category_id INT IDENTITY(1,1) PRIMARY KEY,
+            code        NVARCHAR(20)  NOT NULL UNIQUE,
+            label       NVARCHAR(MAX) NULL
+        );
+    END;
+    """
+    cursor.execute(sql_categories)
+
+    sql_category_sets = """
+    IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'category_sets')
+    BEGIN
+        CREATE TABLE category_sets (
+            set_name    NVARCHAR(50) NOT NULL,
+            category_id INT NOT NULL REFERENCES categories (category_id),
+            PRIMARY KEY (set_name, category_id)
+        );
+    END;
+    """
+    cursor.execute(sql_category_sets)
+
     # ---------- AVIS + AVIS_HISTORY ----------
     sql_avis = """
     IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'avis')
@@ -22,6 +158,7 @@ def create_tables(cursor):
             [nature]      NVARCHAR(100) NULL,
             [precision]   NVARCHAR(100) NULL,
             categorieseao NVARCHAR(MAX) NULL,
+            category_id   INT           NULL,
             datepublication       DATETIME NULL,
             datefermeture         DATETIME NULL,
             datesaisieouverture   DATETIME NULL,
@@ -38,6 +175,54 @@ def create_tables(cursor):
     """
     cursor.execute(sql_avis)
 
+    # avis tables created before the category dimension
+    sql_avis_category_id = """
+    IF COL_LENGTH('dbo.avis', 'category_id') IS NULL
+        ALTER TABLE dbo.avis ADD category_id INT NULL;
+    """
+    cursor.execute(sql_avis_category_id)
+
+    sql_avis_category_index = """
+    IF NOT EXISTS (SELECT 1 FROM sys.indexes
+                   WHERE name = 'IX_avis_category_id' AND object_id = OBJECT_ID('dbo.avis'))
+        CREATE INDEX IX_avis_category_id ON dbo.avis (category_id);
+    """
+    cursor.execute(sql_avis_category_index)
+
+    # Codes of the avis loaded without one (a no-op once they all have it:
+    # the NULL category_id rows are found through the index).
+    code = SQL_CATEGORY_CODE.format(column='a.categorieseao')
+    sql_avis_category_backfill = f"""
+    INSERT INTO categories (code, label)
+    SELECT x.code, MIN(x.categorieseao)
+    FROM (
+        SELECT {code} AS code, a.categorieseao
+        FROM avis a
+        WHERE a.category_id IS NULL AND a.categorieseao IS NOT NULL
+    ) x
+    WHERE x.code <> ''
+      AND NOT EXISTS (SELECT 1 FROM categories c WHERE c.code = x.code)
+    GROUP BY x.code;
+
+    UPDATE a
+    SET category_id = c.category_id
+    FROM avis a
+    JOIN categories c ON c.code = {code}
+    WHERE a.category_id IS NULL AND a.categorieseao IS NOT NULL;
+    """
+    cursor.execute(sql_avis_category_backfill)
+
+    # Category sets, as declared in CATEGORY_SETS
+    for set_name, codes in CATEGORY_SETS.items():
+        cursor.execute("DELETE FROM category_sets WHERE set_name = ?", set_name)
+        for category_code in codes:
+            cursor.execute("""
+            IF NOT EXISTS (SELECT 1 FROM categories WHERE code = ?)
+                INSERT INTO categories (code) VALUES (?);
+            INSERT INTO category_sets (set_name, category_id)
+            SELECT ?, category_id FROM categories WHERE code = ?;
+            """, category_code, category_code, set_name, category_code)
+
     sql_avis_history = """
     IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'avis_history')
     BEGIN
@@ -0,0 +1,632 @@
+"""
+indicators.py
+The ConstructionDB indicators of 'Requets sql dans la base de donnees
+ConstructionDB' (les requêtes SQL pour chaque indicateur, Contracts durations,
+Tender Durations, Croissance des contrats avec award / avec bids), as one
+batch that runs on DuckDB over the Parquet dataset of parquet_export.py, or on
+SQL Server like the original scripts.
+
+    python indicators.py                                   # DuckDB, all indicators
+    python indicators.py --start 2021-01-01 --end 2023-01-01 --output results
+    python indicators.py --engine sqlserver top_suppliers
+    python indicators.py --benchmark --repeat 3            # both engines, compared
+
+The date range (start included, end excluded) applies to the release date:
+the releases in range are selected once into scoped_releases (#scoped_releases
+on SQL Server), and every indicator only counts the rows of those releases.
+Without a range, every release is in scope, including those without a date;
+a release without a date is left out as soon as one bound is given.
+
+Each indicator has a DuckDB and a T-SQL text computing the same result. AVG()
+of an integer is an integer in T-SQL, so the DuckDB texts truncate those
+averages the same way. Every indicator is timed; --benchmark runs each one on
+both engines (best of --repeat runs) and checks that they return the same rows.
+For the comparison to hold, the Parquet dataset must be an export of the
+database the SQL Server engine reads, e.g.
+
+    python parquet_export.py --ocds-database ConstructionDB --root construction
+    python indicators.py --root construction --benchmark
+"""
+
+import argparse
+import csv
+import logging
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+
+import duckdb
+import pyodbc
+
+from parquet_export import EXPORT_DIR, conn_str
+
+logging.basicConfig(
+    filename='process.log',
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s: %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+SQLSERVER_DATABASE = 'ConstructionDB'
+# Record types of the Parquet dataset the indicators read.
+TABLES = ('releases', 'release_parties', 'parties', 'bids', 'awards', 'contracts',
+          'contract_transactions')
+
+Indicator = namedtuple('Indicator', ('name', 'description', 'duckdb', 'tsql'))
+
+# --------------------------------------------------------
+# Scope: releases in the date range
+# --------------------------------------------------------
+SCOPE_COLUMNS = ("ocid, release_id, date, tender_procurement_method_details, "
+                 "tender_start_date, tender_end_date")
+
+DUCKDB_SCOPE = f"""
+CREATE OR REPLACE TEMP TABLE scoped_releases AS
+SELECT {SCOPE_COLUMNS}
+FROM releases{{where}}
+"""
+
+# A parameterized statement runs through sp_executesql, and a temp table it
+# creates is dropped when it returns: #scoped_releases is created without
+# parameters, then filled by TSQL_SCOPE.
+TSQL_SCOPE_RESET = f"""
+SET NOCOUNT ON;
+IF OBJECT_ID('tempdb..#scoped_releases') IS NOT NULL DROP TABLE #scoped_releases;
+SELECT TOP 0 {SCOPE_COLUMNS}
+INTO #scoped_releases
+FROM dbo.releases;
+CREATE CLUSTERED INDEX IX_scoped_releases_ocid ON #scoped_releases (ocid);
+"""
+
+TSQL_SCOPE = f"""
+SET NOCOUNT ON;
+INSERT INTO #scoped_releases ({SCOPE_COLUMNS})
+SELECT {SCOPE_COLUMNS}
+FROM dbo.releases{{where}};
+"""
+
+def scope_sql(template, start=None, end=None):
+    """
+    `template` with the WHERE clause selecting the releases dated in [start,
+    end) (None: unbounded), and its parameters. No clause without bounds, so
+    the releases without a date stay in scope.
+    """
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("date < ?")
+        params.append(end)
+    where = "\nWHERE " + " AND ".join(conditions) if conditions else ""
+    return template.format(where=where), tuple(params)
+
+# --------------------------------------------------------
+# Indicators
+# --------------------------------------------------------
+INDICATORS = [
+    Indicator(
+        'contract_duration', "Durée moyenne des contrats (jours)",
+        """
+        SELECT trunc(AVG(date_diff('day', c.date_signed, c.period_end_date)))::BIGINT
+               AS AvgContractDurationDays
+        FROM contracts c
+        WHERE c.date_signed IS NOT NULL AND c.period_end_date IS NOT NULL
+          AND c.ocid IN (SELECT ocid FROM scoped_releases)
+        """,
+        """
+        SELECT AVG(DATEDIFF(day, c.date_signed, c.period_end_date)) AS AvgContractDurationDays
+        FROM dbo.contracts c
+        WHERE c.date_signed IS NOT NULL AND c.period_end_date IS NOT NULL
+          AND c.ocid IN (SELECT ocid FROM #scoped_releases)
+        """,
+    ),
+    Indicator(
+        'contract_duration_by_type', "Durée moyenne des contrats par type",
+        """
+        SELECT r.tender_procurement_method_details AS ContractType,
+               trunc(AVG(date_diff('day', c.date_signed, c.period_end_date)))::BIGINT
+               AS AverageDurationDays
+        FROM contracts c
+        JOIN scoped_releases r ON c.ocid = r.ocid
+        WHERE c.date_signed IS NOT NULL AND c.period_end_date IS NOT NULL
+        GROUP BY r.tender_procurement_method_details
+        ORDER BY ContractType
+        """,
+        """
+        SELECT r.tender_procurement_method_details AS ContractType,
+               AVG(DATEDIFF(day, c.date_signed, c.period_end_date)) AS AverageDurationDays
+        FROM dbo.contracts c
+        JOIN #scoped_releases r ON c.ocid = r.ocid
+        WHERE c.date_signed IS NOT NULL AND c.period_end_date IS NOT NULL
+        GROUP BY r.tender_procurement_method_details
+        ORDER BY ContractType
+        """,
+    ),
+    Indicator(
+        'contract_duration_by_supplier', "Durée moyenne des contrats par fournisseur",
+        """
+        SELECT p.party_id, p.name AS SupplierName,
+               COUNT(DISTINCT c.contract_id) AS NumberOfContracts,
+               trunc(AVG(date_diff('day', c.date_signed, c.period_end_date)))::BIGINT
+               AS AverageDurationDays
+        FROM contracts c
+        JOIN scoped_releases r ON c.ocid = r.ocid
+        JOIN release_parties rp ON r.ocid = rp.ocid
+        JOIN parties p ON rp.party_id = p.party_id
+        WHERE rp.role = 'supplier'
+          AND c.date_signed IS NOT NULL AND c.period_end_date IS NOT NULL
+        GROUP BY p.party_id, p.name
+        ORDER BY NumberOfContracts DESC
+        """,
+        """
+        SELECT p.party_id, p.name AS SupplierName,
+               COUNT(DISTINCT c.contract_id) AS NumberOfContracts,
+               AVG(DATEDIFF(day, c.date_signed, c.period_end_date)) AS AverageDurationDays
+        FROM dbo.contracts c
+        JOIN #scoped_releases r ON c.ocid = r.ocid
+        JOIN dbo.release_parties rp ON r.ocid = rp.ocid
+        JOIN dbo.parties p ON rp.party_id = p.party_id
+        WHERE rp.role = 'supplier'
+          AND c.date_signed IS NOT NULL AND c.period_end_date IS NOT NULL
+        GROUP BY p.party_id, p.name
+        ORDER BY NumberOfContracts DESC
+        """,
+    ),
+    Indicator(
+        'tender_duration', "Durée moyenne des appels d'offres (jours)",
+        """
+        SELECT trunc(AVG(date_diff('day', r.tender_start_date, r.tender_end_date)))::BIGINT
+               AS AvgTenderDurationDays
+        FROM scoped_releases r
+        WHERE r.tender_start_date IS NOT NULL AND r.tender_end_date IS NOT NULL
+        """,
+        """
+        SELECT AVG(DATEDIFF(day, r.tender_start_date, r.tender_end_date)) AS AvgTenderDurationDays
+        FROM #scoped_releases r
+        WHERE r.tender_start_date IS NOT NULL AND r.tender_end_date IS NOT NULL
+        """,
+    ),
+    Indicator(
+        'tender_duration_by_type', "Durée moyenne des appels d'offres par type",
+        """
+        SELECT r.tender_procurement_method_details AS TenderType,
+               trunc(AVG(date_diff('day', r.tender_start_date, r.tender_end_date)))::BIGINT
+               AS AverageTenderDurationDays
+        FROM scoped_releases r
+        WHERE r.tender_start_date IS NOT NULL AND r.tender_end_date IS NOT NULL
+        GROUP BY r.tender_procurement_method_details
+        ORDER BY TenderType
+        """,
+        """
+        SELECT r.tender_procurement_method_details AS TenderType,
+               AVG(DATEDIFF(day, r.tender_start_date, r.tender_end_date)) AS AverageTenderDurationDays
+        FROM #scoped_releases r
+        WHERE r.tender_start_date IS NOT NULL AND r.tender_end_date IS NOT NULL
+        GROUP BY r.tender_procurement_method_details
+        ORDER BY TenderType
+        """,
+    ),
+    Indicator(
+        'tender_duration_by_buyer', "Durée moyenne des appels d'offres par acheteur",
+        """
+        SELECT p.name AS ClientName,
+               COUNT(DISTINCT r.release_id) AS NumberOfTenders,
+               trunc(AVG(date_diff('day', r.tender_start_date, r.tender_end_date)))::BIGINT
+               AS AverageTenderDurationDays
+        FROM scoped_releases r
+        JOIN release_parties rp ON r.ocid = rp.ocid AND rp.role = 'buyer'
+        JOIN parties p ON rp.party_id = p.party_id
+        WHERE r.tender_start_date IS NOT NULL AND r.tender_end_date IS NOT NULL
+        GROUP BY p.name
+        ORDER BY AverageTenderDurationDays DESC
+        """,
+        """
+        SELECT p.name AS ClientName,
+               COUNT(DISTINCT r.release_id) AS NumberOfTenders,
+               AVG(DATEDIFF(day, r.tender_start_date, r.tender_end_date)) AS AverageTenderDurationDays
+        FROM #scoped_releases r
+        JOIN dbo.release_parties rp ON r.ocid = rp.ocid AND rp.role = 'buyer'
+        JOIN dbo.parties p ON rp.party_id = p.party_id
+        WHERE r.tender_start_date IS NOT NULL AND r.tender_end_date IS NOT NULL
+        GROUP BY p.name
+        ORDER BY AverageTenderDurationDays DESC
+        """,
+    ),
+    Indicator(
+        'cost_growth', "Croissance moyenne des coûts (award vs contrat)",
+        """
+        SELECT AVG(CAST(c.value_amount - a.value_amount AS DOUBLE)) AS AvgCostGrowth
+        FROM contracts c
+        JOIN awards a ON c.award_id = a.award_id
+        WHERE c.value_amount IS NOT NULL AND a.value_amount IS NOT NULL
+          AND c.ocid IN (SELECT ocid FROM scoped_releases)
+        """,
+        """
+        SELECT AVG(CAST(c.value_amount - a.value_amount AS FLOAT)) AS AvgCostGrowth
+        FROM dbo.contracts c
+        JOIN dbo.awards a ON c.award_id = a.award_id
+        WHERE c.value_amount IS NOT NULL AND a.value_amount IS NOT NULL
+          AND c.ocid IN (SELECT ocid FROM #scoped_releases)
+        """,
+    ),
+    Indicator(
+        'contract_growth_awards', "Croissance des contrats, award comme montant initial",
+        """
+        WITH InitialAwards AS (
+            SELECT a.ocid, a.value_amount AS InitialAward, rp.party_id AS BuyerID,
+                   ROW_NUMBER() OVER (PARTITION BY a.ocid ORDER BY a.award_id ASC) AS rn
+            FROM awards a
+            INNER JOIN release_parties rp ON a.ocid = rp.ocid AND rp.role = 'buyer'
+        ),
+        FirstAwards AS (
+            SELECT ocid, InitialAward, BuyerID FROM InitialAwards WHERE rn = 1
+        ),
+        Expenses AS (
+            SELECT ocid, COALESCE(SUM(value_amount), 0) AS AdditionalExpenses
+            FROM contract_transactions
+            GROUP BY ocid
+        ),
+        FinalContractValues AS (
+            SELECT ocid, value_amount AS FinalContract
+            FROM contracts
+            WHERE ocid IN (SELECT ocid FROM scoped_releases)
+        )
+        SELECT DISTINCT fc.ocid, fa.BuyerID, p.name AS BuyerName, fa.InitialAward,
+               e.AdditionalExpenses,
+               fa.InitialAward + e.AdditionalExpenses AS ExpectedFinalContract,
+               fc.FinalContract,
+               fc.FinalContract - fa.InitialAward AS Growth
+        FROM FinalContractValues fc
+        LEFT JOIN FirstAwards fa ON fc.ocid = fa.ocid
+        LEFT JOIN Expenses e ON fc.ocid = e.ocid
+        LEFT JOIN parties p ON fa.BuyerID = p.party_id AND e.AdditionalExpenses IS NOT NULL
+        ORDER BY fa.InitialAward DESC
+        """,
+        """
+        WITH InitialAwards AS (
+            SELECT a.ocid, a.value_amount AS InitialAward, rp.party_id AS BuyerID,
+                   ROW_NUMBER() OVER (PARTITION BY a.ocid ORDER BY a.award_id ASC) AS rn
+            FROM dbo.awards a
+            INNER JOIN dbo.release_parties rp ON a.ocid = rp.ocid AND rp.role = 'buyer'
+        ),
+        FirstAwards AS (
+            SELECT ocid, InitialAward, BuyerID FROM InitialAwards WHERE rn = 1
+        ),
+        Expenses AS (
+            SELECT ocid, ISNULL(SUM(value_amount), 0) AS AdditionalExpenses
+            FROM dbo.contract_transactions
+            GROUP BY ocid
+        ),
+        FinalContractValues AS (
+            SELECT ocid, value_amount AS FinalContract
+            FROM dbo.contracts
+            WHERE ocid IN (SELECT ocid FROM #scoped_releases)
+        )
+        SELECT DISTINCT fc.ocid, fa.BuyerID, p.name AS BuyerName, fa.InitialAward,
+               e.AdditionalExpenses,
+               fa.InitialAward + e.AdditionalExpenses AS ExpectedFinalContract,
+               fc.FinalContract,
+               fc.FinalContract - fa.InitialAward AS Growth
+        FROM FinalContractValues fc
+        LEFT JOIN FirstAwards fa ON fc.ocid = fa.ocid
+        LEFT JOIN Expenses e ON fc.ocid = e.ocid
+        LEFT JOIN dbo.parties p ON fa.BuyerID = p.party_id AND e.AdditionalExpenses IS NOT NULL
+        ORDER BY fa.InitialAward DESC
+        """,
+    ),
+    Indicator(
+        'contract_growth_bids', "Croissance des contrats, soumission comme montant initial",
+        """
+        WITH InitialBids AS (
+            SELECT b.ocid, b.value AS InitialBid, rp.party_id AS SupplierID,
+                   ROW_NUMBER() OVER (PARTITION BY b.ocid ORDER BY b.bid_row_id ASC) AS rn
+            FROM bids b
+            INNER JOIN release_parties rp ON b.ocid = rp.ocid AND b.party_id = rp.party_id
+            WHERE rp.role = 'supplier'
+        ),
+        FirstBids AS (
+            SELECT ocid, InitialBid, SupplierID FROM InitialBids WHERE rn = 1
+        ),
+        Expenses AS (
+            SELECT ocid, COALESCE(SUM(value_amount), 0) AS AdditionalExpenses
+            FROM contract_transactions
+            GROUP BY ocid
+        ),
+        FinalContractValues AS (
+            SELECT ocid, value_amount AS FinalContract
+            FROM contracts
+            WHERE ocid IN (SELECT ocid FROM scoped_releases)
+        )
+        SELECT DISTINCT fc.ocid, fb.SupplierID, p.name AS SupplierName, fb.InitialBid,
+               e.AdditionalExpenses,
+               fb.InitialBid + e.AdditionalExpenses AS ExpectedFinalContract,
+               fc.FinalContract
+        FROM FinalContractValues fc
+        LEFT JOIN FirstBids fb ON fc.ocid = fb.ocid
+        LEFT JOIN Expenses e ON fc.ocid = e.ocid
+        LEFT JOIN parties p ON fb.SupplierID = p.party_id
+        ORDER BY fc.ocid
+        """,
+        """
+        WITH InitialBids AS (
+            SELECT b.ocid, b.value AS InitialBid, rp.party_id AS SupplierID,
+                   ROW_NUMBER() OVER (PARTITION BY b.ocid ORDER BY b.bid_row_id ASC) AS rn
+            FROM dbo.bids b
+            INNER JOIN dbo.release_parties rp ON b.ocid = rp.ocid AND b.party_id = rp.party_id
+            WHERE rp.role = 'supplier'
+        ),
+        FirstBids AS (
+            SELECT ocid, InitialBid, SupplierID FROM InitialBids WHERE rn = 1
+        ),
+        Expenses AS (
+            SELECT ocid, ISNULL(SUM(value_amount), 0) AS AdditionalExpenses
+            FROM dbo.contract_transactions
+            GROUP BY ocid
+        ),
+        FinalContractValues AS (
+            SELECT ocid, value_amount AS FinalContract
+            FROM dbo.contracts
+            WHERE ocid IN (SELECT ocid FROM #scoped_releases)
+        )
+        SELECT DISTINCT fc.ocid, fb.SupplierID, p.name AS SupplierName, fb.InitialBid,
+               e.AdditionalExpenses,
+               fb.InitialBid + e.AdditionalExpenses AS ExpectedFinalContract,
+               fc.FinalContract
+        FROM FinalContractValues fc
+        LEFT JOIN FirstBids fb ON fc.ocid = fb.ocid
+        LEFT JOIN Expenses e ON fc.ocid = e.ocid
+        LEFT JOIN dbo.parties p ON fb.SupplierID = p.party_id
+        ORDER BY fc.ocid
+        """,
+    ),
+    Indicator(
+        'avg_bidders', "Nombre moyen de soumissionnaires par appel d'offres",
+        """
+        SELECT trunc(AVG(BidCount))::BIGINT AS AvgBidders
+        FROM (
+            SELECT ocid, COUNT(DISTINCT party_id) AS BidCount
+            FROM bids
+            WHERE ocid IN (SELECT ocid FROM scoped_releases)
+            GROUP BY ocid
+        ) AS BidStats
+        """,
+        """
+        SELECT AVG(BidCount) AS AvgBidders
+        FROM (
+            SELECT ocid, COUNT(DISTINCT party_id) AS BidCount
+            FROM dbo.bids
+            WHERE ocid IN (SELECT ocid FROM #scoped_releases)
+            GROUP BY ocid
+        ) AS BidStats
+        """,
+    ),
+    Indicator(
+        'bids_per_tender', "Nombre de soumissions par appel d'offres",
+        """
+        SELECT b.ocid, COUNT(*) AS NumberOfBids
+        FROM bids b
+        WHERE b.ocid IN (SELECT ocid FROM scoped_releases)
+        GROUP BY b.ocid
+        ORDER BY NumberOfBids
+        """,
+        """
+        SELECT b.ocid, COUNT(*) AS NumberOfBids
+        FROM dbo.bids b
+        WHERE b.ocid IN (SELECT ocid FROM #scoped_releases)
+        GROUP BY b.ocid
+        ORDER BY NumberOfBids
+        """,
+    ),
+    Indicator(
+        'top_suppliers', "Top 10 des fournisseurs par montant total de contrats",
+        """
+        SELECT p.name AS SupplierName,
+               SUM(c.value_amount) AS TotalContractValue,
+               COUNT(*) AS NumberOfContracts
+        FROM contracts c
+        JOIN release_parties rp ON c.ocid = rp.ocid AND rp.role = 'supplier'
+        JOIN parties p ON rp.party_id = p.party_id
+        WHERE c.ocid IN (SELECT ocid FROM scoped_releases)
+        GROUP BY p.name
+        ORDER BY TotalContractValue DESC
+        LIMIT 10
+        """,
+        """
+        SELECT TOP 10 p.name AS SupplierName,
+               SUM(c.value_amount) AS TotalContractValue,
+               COUNT(*) AS NumberOfContracts
+        FROM dbo.contracts c
+        JOIN dbo.release_parties rp ON c.ocid = rp.ocid AND rp.role = 'supplier'
+        JOIN dbo.parties p ON rp.party_id = p.party_id
+        WHERE c.ocid IN (SELECT ocid FROM #scoped_releases)
+        GROUP BY p.name
+        ORDER BY TotalContractValue DESC
+        """,
+    ),
+]
+INDICATORS_BY_NAME = {i.name: i for i in INDICATORS}
+
+# --------------------------------------------------------
+# Engines
+# --------------------------------------------------------
+class DuckDBEngine:
+    """
+    DuckDB over the Parquet dataset under `root`. With `database` (a .duckdb
+    file), the tables are copied into it once and read from there afterwards
+    (`refresh=True` copies them again); without, they are views on the files.
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, root=EXPORT_DIR, database=None, refresh=False):
+        self.conn = duckdb.connect(database or ':memory:')
+        existing = {row[0] for row in self.conn.execute(
+            "SELECT table_name FROM information_schema.tables").fetchall()}
+        for table in TABLES:
+            files = os.path.join(root, table, '*', '*.parquet').replace('\\', '/')
+            source = f"read_parquet('{files}', hive_partitioning = true)"
+            if database is None:
+                self.conn.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM {source}")
+            elif refresh or table not in existing:
+                self.conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {source}")
+
+    def scope(self, start, end):
+        self.conn.execute(*scope_sql(DUCKDB_SCOPE, start, end))
+
+    def run(self, indicator):
+        cursor = self.conn.execute(indicator.duckdb)
+        columns = [d[0] for d in cursor.description]
+        return columns, cursor.fetchall()
+
+    def close(self):
+        self.conn.close()
+
+class SqlServerEngine:
+    """The T-SQL texts, on `database` (ConstructionDB by default)."""
+
+    name = 'sqlserver'
+
+    def __init__(self, database=SQLSERVER_DATABASE):
+        self.conn = pyodbc.connect(conn_str(database), autocommit=True)
+        self.cursor = self.conn.cursor()
+
+    def scope(self, start, end):
+        self.cursor.execute(TSQL_SCOPE_RESET)
+        self.cursor.execute(*scope_sql(TSQL_SCOPE, start, end))
+
+    def run(self, indicator):
+        self.cursor.execute(indicator.tsql)
+        columns = [d[0] for d in self.cursor.description]
+        return columns, [tuple(row) for row in self.cursor.fetchall()]
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+# --------------------------------------------------------
+# Batch
+# --------------------------------------------------------
+Result = namedtuple('Result', ('indicator', 'columns', 'rows', 'seconds'))
+
+def run_indicators(engine, indicators, start=None, end=None):
+    """
+    Runs `indicators` on `engine` for the releases dated in [start, end)
+    (every release if neither is given).
+    Returns (seconds spent selecting the releases in scope, [Result, ...]).
+    """
+    begin = time.perf_counter()
+    engine.scope(start, end)
+    scope_seconds = time.perf_counter() - begin
+
+    results = []
+    for indicator in indicators:
+        begin = time.perf_counter()
+        columns, rows = engine.run(indicator)
+        seconds = time.perf_counter() - begin
+        results.append(Result(indicator, columns, rows, seconds))
+        logging.info(f"[{engine.name}] {indicator.name}: {len(rows):,} rows in {seconds:.3f}s")
+    return scope_seconds, results
+
+def write_csv(results, directory):
+    os.makedirs(directory, exist_ok=True)
+    for result in results:
+        path = os.path.join(directory, f"{result.indicator.name}.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(result.columns)
+            writer.writerows(result.rows)
+
+def _comparable(value):
+    if isinstance(value, (Decimal, float)):
+        return round(float(value), 2)
+    return value
+
+def same_rows(a, b):
+    """True if `a` and `b` hold the same rows, in any order (amounts to the cent)."""
+    def normalize(rows):
+        return sorted((tuple(_comparable(v) for v in row) for row in rows), key=repr)
+    return normalize(a) == normalize(b)
+
+def print_results(engine, scope_seconds, results):
+    print(f"\n{engine.name}: releases in scope selected in {scope_seconds:.3f}s")
+    for result in results:
+        print(f"  {result.indicator.name:<30} {len(result.rows):>8,} rows  {result.seconds:8.3f}s")
+        if len(result.rows) == 1:
+            for column, value in zip(result.columns, result.rows[0]):
+                print(f"      {column} = {value}")
+
+def benchmark(engines, indicators, start, end, repeat=1):
+    """
+    Runs `indicators` `repeat` times on each of `engines` (the first is the
+    reference), prints the best time of each and whether the rows match.
+    """
+    best = {}
+    rows = {}
+    for engine in engines:
+        for _ in range(repeat):
+            _, results = run_indicators(engine, indicators, start, end)
+            for result in results:
+                key = (engine.name, result.indicator.name)
+                best[key] = min(best.get(key, result.seconds), result.seconds)
+                rows[key] = result.rows
+
+    reference = engines[0].name
+    header = "".join(f"{engine.name:>12}" for engine in engines)
+    print(f"\n{'indicator':<30}{header}   same rows")
+    for indicator in indicators:
+        times = "".join(f"{best[(engine.name, indicator.name)]:11.3f}s" for engine in engines)
+        same = all(same_rows(rows[(reference, indicator.name)], rows[(engine.name, indicator.name)])
+                   for engine in engines[1:])
+        print(f"{indicator.name:<30}{times}   {'yes' if same else 'NO'}")
+        logging.info(f"benchmark {indicator.name}: {times.strip()} same rows: {same}")
+
+def parse_date(text):
+    return datetime.strptime(text, '%Y-%m-%d')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ConstructionDB indicators on DuckDB / Parquet or SQL Server.")
+    parser.add_argument("indicators", nargs='*', metavar='indicator',
+                        help=f"indicators to run, among {', '.join(INDICATORS_BY_NAME)} (default: all)")
+    parser.add_argument("--start", type=parse_date, help="first release date in scope (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="release date the scope stops before (YYYY-MM-DD)")
+    parser.add_argument("--engine", choices=('duckdb', 'sqlserver'), default='duckdb')
+    parser.add_argument("--root", default=EXPORT_DIR, help="Parquet dataset of parquet_export.py")
+    parser.add_argument("--duckdb-file", help="DuckDB database the dataset is copied into")
+    parser.add_argument("--refresh", action='store_true', help="copy the dataset into --duckdb-file again")
+    parser.add_argument("--database", default=SQLSERVER_DATABASE, help="SQL Server database")
+    parser.add_argument("--output", help="directory for one CSV per indicator")
+    parser.add_argument("--benchmark", action='store_true',
+                        help="run on both engines and compare times and rows")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per engine with --benchmark")
+    args = parser.parse_args(argv)
+    unknown = set(args.indicators) - set(INDICATORS_BY_NAME)
+    if unknown:
+        parser.error(f"unknown indicators: {', '.join(sorted(unknown))}")
+    indicators = [INDICATORS_BY_NAME[name] for name in args.indicators] or INDICATORS
+
+    def open_engine(name):
+        if name == 'duckdb':
+            return DuckDBEngine(args.root, args.duckdb_file, args.refresh)
+        return SqlServerEngine(args.database)
+
+    names = ('sqlserver', 'duckdb') if args.benchmark else (args.engine,)
+    engines = []
+    try:
+        for name in names:
+            engines.append(open_engine(name))
+        if args.benchmark:
+            benchmark(engines, indicators, args.start, args.end, args.repeat)
+        else:
+            scope_seconds, results = run_indicators(engines[0], indicators, args.start, args.end)
+            print_results(engines[0], scope_seconds, results)
+            if args.output:
+                write_csv(results, args.output)
+    finally:
+        for engine in engines:
+            engine.close()
+
+if __name__ == '__main__':
+    main()
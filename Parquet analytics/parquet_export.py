@@ -0,0 +1,295 @@
+"""
+parquet_export.py
+Parquet archive of the SEAO data, for offline analytics with columnar engines
+(DuckDB, Polars, pandas/pyarrow) instead of the indicator SQL on SQL Server.
+
+The dataset is one directory per record type, partitioned by year:
+
+    <root>/releases/year=2021/data.parquet
+    <root>/releases/year=2022/data.parquet
+    ...
+    <root>/avis/year=2021/data.parquet
+    <root>/_manifest.json
+
+Record types (EXPORTS):
+  - releases, release_parties, parties, bids, awards, contracts,
+    contract_transactions: the OCDS tables loaded by 'Contracts in JSON
+    formats all' (JSONtest2). A row goes under the year of its release date;
+    a party under the year of the first release it takes part in.
+  - avis, contrats, depenses: the XMLData tables, under the year of the avis
+    publication date.
+Rows without a date go under year=0. String columns are dictionary-encoded
+(organismes, statuses, categories, currencies repeat a lot).
+
+The export is incremental: for every record type, one query gives the row
+count and a fingerprint of each year (see fingerprint_sql), and only the years
+whose fingerprint differs from the one in _manifest.json are rewritten (a
+year that has no rows any more is removed). Run it after each ingest:
+
+    python parquet_export.py                 # changed years only
+    python parquet_export.py --full          # rewrite everything
+    python parquet_export.py releases avis   # some record types
+
+A partition is written to a temporary file and renamed over the previous one,
+and the manifest is saved after each partition, so an interrupted export
+leaves a readable dataset and resumes with the partitions it did not finish.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyodbc
+
+logging.basicConfig(
+    filename='process.log',
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s: %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+SERVER = 'DESKTOP-91AK8MU\\SQLEXPRESS'
+OCDS_DATABASE = 'JSONtest2'
+XML_DATABASE = 'XMLData'
+
+EXPORT_DIR = 'parquet'
+MANIFEST = '_manifest.json'
+FETCH_BATCH_SIZE = 20000
+COMPRESSION = 'zstd'
+
+def conn_str(database):
+    return (
+        "DRIVER={ODBC Driver 17 for SQL Server};"
+        f"SERVER={SERVER};"
+        f"DATABASE={database};"
+        "Trusted_Connection=yes;"
+    )
+
+# --------------------------------------------------------
+# Record types
+# --------------------------------------------------------
+# record_type : directory of the record type under the export root
+# source      : 'ocds' or 'xml' (database the rows are read from)
+# query       : SELECT of the rows, with their partition year as export_year
+Export = namedtuple('Export', ('record_type', 'source', 'query'))
+
+RELEASE_YEAR = "ISNULL(YEAR(r.date), 0) AS export_year"
+AVIS_YEAR = "ISNULL(YEAR(a.datepublication), 0) AS export_year"
+
+EXPORTS = {e.record_type: e for e in (
+    Export('releases', 'ocds', f"SELECT r.*, {RELEASE_YEAR} FROM dbo.releases r"),
+    Export('release_parties', 'ocds', f"""
+        SELECT rp.*, {RELEASE_YEAR}
+        FROM dbo.release_parties rp LEFT JOIN dbo.releases r ON r.ocid = rp.ocid"""),
+    Export('parties', 'ocds', """
+        SELECT p.*, ISNULL(y.first_year, 0) AS export_year
+        FROM dbo.parties p
+        LEFT JOIN (
+            SELECT rp.party_id, MIN(YEAR(r.date)) AS first_year
+            FROM dbo.release_parties rp
+            JOIN dbo.releases r ON r.ocid = rp.ocid
+            GROUP BY rp.party_id
+        ) y ON y.party_id = p.party_id"""),
+    Export('bids', 'ocds', f"""
+        SELECT b.*, {RELEASE_YEAR}
+        FROM dbo.bids b LEFT JOIN dbo.releases r ON r.ocid = b.ocid"""),
+    Export('awards', 'ocds', f"""
+        SELECT aw.*, {RELEASE_YEAR}
+        FROM dbo.awards aw LEFT JOIN dbo.releases r ON r.ocid = aw.ocid"""),
+    Export('contracts', 'ocds', f"""
+        SELECT c.*, {RELEASE_YEAR}
+        FROM dbo.contracts c LEFT JOIN dbo.releases r ON r.ocid = c.ocid"""),
+    Export('contract_transactions', 'ocds', f"""
+        SELECT t.*, {RELEASE_YEAR}
+        FROM dbo.contract_transactions t LEFT JOIN dbo.releases r ON r.ocid = t.ocid"""),
+    Export('avis', 'xml', f"SELECT a.*, {AVIS_YEAR} FROM dbo.avis a"),
+    Export('contrats', 'xml', f"""
+        SELECT c.*, {AVIS_YEAR}
+        FROM dbo.contrats c LEFT JOIN dbo.avis a ON a.numeroseao = c.numeroseao"""),
+    Export('depenses', 'xml', f"""
+        SELECT d.*, {AVIS_YEAR}
+        FROM dbo.depenses d LEFT JOIN dbo.avis a ON a.numeroseao = d.numeroseao"""),
+)}
+
+# Fingerprint of a year: the SHA-256 of each row (as JSON), sorted and hashed
+# together. Unlike CHECKSUM_AGG, which XORs the rows, it also changes when two
+# rows swap values or when edits cancel out. Needs SQL Server 2017 (STRING_AGG).
+def fingerprint_sql(export):
+    return f"""
+    SELECT h.export_year, COUNT_BIG(*),
+           CONVERT(CHAR(64), HASHBYTES('SHA2_256',
+               STRING_AGG(CONVERT(VARCHAR(MAX), h.row_hash, 2), '') WITHIN GROUP (ORDER BY h.row_hash)
+           ), 2)
+    FROM (
+        SELECT t.export_year,
+               HASHBYTES('SHA2_256',
+                   (SELECT t.* FOR JSON PATH, WITHOUT_ARRAY_WRAPPER, INCLUDE_NULL_VALUES)
+               ) AS row_hash
+        FROM ({export.query}) t
+    ) h
+    GROUP BY h.export_year
+    """
+
+def partition_sql(export):
+    return f"SELECT * FROM ({export.query}) t WHERE t.export_year = ?"
+
+# --------------------------------------------------------
+# Arrow schema from the cursor description
+# --------------------------------------------------------
+def arrow_type(description):
+    """Arrow type of a pyodbc cursor.description entry."""
+    _, type_code, _, _, precision, scale, _ = description
+    if type_code is str:
+        return pa.string()
+    if type_code is datetime:
+        return pa.timestamp('ms')
+    if type_code is Decimal:
+        return pa.decimal128(precision or 38, scale or 0)
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    return pa.string()
+
+def partition_schema(cursor):
+    """Schema of a partition query, without its export_year column."""
+    return pa.schema([
+        pa.field(d[0], arrow_type(d)) for d in cursor.description if d[0] != 'export_year'
+    ])
+
+# --------------------------------------------------------
+# Manifest
+# --------------------------------------------------------
+def load_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+# --------------------------------------------------------
+# Export
+# --------------------------------------------------------
+def partition_dir(root, record_type, year):
+    return os.path.join(root, record_type, f"year={year}")
+
+def write_partition(cursor, export, year, path, batch_size=FETCH_BATCH_SIZE):
+    """Writes the rows of `year` to the Parquet file `path`; returns the row count."""
+    cursor.execute(partition_sql(export), year)
+    schema = partition_schema(cursor)
+    keep = [i for i, d in enumerate(cursor.description) if d[0] != 'export_year']
+    strings = [f.name for f in schema if pa.types.is_string(f.type)]
+    count = 0
+    tmp = path + '.tmp'
+    with pq.ParquetWriter(tmp, schema, compression=COMPRESSION, use_dictionary=strings) as writer:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch(
+                [pa.array(columns[i], type=field.type) for i, field in zip(keep, schema)],
+                schema=schema,
+            ))
+            count += len(rows)
+    os.replace(tmp, path)
+    return count
+
+def export_record_type(conn, export, root, manifest, full=False):
+    """
+    Rewrites the partitions of `export` whose fingerprint changed (all of them
+    if `full`) and removes the years that have no rows any more. Updates and
+    saves `manifest` as it goes. Returns (years rewritten, rows written).
+    """
+    cursor = conn.cursor()
+    cursor.execute(fingerprint_sql(export))
+    current = {str(year): [count, checksum] for year, count, checksum in cursor.fetchall()}
+    done = manifest.setdefault(export.record_type, {})
+
+    rewritten = rows = 0
+    for year in sorted(current, key=int):
+        if not full and done.get(year) == current[year]:
+            continue
+        target = partition_dir(root, export.record_type, year)
+        os.makedirs(target, exist_ok=True)
+        start = time.monotonic()
+        n = write_partition(cursor, export, int(year), os.path.join(target, 'data.parquet'))
+        done[year] = current[year]
+        save_manifest(root, manifest)
+        rewritten += 1
+        rows += n
+        logging.info(f"[{export.record_type}] year={year}: {n:,} rows "
+                     f"in {time.monotonic() - start:.1f}s")
+
+    for year in [y for y in done if y not in current]:
+        shutil.rmtree(partition_dir(root, export.record_type, year), ignore_errors=True)
+        del done[year]
+        save_manifest(root, manifest)
+        logging.info(f"[{export.record_type}] year={year}: removed")
+
+    cursor.close()
+    return rewritten, rows
+
+def export_all(record_types, root=EXPORT_DIR, full=False, databases=None):
+    """
+    Exports `record_types` (names of EXPORTS) under `root`. `databases` maps
+    'ocds' / 'xml' to the database read (default OCDS_DATABASE / XML_DATABASE).
+    """
+    databases = {'ocds': OCDS_DATABASE, 'xml': XML_DATABASE, **(databases or {})}
+    os.makedirs(root, exist_ok=True)
+    manifest = load_manifest(root)
+    conns = {}
+    try:
+        for name in record_types:
+            export = EXPORTS[name]
+            if export.source not in conns:
+                conns[export.source] = pyodbc.connect(conn_str(databases[export.source]))
+            start = time.monotonic()
+            rewritten, rows = export_record_type(conns[export.source], export, root, manifest, full)
+            msg = (f"{name}: {rewritten} year(s) rewritten, {rows:,} rows "
+                   f"in {time.monotonic() - start:.1f}s")
+            print(msg)
+            logging.info(msg)
+    finally:
+        for conn in conns.values():
+            conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exports the SEAO tables to a partitioned Parquet dataset.")
+    parser.add_argument("record_types", nargs='*', metavar='record_type',
+                        help=f"record types to export, among {', '.join(EXPORTS)} (default: all)")
+    parser.add_argument("--root", default=EXPORT_DIR, help="dataset directory")
+    parser.add_argument("--full", action='store_true', help="rewrite every partition")
+    parser.add_argument("--ocds-database", default=OCDS_DATABASE)
+    parser.add_argument("--xml-database", default=XML_DATABASE)
+    args = parser.parse_args(argv)
+    unknown = set(args.record_types) - set(EXPORTS)
+    if unknown:
+        parser.error(f"unknown record types: {', '.join(sorted(unknown))}")
+
+    export_all(
+        args.record_types or list(EXPORTS), args.root, args.full,
+        {'ocds': args.ocds_database, 'xml': args.xml_database},
+    )
+
+if __name__ == '__main__':
+    main()
@@ -14,19 +14,8 @@ FROM [XMLData].[dbo].[avis] a
 LEFT JOIN [XMLData].[dbo].[contrats] c
     ON a.numeroseao = c.numeroseao
 	where a.organisme like '%SQI%'
-	 and a.categorieseao IN (
-        'G12 - Moteurs, turbines, composants et accessoires connexes',
-        'C02 - Ouvrages de gnie civil',
-        'G31 - quipement de transport et pices de rechange',
-        'S8 - Contrle de la qualit, essais et inspections et services de reprsentants techniques',
-        'S5 - Services environnementaux',
-        'G19 - Machinerie et outils',
-        'S19 - Location  bail ou location d''installations immobilires',
-        'G25 - Constructions prfabriques',
-        'G6 - Matriaux de construction',
-        'C01 - Btiments',
-        'IMM1 - Vente de biens immeubles',
-        'G25 - Constructions prfabriqus',
-        'C03 - Autres travaux de construction',
-        'S3 - Services d''architecture et d''ingnierie'
+	 and a.category_id IN (
+        SELECT cs.category_id
+        FROM [XMLData].[dbo].[category_sets] cs
+        WHERE cs.set_name = N'construction'
     )
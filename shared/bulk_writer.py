@@ -0,0 +1,272 @@
+"""
+bulk_writer.py
+Bulk inserts of typed row batches, through a swappable backend.
+
+A BulkWriter collects the rows of one table (tuples in column order, as
+TableNormalizer.clean() gives them), converts each value to the Python type of
+its column and hands them to the backend batch_size rows at a time:
+
+    writer = BulkWriter(ExecutemanyBackend(cursor), 'depenses', columns)
+    writer.extend(rows)
+    writer.close()                     # writes what is left; returns the row count
+
+`columns` are (name, SQL type) pairs, e.g. from table_creation.TABLE_COLUMNS.
+Conversions: '' / 'NULL' / None -> NULL (NVARCHAR keeps ''), DECIMAL(p,s) ->
+Decimal rounded to s places like SQL Server does, DATETIME ->
+datetime, INT -> int, BIT -> bool.
+
+Backends (write(table, columns, rows), close(), and in_transaction: True if
+the rows are written in the caller's transaction):
+  - ExecutemanyBackend : INSERT with pyodbc fast_executemany and input sizes
+                         taken from the SQL types; runs in the caller's
+                         transaction. Its execute(sql, rows) runs any other
+                         statement (MERGE, upsert) the same way; the JSON
+                         loader and the XMLData migration write through it.
+  - BulkCopyBackend    : TDS bulk copy (python-tds, optional), on its own
+                         connection: rows are committed as they are copied, so
+                         it suits append-only loads only.
+  - SqliteBackend / DuckDBBackend : local stand-ins for tests; create_table()
+                         makes the table from the same columns.
+"""
+
+import re
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+try:
+    import pyodbc
+except ImportError:   # the SQLite / DuckDB stand-ins do not need it
+    pyodbc = None
+
+try:
+    import pytds
+except ImportError:
+    pytds = None
+
+BULK_BATCH_SIZE = 5000
+
+# --------------------------------------------------------
+# Value conversion, per SQL type
+# --------------------------------------------------------
+_NULLS = (None, '', 'NULL')
+_SIZED = re.compile(r"\(\s*(\d+|MAX)\s*(?:,\s*(\d+)\s*)?\)", re.IGNORECASE)
+
+def _text(value):
+    return None if value is None else str(value)
+
+def _int(value):
+    return None if value in _NULLS else int(str(value).strip())
+
+def _bit(value):
+    if value in _NULLS:
+        return None
+    return str(value).strip() not in ('0', 'False')
+
+def _datetime(value):
+    if value in _NULLS:
+        return None
+    if isinstance(value, datetime):
+        return value
+    raw = str(value).strip()
+    try:
+        return datetime.strptime(raw, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return datetime.fromisoformat(raw)
+
+def _decimal(quantum):
+    def convert(value):
+        if value in _NULLS:
+            return None
+        return Decimal(str(value).strip()).quantize(quantum, rounding=ROUND_HALF_UP)
+    return convert
+
+def type_parts(sql_type):
+    """('DECIMAL', 18, 2) for 'DECIMAL(18,2) NULL', ('NVARCHAR', None, None) for MAX."""
+    sql_type = sql_type.upper()
+    base = re.match(r"[A-Z]+", sql_type).group(0)
+    sized = _SIZED.search(sql_type)
+    if not sized or sized.group(1) == 'MAX':
+        return base, None, None
+    return base, int(sized.group(1)), int(sized.group(2)) if sized.group(2) else None
+
+def converter(sql_type):
+    """Function turning a cleaned value into the Python value of a `sql_type` column."""
+    base, _, scale = type_parts(sql_type)
+    if base in ('NVARCHAR', 'VARCHAR'):
+        return _text
+    if base == 'DATETIME':
+        return _datetime
+    if base == 'DECIMAL':
+        return _decimal(Decimal(1).scaleb(-(scale or 0)))
+    if base == 'BIT':
+        return _bit
+    if base == 'INT':
+        return _int
+    return lambda value: value
+
+
+class BulkWriter:
+    """Rows of one table, converted and written batch_size at a time."""
+
+    def __init__(self, backend, table, columns, batch_size=BULK_BATCH_SIZE):
+        self.backend = backend
+        self.table = table
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self._convert = tuple(converter(sql_type) for _, sql_type in self.columns)
+        self.pending = []
+        self.written = 0
+
+    def add(self, row):
+        self.pending.append(tuple(f(v) for f, v in zip(self._convert, row)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        if self.pending:
+            self.backend.write(self.table, self.columns, self.pending)
+            self.written += len(self.pending)
+            self.pending = []
+
+    def close(self):
+        """Writes the rows left; returns the number of rows written."""
+        self.flush()
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+# --------------------------------------------------------
+# Backends
+# --------------------------------------------------------
+def _insert_sql(table, columns, quote):
+    names = ", ".join(quote(name) for name, _ in columns)
+    marks = ", ".join("?" for _ in columns)
+    return f"INSERT INTO {table} ({names}) VALUES ({marks})"
+
+class ExecutemanyBackend:
+    """pyodbc executemany on `cursor`, with fast_executemany (default) and typed input sizes."""
+
+    in_transaction = True
+
+    def __init__(self, cursor, fast=True):
+        self.cursor = cursor
+        self.fast = fast
+
+    @staticmethod
+    def input_size(sql_type):
+        base, size, scale = type_parts(sql_type)
+        if base in ('NVARCHAR', 'VARCHAR'):
+            return (pyodbc.SQL_WVARCHAR, size or 0, 0)
+        if base == 'DATETIME':
+            return (pyodbc.SQL_TYPE_TIMESTAMP, 23, 3)
+        if base == 'DECIMAL':
+            return (pyodbc.SQL_DECIMAL, size or 18, scale or 0)
+        if base == 'BIT':
+            return (pyodbc.SQL_BIT, 1, 0)
+        if base == 'INT':
+            return (pyodbc.SQL_INTEGER, 10, 0)
+        return None
+
+    def execute(self, sql, rows, columns=None):
+        """
+        Runs the parameterized statement `sql` once per row of `rows`; with
+        `columns` ((name, SQL type) pairs, one per parameter) the input sizes are
+        set from their types, otherwise pyodbc takes them from the first row.
+        """
+        cursor = self.cursor
+        cursor.fast_executemany = self.fast
+        try:
+            if columns is not None:
+                cursor.setinputsizes([self.input_size(sql_type) for _, sql_type in columns])
+            cursor.executemany(sql, rows)
+        finally:
+            cursor.fast_executemany = False
+            if columns is not None:
+                cursor.setinputsizes(None)
+
+    def write(self, table, columns, rows):
+        self.execute(_insert_sql(table, columns, lambda n: f"[{n}]"), rows, columns)
+
+    def close(self):
+        pass
+
+class BulkCopyBackend:
+    """
+    TDS bulk copy (python-tds). `connect_args` are those of pytds.connect(),
+    e.g. dsn='HOST\\\\INSTANCE', database='XMLData', use_sso=True. Triggers and
+    constraints are applied as for an INSERT, NULLs are kept (no column defaults).
+    """
+
+    in_transaction = False
+
+    def __init__(self, **connect_args):
+        if pytds is None:
+            raise RuntimeError("BulkCopyBackend needs python-tds (pip install python-tds)")
+        self.conn = pytds.connect(autocommit=True, **connect_args)
+
+    def write(self, table, columns, rows):
+        with self.conn.cursor() as cursor:
+            cursor.copy_to(
+                data=rows, table_or_view=table, columns=[name for name, _ in columns],
+                check_constraints=True, fire_triggers=True, keep_nulls=True,
+            )
+
+    def close(self):
+        self.conn.close()
+
+def _standin_type(sql_type):
+    base, _, _ = type_parts(sql_type)
+    return {'NVARCHAR': 'TEXT', 'VARCHAR': 'TEXT', 'DATETIME': 'TIMESTAMP',
+            'INT': 'INTEGER', 'BIT': 'BOOLEAN'}.get(base, sql_type.split()[0])
+
+class SqliteBackend:
+    """sqlite3 stand-in. Decimals and datetimes are stored as text (sqlite3 has no such types)."""
+
+    in_transaction = True
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def create_table(self, table, columns):
+        cols = ", ".join(f'"{name}" {_standin_type(sql_type)}' for name, sql_type in columns)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({cols})')
+
+    def write(self, table, columns, rows):
+        rows = [
+            tuple(str(v) if isinstance(v, Decimal) else
+                  v.isoformat(' ') if isinstance(v, datetime) else v
+                  for v in row)
+            for row in rows
+        ]
+        self.conn.executemany(_insert_sql(table, columns, lambda n: f'"{n}"'), rows)
+
+    def close(self):
+        self.conn.commit()
+
+class DuckDBBackend:
+    """duckdb stand-in (DECIMAL and TIMESTAMP are native)."""
+
+    in_transaction = True
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def create_table(self, table, columns):
+        cols = ", ".join(f'"{name}" {_standin_type(sql_type)}' for name, sql_type in columns)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({cols})')
+
+    def write(self, table, columns, rows):
+        self.conn.executemany(_insert_sql(table, columns, lambda n: f'"{n}"'), rows)
+
+    def close(self):
+        pass
@@ -0,0 +1,45 @@
+"""
+categories.py
+SEAO category codes and the named category sets, shared by the XML loader
+(which writes them to the categories / category_sets tables), the JSON
+loader's targets and the XML -> OCDS converter of 'xml to json'.
+
+A category is identified by its code, the part of the categorieseao
+description before the first '-', upper-cased: the spelling variants of a
+category ('G25 - Constructions préfabriquées' / 'préfabriqués', 'Imm1' / 'IMM1')
+share one code.
+"""
+
+from cleaning import clean_text
+
+# --------------------------------------------------------
+# Named category sets, by category code. The XML loader's create_tables()
+# writes them to category_sets, which the migrations and indicator queries
+# join on avis.category_id instead of comparing the category descriptions.
+# --------------------------------------------------------
+CATEGORY_SETS = {
+    'construction': (
+        'C01', 'C02', 'C03', 'G6', 'G12', 'G19', 'G25', 'G31',
+        'IMM1', 'S3', 'S5', 'S8', 'S19',
+    ),
+}
+
+_SET_CODES = {name: frozenset(codes) for name, codes in CATEGORY_SETS.items()}
+
+# Category code of a categorieseao column, in T-SQL (same rule as category_code).
+SQL_CATEGORY_CODE = (
+    "UPPER(LTRIM(RTRIM(LEFT({column}, CHARINDEX('-', {column} + '-') - 1))))"
+)
+
+def category_code(value):
+    """
+    Category code of a categorieseao value, e.g. 'G25' for
+    'G25 - Constructions préfabriquées' and 'IMM1' for 'Imm1 - ...'; None if empty.
+    """
+    clean = clean_text(value)
+    code = clean.split('-', 1)[0].strip().upper() if clean else ''
+    return code or None
+
+def in_category_set(value, set_name):
+    """True if the categorieseao value `value` belongs to the set `set_name`."""
+    return category_code(value) in _SET_CODES[set_name]
@@ -0,0 +1,74 @@
+"""
+cleaning.py
+Value cleaning of the SEAO XML fields, shared by the XML loader (normalize.py
+renders the cleaned values as T-SQL literals), the category codes of
+categories.py and the OCDS releases of 'xml to json/ocds_mapping.py'.
+
+  - text: drop CR, control characters -> one space, curly quotes -> straight
+          ones, NFKC. Plain printable ASCII skips all of it.
+  - date: 'YYYY-MM-DD[ HH:MM[:SS]]', parsed by position, with a bounded memo
+          since the same dates come back across records.
+"""
+
+import re
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+
+# --------------------------------------------------------
+# Text
+# --------------------------------------------------------
+_CONTROL_RUN = re.compile(r"[\x00-\x1F]+")
+_QUOTES = str.maketrans({
+    "\r": None,
+    "\n": " ",
+    "’": "'", "‘": "'", "ʼ": "'", "‛": "'",
+    "“": '"', "”": '"',
+})
+# Printable ASCII only: nothing to translate, strip or normalize.
+_PLAIN_ASCII = re.compile(r"[\x20-\x7E]*\Z")
+
+def clean_text(value):
+    """Cleaned text, or None if `value` is empty (rendered as NULL)."""
+    if not value:
+        return None
+    txt = str(value)
+    if _PLAIN_ASCII.match(txt):
+        return txt
+    txt = _CONTROL_RUN.sub(" ", txt.translate(_QUOTES))
+    return unicodedata.normalize("NFKC", txt)
+
+# --------------------------------------------------------
+# Dates
+# --------------------------------------------------------
+_DATE_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+@lru_cache(maxsize=4096)
+def clean_date(value):
+    """'YYYY-MM-DD HH:MM:SS' for the accepted layouts, else None."""
+    if not value:
+        return None
+    raw = value.strip()
+    n = len(raw)
+    if n in (10, 16, 19) and raw.isascii() and raw[4] == '-' and raw[7] == '-':
+        digits = raw[0:4] + raw[5:7] + raw[8:10]
+        if n > 10:
+            if raw[10] != ' ' or raw[13] != ':' or (n == 19 and raw[16] != ':'):
+                digits = ''
+            else:
+                digits += raw[11:13] + raw[14:16] + raw[17:19]
+        if digits.isdigit():
+            try:
+                return datetime(
+                    int(digits[0:4]), int(digits[4:6]), int(digits[6:8]),
+                    int(digits[8:10] or 0), int(digits[10:12] or 0), int(digits[12:14] or 0)
+                ).strftime('%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                pass
+    # Anything else (e.g. non zero-padded parts): the formats strptime accepts.
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    return None
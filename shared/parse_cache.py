@@ -0,0 +1,183 @@
+"""
+parse_cache.py
+Local cache of the records parsed from an input file, so that re-running an
+ingest on unchanged files skips reading and parsing them.
+
+An entry holds the records of one file as tables (name -> list of tuples, in
+the order of `columns`) and is keyed by the SHA-256 of the file's content,
+the parser's name and version, and any parameters of the parse:
+
+    cache = ParseCache('.parse_cache')
+    key = cache.key(file_path, 'avis', PARSER_VERSION)
+    entry = cache.load(key, columns)       # (tables, meta), or None
+    if entry is None:
+        tables = parse(file_path)
+        cache.save(key, tables, columns)
+
+cached_parse() does the above.
+
+A changed file gets a new hash, a changed parser a new version: neither finds
+the old entry, which is simply left behind (delete the directory to reclaim it).
+
+With pyarrow installed, an entry is a directory of Arrow IPC files, one per
+table; a table with a column mixing types Arrow cannot hold in one column
+(e.g. 0 / 1 / 'NULL') is pickled there instead. Without pyarrow, an entry is
+one pickle. Entries are written to a temporary name and renamed, so concurrent
+writers (the JSON worker processes) never leave a partial entry.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:   # entries are pickled
+    pa = None
+
+PARSE_CACHE_DIR = '.parse_cache'
+_META = 'meta.json'
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """SHA-256 of the content of `file_path`, as hex."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Entries under `directory`; `use_arrow=False` pickles them even if pyarrow is there."""
+
+    def __init__(self, directory=PARSE_CACHE_DIR, use_arrow=True):
+        self.directory = directory
+        self.use_arrow = use_arrow and pa is not None
+        self._digests = {}   # (path, mtime, size) -> digest, for the keys of one file
+        os.makedirs(directory, exist_ok=True)
+
+    def digest(self, file_path):
+        stat = os.stat(file_path)
+        seen = (file_path, stat.st_mtime_ns, stat.st_size)
+        if seen not in self._digests:
+            self._digests[seen] = file_digest(file_path)
+        return self._digests[seen]
+
+    def key(self, file_path, parser, version, *params):
+        """Entry key of `file_path` parsed by `parser` at `version` with `params`."""
+        key = f"{parser}-v{version}-{self.digest(file_path)[:40]}"
+        if params:
+            key += "-" + hashlib.sha256(repr(params).encode('utf-8')).hexdigest()[:12]
+        return key
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key + ext)
+
+    # --------------------------------------------------------
+    # Reading
+    # --------------------------------------------------------
+    def load(self, key, columns):
+        """
+        (tables, meta) of entry `key`, or None if there is none. `columns` maps
+        each table to its column names; a table missing from the entry is None.
+        """
+        arrow_dir = self._path(key, '.arrow')
+        if os.path.isdir(arrow_dir) and pa is not None:
+            return self._load_arrow(arrow_dir, columns)
+        pickle_path = self._path(key, '.pickle')
+        if os.path.isfile(pickle_path):
+            tables, meta = _load_pickle(pickle_path)
+            return {table: tables.get(table) for table in columns}, meta
+        return None
+
+    def _load_arrow(self, arrow_dir, columns):
+        with open(os.path.join(arrow_dir, _META), encoding='utf-8') as f:
+            meta = json.load(f)
+        tables = {}
+        for table, names in columns.items():
+            path = os.path.join(arrow_dir, table + '.arrow')
+            if not os.path.isfile(path):
+                pickled = os.path.join(arrow_dir, table + '.pickle')
+                tables[table] = _load_pickle(pickled) if os.path.isfile(pickled) else None
+                continue
+            with pa.memory_map(path) as source:
+                data = pa.ipc.open_file(source).read_all()
+            tables[table] = list(zip(*(data.column(name).to_pylist() for name in names)))
+        return tables, meta.get('meta')
+
+    # --------------------------------------------------------
+    # Writing
+    # --------------------------------------------------------
+    def save(self, key, tables, columns, meta=None):
+        """
+        Stores `tables` (table -> rows, in the order of columns[table]) and
+        `meta` (a JSON-serializable value) as entry `key`.
+        """
+        if self.use_arrow:
+            self._save_arrow(key, tables, columns, meta)
+            return
+        tmp = tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False)
+        try:
+            with tmp:
+                _dump_pickle(({t: list(rows) for t, rows in tables.items()}, meta), tmp)
+            os.replace(tmp.name, self._path(key, '.pickle'))
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+    def _save_arrow(self, key, tables, columns, meta):
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, suffix='.tmp')
+        try:
+            for table, rows in tables.items():
+                names = columns[table]
+                try:
+                    data = pa.table({
+                        name: pa.array([row[i] for row in rows])
+                        for i, name in enumerate(names)
+                    })
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    with open(os.path.join(tmp_dir, table + '.pickle'), 'wb') as f:
+                        _dump_pickle(list(rows), f)
+                    continue
+                with pa.OSFile(os.path.join(tmp_dir, table + '.arrow'), 'wb') as sink:
+                    with pa.ipc.new_file(sink, data.schema) as writer:
+                        writer.write_table(data)
+            with open(os.path.join(tmp_dir, _META), 'w', encoding='utf-8') as f:
+                json.dump({'meta': meta}, f)
+            try:
+                os.rename(tmp_dir, self._path(key, '.arrow'))
+            except OSError:
+                # another process stored the same entry first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def _dump_pickle(value, f):
+    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def cached_parse(cache, file_path, parser, version, parse, columns, *params):
+    """
+    Tables of `file_path`: from `cache` if it has them, else parse(file_path),
+    stored in the cache. Without a cache, just parse(file_path).
+    """
+    if cache is None:
+        return parse(file_path)
+    key = cache.key(file_path, parser, version, *params)
+    entry = cache.load(key, columns)
+    if entry is not None:
+        return entry[0]
+    tables = parse(file_path)
+    cache.save(key, tables, columns)
+    return tables
@@ -0,0 +1,104 @@
+"""
+progress.py
+Progress of the long loops of the loaders and migration scripts, logged at
+most once every PROGRESS_INTERVAL seconds instead of once per row or per file.
+
+    progress = Progress('avis', total=120000)
+    for row in rows:
+        ...
+        progress.advance()
+    progress.done()
+
+logs, every interval and then once at the end,
+
+    [avis] 48,000 / 120,000 rows (40.0%)  2,315 rows/s  ETA 31s  2 errors
+    [avis] done: 120,000 rows in 52s (2,307 rows/s), 2 errors
+
+The rate is the average since the stage started. Without a total, the
+percent and the ETA are left out. log_summary() logs the final line of every
+stage of a run together.
+
+A Progress is not shared between threads: parallel workers each have their own.
+"""
+
+import logging
+import time
+
+PROGRESS_INTERVAL = 10.0  # seconds between two lines of a stage
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class Progress:
+    """
+    Counters of one stage. advance() and error() only count, and check the
+    clock; a line is formatted and logged once the interval has passed.
+    `log` is the function lines are written with (logging.info by default).
+    """
+
+    def __init__(self, stage, total=None, unit='rows', interval=PROGRESS_INTERVAL, log=logging.info):
+        self.stage = stage
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.log = log
+        self.count = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.finished = None
+        self.next_line = self.started + interval
+
+    def advance(self, n=1):
+        self.count += n
+        now = time.monotonic()
+        if now >= self.next_line:
+            self.next_line = now + self.interval
+            self.log(self.line(now))
+
+    def error(self, n=1):
+        self.errors += n
+
+    def rate(self, now=None):
+        elapsed = (now or self.finished or time.monotonic()) - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def line(self, now):
+        rate = self.rate(now)
+        if self.total:
+            text = (f"[{self.stage}] {self.count:,} / {self.total:,} {self.unit} "
+                    f"({100 * self.count / self.total:.1f}%)  {rate:,.0f} {self.unit}/s")
+            if rate and self.count < self.total:
+                text += f"  ETA {format_duration((self.total - self.count) / rate)}"
+        else:
+            text = f"[{self.stage}] {self.count:,} {self.unit}  {rate:,.0f} {self.unit}/s"
+        if self.errors:
+            text += f"  {self.errors:,} errors"
+        return text
+
+    def summary(self):
+        end = self.finished or time.monotonic()
+        return (f"[{self.stage}] done: {self.count:,} {self.unit} in "
+                f"{format_duration(end - self.started)} ({self.rate(end):,.0f} {self.unit}/s), "
+                f"{self.errors:,} errors")
+
+    def done(self):
+        """Ends the stage and logs its summary line. Returns self."""
+        if self.finished is None:
+            self.finished = time.monotonic()
+        self.log(self.summary())
+        return self
+
+
+def log_summary(stages, title="Stages", log=logging.info):
+    """Logs the summary line of each Progress of `stages` (None entries are skipped)."""
+    log(f"{title}:")
+    for progress in stages:
+        if progress is not None:
+            log("  " + progress.summary())
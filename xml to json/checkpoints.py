@@ -0,0 +1,152 @@
+"""
+checkpoints.py
+Progress checkpoints of a migration, so that a failed run is resumed where it
+stopped instead of starting over.
+
+A migration goes through the stages of STAGES, each a scan of one source table
+in numeroseao order. Every CHECKPOINT_EVERY rows, the rows written so far are
+committed together with a checkpoint in the target table
+migration_checkpoints: the stage, the last numeroseao fully written, and the
+run's mode and source watermarks. The checkpoint is committed in the same
+transaction as the rows it covers, so it never claims more than was written.
+
+    checkpoint = load_checkpoint(tgt_cur, 'construction')
+    if checkpoint is not None:
+        ...                            # skip the stages before checkpoint.stage
+        after = checkpoint.after('avis')   # resume past that numeroseao
+    ...
+    save_checkpoint(tgt_cur, 'construction', Checkpoint('avis', key, full, marks))
+    ...
+    clear_checkpoint(tgt_cur, 'construction')    # with the watermarks, at the end
+
+A parallel run keeps one checkpoint per numeroseao range and target (pass the
+key_range): its row is named after the range and refers to the migration as
+its parent, so a resumed run finds the ranges again with
+load_range_checkpoints() and each range continues on its own.
+
+The resumed run reuses the checkpoint's mode and marks: its rows are selected
+the way the failed run selected them, and the marks it saves are the failed
+run's, so rows imported in between are left to the next run.
+"""
+
+import json
+from collections import namedtuple
+from datetime import datetime
+
+STAGES = ('avis', 'contrats', 'depenses')
+CHECKPOINT_EVERY = 5000
+
+SQL_SELECT_CHECKPOINT = """
+SELECT stage, last_key, full_run, marks
+FROM dbo.migration_checkpoints
+WHERE migration = ?
+"""
+
+SQL_SELECT_RANGE_CHECKPOINTS = """
+SELECT range_lo, range_hi, stage, last_key, full_run, marks
+FROM dbo.migration_checkpoints
+WHERE parent = ?
+"""
+
+SQL_SAVE_CHECKPOINT = """
+IF EXISTS (SELECT 1 FROM dbo.migration_checkpoints WHERE migration = ?)
+    UPDATE dbo.migration_checkpoints
+    SET stage = ?, last_key = ?, full_run = ?, marks = ?, updated_at = GETDATE()
+    WHERE migration = ?
+ELSE
+    INSERT INTO dbo.migration_checkpoints
+    (migration, stage, last_key, full_run, marks, parent, range_lo, range_hi)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_DELETE_CHECKPOINT = "DELETE FROM dbo.migration_checkpoints WHERE migration = ? OR parent = ?"
+
+
+class Checkpoint(namedtuple('Checkpoint', ('stage', 'last_key', 'full', 'marks'))):
+    """
+    Where a run stands: every row of the stages before `stage`, and of `stage`
+    up to numeroseao `last_key` (None: none yet), is written. `full` and
+    `marks` (source table -> datetime) are those of the run.
+    """
+    __slots__ = ()
+
+    def position(self):
+        return (STAGES.index(self.stage), self.last_key or '')
+
+    def skips(self, stage):
+        """True if `stage` was completed."""
+        return STAGES.index(stage) < STAGES.index(self.stage)
+
+    def after(self, stage):
+        """numeroseao past which `stage` resumes (None: from the start)."""
+        return self.last_key if stage == self.stage else None
+
+
+def _encode_marks(marks):
+    return json.dumps({t: m.isoformat() if m is not None else None for t, m in marks.items()})
+
+def _decode_marks(text):
+    return {t: datetime.fromisoformat(m) if m is not None else None
+            for t, m in json.loads(text).items()}
+
+def range_migration(migration, key_range):
+    """Name of the checkpoint row of `migration` for the range [lo, hi) (None: unbounded)."""
+    if key_range is None:
+        return migration
+    lo, hi = key_range
+    return f"{migration} [{lo or ''} .. {hi or ''}]"
+
+def _checkpoint(row):
+    return Checkpoint(row.stage, row.last_key, bool(row.full_run), _decode_marks(row.marks))
+
+def load_checkpoint(cursor, migration, key_range=None):
+    """The checkpoint left by a failed run of `migration` (of its `key_range`), or None."""
+    cursor.execute(SQL_SELECT_CHECKPOINT, range_migration(migration, key_range))
+    row = cursor.fetchone()
+    return None if row is None else _checkpoint(row)
+
+def load_range_checkpoints(cursor, migration):
+    """{(lo, hi): checkpoint} of the ranges of a failed parallel run of `migration`."""
+    cursor.execute(SQL_SELECT_RANGE_CHECKPOINTS, migration)
+    return {(row.range_lo, row.range_hi): _checkpoint(row) for row in cursor.fetchall()}
+
+def save_checkpoint(cursor, migration, checkpoint, key_range=None):
+    """Records `checkpoint`; the caller commits, with the rows it covers."""
+    stage, last_key, full, marks = checkpoint
+    marks = _encode_marks(marks)
+    name = range_migration(migration, key_range)
+    parent, lo, hi = (None, None, None) if key_range is None else (migration, *key_range)
+    cursor.execute(SQL_SAVE_CHECKPOINT, (
+        name,
+        stage, last_key, int(full), marks, name,
+        name, stage, last_key, int(full), marks, parent, lo, hi,
+    ))
+
+def clear_checkpoint(cursor, migration):
+    """Removes the checkpoints of `migration`, those of its ranges included."""
+    cursor.execute(SQL_DELETE_CHECKPOINT, (migration, migration))
+
+def earliest_checkpoint(checkpoints):
+    """
+    The checkpoint the least advanced of `checkpoints` (one per target of a
+    run) stands at; None if any of them is None, i.e. that target starts over.
+    """
+    if not checkpoints or None in checkpoints:
+        return None
+    return min(checkpoints, key=Checkpoint.position)
+
+def earliest_range_checkpoints(range_checkpoints):
+    """
+    {(lo, hi): checkpoint} a resumed parallel run starts from, given the
+    load_range_checkpoints() of each target of the run: the ranges of the
+    first target, each at the least advanced of its checkpoints (None: the
+    range starts over). Empty if a target has no ranges or no range has a
+    checkpoint on every target, i.e. the run starts over.
+    """
+    if not range_checkpoints or not all(range_checkpoints):
+        return {}
+    ranges = {key_range: earliest_checkpoint([c.get(key_range) for c in range_checkpoints])
+              for key_range in range_checkpoints[0]}
+    if all(c is None for c in ranges.values()):
+        return {}
+    return ranges
@@ -0,0 +1,1326 @@
+"""
+migration_engine.py
+XMLData -> OCDS tables, for any number of target databases in one pass over
+the source.
+
+Each derived database is described by a Profile: which avis, contrats and
+depenses it takes (SQL predicates on the source tables) and where it is
+written. The avis, contrats and depenses are each read once, whatever the
+number of profiles: a scan selects the rows wanted by at least one enabled
+profile, with one flag column per profile, and every row is written to the
+targets that want it.
+
+    migrate([PROFILES['construction'], PROFILES['all_data']], workers=4)
+
+or, from the command line,
+
+    python migration_engine.py construction all_data --workers 4
+
+The migration scripts of this folder and of 'similar scripts' run one profile
+each. The history scripts read the *_history tables of the source and are not
+profiles.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+
+import pyodbc
+
+from checkpoints import (
+    CHECKPOINT_EVERY, STAGES, Checkpoint, clear_checkpoint, earliest_checkpoint,
+    earliest_range_checkpoints, load_checkpoint, load_range_checkpoints, save_checkpoint,
+)
+from table_creation import create_tables, set_skip_history
+from streaming import FETCH_BATCH_SIZE, SourceReader
+from watermarks import Watermarks, earliest, read_marks, window
+
+# bulk_writer.py and progress.py are shared with the loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from bulk_writer import ExecutemanyBackend
+from progress import Progress, log_summary
+
+# ---------------------------------------------------------------------------
+# Helper Functions
+# ---------------------------------------------------------------------------
+
+def safe_int(val, default=0):
+    """
+    Convert val to int; if it fails (None, '', non‑numeric), return default.
+    """
+    try:
+        return int(str(val).strip())
+    except Exception:
+        return default
+
+def safe_str(val):
+    return str(val).strip() if val else ""
+
+def format_date(val):
+    """
+    Convert a DB datetime or string into a SQL-friendly datetime string ("YYYY-MM-DD HH:MM:SS").
+    """
+    if not val:
+        return None
+    try:
+        dt = datetime.strptime(str(val), "%Y-%m-%d %H:%M:%S")
+        return dt.strftime('%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return None
+
+def get_first_something(string_val):
+    """
+    Extracts the first part (e.g., "S7") from a string like "S7 - Services ..."
+    """
+    if not string_val:
+        return ""
+    return string_val.split('-', 1)[0].strip()
+
+def map_tender_procurement_method(avis_type):
+    if avis_type in (3, 16, 17):
+        return "open"
+    if avis_type == 9:
+        return "direct"
+    if avis_type in (6, 10, 14):
+        return "limited"
+    return "open"
+
+def map_tender_procurement_method_details(avis_type):
+    return {
+        3:  "Contrat adjugé suite à un appel d’offres public",
+        6:  "Contrat adjugé suite à un appel d’offres sur invitation",
+        9:  "Contrat octroyé de gré à gré",
+        10: "Contrat adjugé suite à un appel d’offres sur invitations",
+        14: "Contrat suite à un appel d’offres sur invitation publié au SEAO",
+        16: "Contrat conclu relatif aux infrastructures de transport",
+        17: "Contrat conclu - Appel d'offres public non publié au SEAO"
+    }.get(avis_type, "Autre type de contrat")
+
+def map_main_procurement_category(precision_val):
+    return {1: "Services professionnels", 2: "Services de nature technique"}.get(precision_val, "Autres")
+
+def map_additional_procurement_categories(nature_val):
+    mapping = {
+        1: "Approvisionnement (biens)",
+        2: "Services",
+        3: "Travaux de construction",
+        5: "Autre",
+        6: "Concession",
+        7: "Vente de biens immeubles",
+        8: "Vente de biens meubles"
+    }
+    return [mapping[nature_val]] if nature_val in mapping else []
+
+# ---------------------------------------------------------------------------
+# Batched writes 
+# ---------------------------------------------------------------------------
+# avis written per round of executemany calls
+AVIS_BATCH_SIZE = 500
+
+SQL_PARTY_NAMES_RESET = """
+IF OBJECT_ID('tempdb..#party_names') IS NULL
+    CREATE TABLE #party_names (name NVARCHAR(MAX) COLLATE DATABASE_DEFAULT NOT NULL);
+ELSE
+    TRUNCATE TABLE #party_names;
+"""
+
+# matched on the indexed hash first, then on the name itself
+SQL_SELECT_PARTIES_BY_NAME = """
+SELECT n.name, p.party_id, p.street_address, p.locality, p.region,
+       p.postal_code, p.country_name, p.details
+FROM #party_names n
+JOIN parties p
+  ON p.name_hash = CAST(HASHBYTES('SHA2_256', UPPER(n.name)) AS BINARY(32))
+ AND p.name = n.name
+"""
+
+SQL_UPDATE_PARTY = """UPDATE parties
+   SET street_address=?, locality=?, region=?, postal_code=?,
+       country_name=?, details=?
+   WHERE party_id=?"""
+
+SQL_INSERT_PARTY = """INSERT INTO parties
+   (party_id,name,street_address,locality,region,postal_code,country_name,details)
+   VALUES (?,?,?,?,?,?,?,?)"""
+
+SQL_UPSERT_RELEASE = """
+IF EXISTS (SELECT 1 FROM releases WHERE ocid = ?)
+BEGIN
+    UPDATE releases SET
+        release_id = ?,
+        date       = ?,
+        tag        = 'avis',
+        initiation_type = 'tender',
+        language   = 'fr',
+        tender_id  = ?,
+        tender_title = ?,
+        tender_status = 'complete',
+        tender_procurement_method = ?,
+        tender_procurement_method_details = ?,
+        tender_main_procurement_category = ?,
+        tender_additional_procurement_categories = ?,
+        tender_procuring_entity_id = ?,
+        tender_start_date = ?,
+        tender_end_date   = ?,
+        tender_number_of_tenderers = ?,
+        tender_documents  = ?,
+        tender_item_id    = ?,
+        tender_item_description = ?,
+        tender_item_classification_scheme = 'UNSPSC',
+        tender_item_classification_id     = ?,
+        tender_item_classification_description = ?,
+        tender_item_additional_scheme = 'CATEGORY',
+        tender_item_additional_id     = ?,
+        tender_item_additional_description = ?
+    WHERE ocid = ?
+END
+ELSE
+BEGIN
+    INSERT INTO releases (
+        ocid, release_id, date, tag, initiation_type, language,
+        tender_id, tender_title, tender_status, tender_procurement_method,
+        tender_procurement_method_details, tender_main_procurement_category,
+        tender_additional_procurement_categories, tender_procuring_entity_id,
+        tender_start_date, tender_end_date, tender_number_of_tenderers, tender_documents,
+        tender_item_id, tender_item_description, tender_item_classification_scheme,
+        tender_item_classification_id, tender_item_classification_description,
+        tender_item_additional_scheme, tender_item_additional_id, tender_item_additional_description
+    )
+    VALUES (?,?,?,'avis','tender','fr',?,?,'complete',?,?,?,?,?,?,?,?,?,?,?,'UNSPSC',?,?,'CATEGORY',?,?)
+END
+"""
+
+SQL_INSERT_RELEASE_PARTY = """IF NOT EXISTS (SELECT 1 FROM release_parties WHERE ocid=? AND party_id=? AND role=?)
+   INSERT INTO release_parties (ocid,party_id,role) VALUES (?,?,?)"""
+
+SQL_UPSERT_BID = """IF EXISTS (SELECT 1 FROM bids WHERE party_id=? AND ocid=?)
+       UPDATE bids
+       SET admissible=?, conform=?, value=?, value_unit=?
+       WHERE party_id=? AND ocid=?
+   ELSE
+       INSERT INTO bids
+       (party_id,ocid,related_lot,admissible,conform,value,value_unit)
+       VALUES (?,?,NULL,?,?,?,?)"""
+
+# awards and suppliers_awards are not keyed by ocid, so two parallel workers
+# can write the same key: the existence checks take a key-range lock. Workers
+# commit every AVIS_BATCH_SIZE avis, so these locks are short-lived, and a
+# worker chosen as a deadlock victim redoes its last batch (see migrate_range).
+SQL_INSERT_AWARD = """
+IF NOT EXISTS (SELECT 1 FROM awards WITH (UPDLOCK, HOLDLOCK) WHERE award_id = ?)
+BEGIN
+    INSERT INTO awards
+    (award_id, ocid, status, date, value_amount, value_currency, value_total_amount)
+    VALUES (?, ?, 'active', GETDATE(), ?, 'CAD', ?)
+END
+"""
+
+SQL_INSERT_SUPPLIER_AWARD = """
+IF NOT EXISTS (SELECT 1
+               FROM suppliers_awards WITH (UPDLOCK, HOLDLOCK)
+               WHERE award_id = ? AND supplier_id = ?)
+BEGIN
+    INSERT INTO suppliers_awards
+    (award_id, supplier_id, supplier_ocid)
+    VALUES (?, ?, ?)
+END
+"""
+
+class PartyCache:
+    """
+    name key -> (party_id, address) of the parties already in the target, for
+    the whole migration. A name is looked up in 'parties' once (through the
+    temp table #party_names and the indexed parties.name_hash); after that,
+    repeated organisations cost nothing, and a party is only updated when its
+    address or details changed.
+
+    The cache can be saved and reloaded (save() / load()) to skip the lookups
+    on the next run; only do it if nothing else writes 'parties' in between.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path):
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls({key: (party_id, tuple(attrs)) for key, (party_id, attrs) in data.items()})
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({key: [party_id, list(attrs)] for key, (party_id, attrs) in self.entries.items()},
+                      f, ensure_ascii=False)
+
+    def _lookup(self, cursor, names):
+        cursor.execute(SQL_PARTY_NAMES_RESET)
+        ExecutemanyBackend(cursor).execute(
+            "INSERT INTO #party_names (name) VALUES (?)", [(n,) for n in names]
+        )
+        cursor.execute(SQL_SELECT_PARTIES_BY_NAME)
+        for name, party_id, *attrs in cursor.fetchall():
+            self.entries.setdefault(name.casefold(), (party_id, tuple(attrs)))
+
+    def resolve(self, cursor, parties):
+        """
+        Returns {name key: party_id} for `parties` ({name key: [party_id, name,
+        street, locality, region, postal, country, details]}). Names already in
+        'parties' keep their party_id and get the new address; the others are
+        inserted.
+        """
+        unknown = [party[1] for key, party in parties.items() if key not in self.entries]
+        if unknown:
+            self._lookup(cursor, unknown)
+
+        resolved, updates, inserts = {}, [], []
+        for key, (party_id, name, *attrs) in parties.items():
+            attrs = tuple(attrs)
+            cached = self.entries.get(key)
+            if cached is None:
+                inserts.append((party_id, name, *attrs))
+            else:
+                party_id = cached[0]
+                if cached[1] != attrs:
+                    updates.append((*attrs, party_id))
+            self.entries[key] = (party_id, attrs)
+            resolved[key] = party_id
+        if updates:
+            ExecutemanyBackend(cursor).execute(SQL_UPDATE_PARTY, updates)
+        if inserts:
+            ExecutemanyBackend(cursor).execute(SQL_INSERT_PARTY, inserts)
+        return resolved
+
+class AvisBatch:
+    """
+    Rows of up to AVIS_BATCH_SIZE avis, written by flush() with one
+    executemany per table (bulk_writer.ExecutemanyBackend, fast_executemany).
+    awards=False leaves out awards / suppliers_awards.
+
+    Parties are deduplicated by name the way upsert_party did it (the first
+    party_id seen for a name is kept, the latest address wins); the other
+    rows refer to a party by its name key until flush() resolves it through
+    the PartyCache.
+    """
+
+    def __init__(self, awards=True):
+        self.with_awards = awards
+        self.avis_count = 0
+        self.parties = {}          # name key -> [party_id, name, street, ..., details]
+        self.releases = []         # (ocid, values, buyer key)
+        self.release_parties = {}  # (ocid, name key, role) -> None, in order
+        self.bids = {}             # (name key, ocid) -> (admissible, conform, value, unit)
+        self.awards = {}           # award_id -> (ocid, amount, total amount), first one wins
+        self.suppliers_awards = {} # (award_id, name key) -> ocid
+
+    def add_party(self, party_id, name, street, locality, region, postal, country, details):
+        key = name.casefold()
+        party = self.parties.get(key)
+        if party is None:
+            self.parties[key] = [party_id, name, street, locality, region, postal, country, details]
+        else:
+            party[2:] = [street, locality, region, postal, country, details]
+        return key
+
+    def flush(self, cursor, party_cache):
+        """Writes the batch; returns the number of avis written."""
+        if not self.avis_count:
+            return 0
+        party_ids = party_cache.resolve(cursor, self.parties)
+        backend = ExecutemanyBackend(cursor)
+
+        release_params = []
+        for ocid, values, buyer_key in self.releases:
+            (release_id, date_val, title, method, method_details, main_cat, addl_cat,
+             start_date, end_date, tenderers, documents, item_id, category, unspsc,
+             disposition) = values
+            buyer_id = party_ids[buyer_key]
+            release_params.append((
+                ocid,
+                release_id, date_val, release_id, title, method, method_details,
+                main_cat, addl_cat, buyer_id, start_date, end_date, tenderers, documents,
+                item_id, category, unspsc, disposition, item_id, category,
+                ocid,
+
+                ocid, release_id, date_val, release_id, title, method, method_details,
+                main_cat, addl_cat, buyer_id, start_date, end_date, tenderers, documents,
+                item_id, category, unspsc, disposition, item_id, category,
+            ))
+        backend.execute(SQL_UPSERT_RELEASE, release_params)
+
+        release_party_params = []
+        for ocid, key, role in self.release_parties:
+            party_id = party_ids[key]
+            release_party_params.append((ocid, party_id, role, ocid, party_id, role))
+        if release_party_params:
+            backend.execute(SQL_INSERT_RELEASE_PARTY, release_party_params)
+
+        bid_params = []
+        for (key, ocid), (admissible, conform, value, unit) in self.bids.items():
+            party_id = party_ids[key]
+            bid_params.append((
+                party_id, ocid, admissible, conform, value, unit,
+                party_id, ocid, party_id, ocid, admissible, conform, value, unit
+            ))
+        if bid_params:
+            backend.execute(SQL_UPSERT_BID, bid_params)
+
+        if self.awards:
+            backend.execute(SQL_INSERT_AWARD, [
+                (award_id, award_id, ocid, amount, total_amount)
+                for award_id, (ocid, amount, total_amount) in self.awards.items()
+            ])
+            backend.execute(SQL_INSERT_SUPPLIER_AWARD, [
+                (award_id, party_ids[key], award_id, party_ids[key], ocid)
+                for (award_id, key), ocid in self.suppliers_awards.items()
+            ])
+        return self.avis_count
+
+# ---------------------------------------------------------------------------
+# Cleanup history tables 
+# ---------------------------------------------------------------------------
+# Legacy path (skip_history=False): the history rows written by the load's
+# own upserts are deleted afterwards.
+def cleanup_history_tables(cursor):
+    history_tables = [
+        "bids_history",
+        "contract_transactions_history",
+        "contracts_history",
+        "parties_history",
+        "release_parties_history",
+        "releases_history"
+    ]
+    for tbl in history_tables:
+        logging.info(f"Deleting all data from {tbl} …")
+        cursor.execute(f"DELETE FROM {tbl}")
+
+# ---------------------------------------------------------------------------
+# Incremental runs
+# ---------------------------------------------------------------------------
+# Source tables an avis' release depends on, with the column the XML loader
+# stamps (imported_at on writes, archived_at when it moves a row to history)
+WATERMARK_COLUMNS = {
+    "avis":                 "imported_at",
+    "avis_history":         "archived_at",
+    "avis_fournisseurs":    "imported_at",
+    "fournisseurs":         "imported_at",
+    "fournisseurs_history": "archived_at",
+    "contrats":             "imported_at",
+    "contrats_history":     "archived_at",
+    "depenses":             "imported_at",
+    "depenses_history":     "archived_at",
+}
+
+# Latest avis of the supplier x: a supplier change is a party update, and the
+# party (latest address wins) is rewritten by migrating that one avis. The XML
+# loader re-stamps every supplier of every file it imports, so fanning out to
+# all the avis of a supplier would re-migrate most of the history every week.
+LATEST_SUPPLIER_AVIS = (
+    "SELECT l.numeroseao FROM {table} x CROSS APPLY ("
+    "SELECT TOP 1 af.numeroseao FROM avis_fournisseurs af "
+    "JOIN avis a ON a.numeroseao = af.numeroseao WHERE af.neq = x.neq "
+    "ORDER BY a.datepublication DESC, af.numeroseao DESC) l WHERE {{window}}"
+)
+
+# numeroseao touched by the new rows of each table; the table is aliased x
+CHANGED_AVIS_QUERIES = {
+    "avis":                 "SELECT x.numeroseao FROM avis x WHERE {window}",
+    "avis_history":         "SELECT x.numeroseao FROM avis_history x WHERE {window}",
+    "avis_fournisseurs":    "SELECT x.numeroseao FROM avis_fournisseurs x WHERE {window}",
+    "fournisseurs":         LATEST_SUPPLIER_AVIS.format(table="fournisseurs"),
+    "fournisseurs_history": LATEST_SUPPLIER_AVIS.format(table="fournisseurs_history"),
+    "contrats":             "SELECT x.numeroseao FROM contrats x WHERE {window}",
+    "contrats_history":     "SELECT x.numeroseao FROM contrats_history x WHERE {window}",
+    "depenses":             "SELECT x.numeroseao FROM depenses x WHERE {window}",
+    "depenses_history":     "SELECT x.numeroseao FROM depenses_history x WHERE {window}",
+}
+
+SQL_CHANGED_AVIS_RESET = """
+IF OBJECT_ID('tempdb..#changed_avis') IS NULL
+    CREATE TABLE #changed_avis (
+        numeroseao NVARCHAR(50) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY
+    );
+ELSE
+    TRUNCATE TABLE #changed_avis;
+"""
+
+# added to the WHERE clause of the scans on incremental runs
+CHANGED_AVIS_FILTER = " AND {alias}.numeroseao IN (SELECT numeroseao FROM #changed_avis)"
+
+def avis_scope(alias, changed_only=False, key_range=None, after=None):
+    """
+    WHERE clause suffix (and its parameters) restricting a scan to the changed
+    avis and / or to a numeroseao range [lo, hi) (None: unbounded), and / or
+    to the numeroseao past `after` (a checkpoint's last key).
+    """
+    sql = CHANGED_AVIS_FILTER.format(alias=alias) if changed_only else ""
+    params = []
+    if after is not None:
+        sql += f" AND {alias}.numeroseao > ?"
+        params.append(after)
+    lo, hi = key_range or (None, None)
+    if lo is not None:
+        sql += f" AND {alias}.numeroseao >= ?"
+        params.append(lo)
+    if hi is not None:
+        sql += f" AND {alias}.numeroseao < ?"
+        params.append(hi)
+    return sql, tuple(params)
+
+def load_changed_avis(source, marks, current):
+    """
+    Fills the source temp table #changed_avis with the numeroseao of every avis
+    whose rows, suppliers, contracts or depenses were written or archived
+    between the previous run's marks and `current` (for a changed supplier,
+    only its latest avis). Returns their number.
+    """
+    parts, params = [], []
+    for table, sql in CHANGED_AVIS_QUERIES.items():
+        predicate, window_params = window(
+            "x." + WATERMARK_COLUMNS[table], marks.since(table), current[table]
+        )
+        parts.append(sql.format(window=predicate))
+        params.extend(window_params)
+
+    source.execute(SQL_CHANGED_AVIS_RESET)
+    source.execute(
+        "INSERT INTO #changed_avis (numeroseao)\n"
+        "SELECT numeroseao FROM (\n" + "\nUNION\n".join(parts) + "\n) u\n"
+        "WHERE numeroseao IS NOT NULL",
+        tuple(params)
+    )
+    return next(iter(source.rows("SELECT COUNT(*) FROM #changed_avis")))[0]
+
+# ---------------------------------------------------------------------------
+# avis -> release rows
+# ---------------------------------------------------------------------------
+def add_avis(batch, rows):
+    """
+    Adds one avis to `batch`. `rows` are its rows from transform_avis' query:
+    the avis columns, then one supplier per row (f_neq is NULL if it has none).
+    """
+    row = rows[0]
+    ocid       = "ocds-ec9k95-" + safe_str(row.numeroseao)
+    release_id = safe_str(row.numero)
+    date_val   = format_date(row.datepublication)
+
+    # Buyer party --------------------------------------------------------
+    buyer_key = batch.add_party(
+        "OP-" + safe_str(row.numeroseao),
+        safe_str(row.organisme),
+        safe_str(row.adresse1) + " " + safe_str(row.adresse2),
+        safe_str(row.ville),
+        safe_str(row.province),
+        safe_str(row.codepostal),
+        safe_str(row.pays),
+        '{"Municipal": "' + ("1" if row.municipal else "0") + '"}'
+    )
+    batch.release_parties[(ocid, buyer_key, "buyer")] = None
+
+    # Suppliers ----------------------------------------------------------
+    supplier_count = 0
+    for s in rows:
+        if s.f_neq is None:
+            continue
+        supplier_id = "FO-" + safe_str(s.f_neq) if safe_str(s.f_neq) else "FO-MISSING"
+        supplier_key = batch.add_party(
+            supplier_id,
+            safe_str(s.f_nomorganisation),
+            safe_str(s.f_adresse1) + " " + safe_str(s.f_adresse2),
+            safe_str(s.f_ville),
+            safe_str(s.f_province),
+            safe_str(s.f_codepostal),
+            safe_str(s.f_pays),
+            '{"NEQ": "' + safe_str(s.f_neq) + '"}'
+        )
+
+        role = "supplier" if s.adjudicataire else "tenderer"
+        batch.release_parties[(ocid, supplier_key, role)] = None
+        batch.bids[(supplier_key, ocid)] = (
+            1 if s.admissible else 0,
+            1 if s.conforme else 0,
+            float(s.montantsoumis or 0),
+            safe_str(s.montantssoumisunite) or "CAD",
+        )
+
+        # award for winners -----------------------------
+        if s.adjudicataire and batch.with_awards:
+            batch.awards.setdefault(release_id, (
+                ocid, float(s.montantcontrat or 0), float(s.montanttotalcontrat or 0)
+            ))
+            batch.suppliers_awards.setdefault((release_id, supplier_key), ocid)
+
+        supplier_count += 1
+
+    # Release ------------------------------------------------------------
+    typed_type      = safe_int(row.type)
+    typed_precision = safe_int(row.precision)
+    typed_nature    = safe_int(row.nature)
+    item_id         = get_first_something(safe_str(row.categorieseao))
+
+    batch.releases.append((ocid, (
+        release_id,
+        date_val,
+        safe_str(row.titre),
+        map_tender_procurement_method(typed_type),
+        map_tender_procurement_method_details(typed_type),
+        map_main_procurement_category(typed_precision),
+        ",".join(map_additional_procurement_categories(typed_nature)),
+        date_val,
+        format_date(row.datefermeture),
+        supplier_count,
+        safe_str(row.hyperlienseao),
+        item_id,
+        safe_str(row.categorieseao),
+        safe_str(row.unspscprincipale),
+        safe_str(row.disposition),
+    ), buyer_key))
+    batch.avis_count += 1
+
+
+# ---------------------------------------------------------------------------
+# Profiles
+# ---------------------------------------------------------------------------
+# name           : also the key of the profile's watermarks in the target
+# target         : connection string of the target database
+# avis_filter    : predicate on avis a
+# contrat_filter : predicate on contrats c
+# depense_filter : predicate on depenses d
+# awards         : write awards / suppliers_awards for the winning suppliers
+# stub_releases  : give contrats and depenses whose avis is not migrated a
+#                  minimal release (tag 'contrat' / 'depense')
+Profile = namedtuple('Profile', (
+    'name', 'target', 'avis_filter', 'contrat_filter', 'depense_filter',
+    'awards', 'stub_releases',
+), defaults=(True, False))
+
+SOURCE_CONN_STR = (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=DESKTOP-91AK8MU\\SQLEXPRESS;"
+    "DATABASE=XMLData;"
+    "Trusted_Connection=yes;"
+)
+
+def target_conn_str(database):
+    return (
+        "DRIVER={ODBC Driver 17 for SQL Server};"
+        "SERVER=DESKTOP-91AK8MU\\SQLEXPRESS;"
+        f"DATABASE={database};"
+        "Trusted_Connection=yes;"
+    )
+
+# avis of a named category set of XMLData: category_sets holds the category
+# ids of each set (declared in CATEGORY_SETS, shared/categories.py), and
+# avis.category_id is indexed, so the filter is a
+# seek on integer keys instead of a comparison of the category descriptions.
+IN_CATEGORY_SET = ("a.category_id IN (SELECT cs.category_id FROM category_sets cs "
+                   "WHERE cs.set_name = N'{name}')")
+CONSTRUCTION_CATEGORIES = IN_CATEGORY_SET.format(name='construction')
+
+HAS_CONTRAT = "EXISTS (SELECT 1 FROM contrats c2 WHERE c2.numeroseao = {alias}.numeroseao)"
+HAS_DEPENSE = "EXISTS (SELECT 1 FROM depenses d2 WHERE d2.numeroseao = {alias}.numeroseao)"
+HAS_AVIS = "EXISTS (SELECT 1 FROM avis a WHERE a.numeroseao = {alias}.numeroseao)"
+HAS_CONSTRUCTION_AVIS = ("EXISTS (SELECT 1 FROM avis a WHERE a.numeroseao = {alias}.numeroseao AND "
+                         + CONSTRUCTION_CATEGORIES + ")")
+
+# construction avis with at least one contract; their contrats, and their
+# depenses
+_CONSTRUCTION = dict(
+    avis_filter=f"{CONSTRUCTION_CATEGORIES} AND {HAS_CONTRAT.format(alias='a')}",
+    contrat_filter=HAS_CONSTRUCTION_AVIS.format(alias='c'),
+    depense_filter=(
+        "EXISTS (SELECT 1 FROM avis a WHERE a.numeroseao = d.numeroseao AND "
+        f"{CONSTRUCTION_CATEGORIES} AND {HAS_CONTRAT.format(alias='a')})"
+    ),
+)
+
+PROFILES = {p.name: p for p in (
+    Profile(name="construction", target=target_conn_str("ConstructionDB"), **_CONSTRUCTION),
+    Profile(name="construction_no_awards", target=target_conn_str("ConstructionData"),
+            awards=False, **_CONSTRUCTION),
+    # construction avis with a contract or a depense; the contrats and depenses
+    # of a construction avis or of a numeroseao that has the other one
+    Profile(
+        name="construction_contract_or_depense",
+        target=target_conn_str("jsontest"),
+        avis_filter=(f"{CONSTRUCTION_CATEGORIES} AND "
+                     f"({HAS_CONTRAT.format(alias='a')} OR {HAS_DEPENSE.format(alias='a')})"),
+        contrat_filter=f"{HAS_CONSTRUCTION_AVIS.format(alias='c')} OR {HAS_DEPENSE.format(alias='c')}",
+        depense_filter=f"{HAS_CONSTRUCTION_AVIS.format(alias='d')} OR {HAS_CONTRAT.format(alias='d')}",
+        awards=False,
+        stub_releases=True,
+    ),
+    # any avis, contrat or depense that has one of the other two
+    Profile(
+        name="related_only",
+        target=target_conn_str("fullContracts"),
+        avis_filter=f"{HAS_CONTRAT.format(alias='a')} OR {HAS_DEPENSE.format(alias='a')}",
+        contrat_filter=f"{HAS_AVIS.format(alias='c')} OR {HAS_DEPENSE.format(alias='c')}",
+        depense_filter=f"{HAS_AVIS.format(alias='d')} OR {HAS_CONTRAT.format(alias='d')}",
+        awards=False,
+        stub_releases=True,
+    ),
+    # everything (same database as related_only, like the scripts they replace,
+    # so the two cannot run together: see shared_targets)
+    Profile(
+        name="all_data",
+        target=target_conn_str("fullContracts"),
+        avis_filter="1 = 1",
+        contrat_filter="1 = 1",
+        depense_filter="1 = 1",
+        awards=False,
+        stub_releases=True,
+    ),
+)}
+
+def shared_targets(profiles):
+    """
+    {target: [profile names]} for the targets of more than one of `profiles`.
+    Each profile writes through its own uncommitted transaction, so two of
+    them on one database would wait on each other's row locks forever.
+    """
+    names = {}
+    for profile in profiles:
+        names.setdefault(profile.target, []).append(profile.name)
+    return {target: n for target, n in names.items() if len(n) > 1}
+
+def profile_flags(filters):
+    """One 0/1 column per filter (p0, p1, ...), for the SELECT list of a scan."""
+    return "".join(
+        f",\n           CASE WHEN {f} THEN 1 ELSE 0 END AS p{i}"
+        for i, f in enumerate(filters)
+    )
+
+def any_profile(filters):
+    return " OR ".join(f"({f})" for f in filters)
+
+def wanted_by(targets, row):
+    """The targets whose flag is set in `row`."""
+    return [t for i, t in enumerate(targets) if getattr(row, f"p{i}")]
+
+class Target:
+    """
+    A profile's target database during a run: its connection, its party cache
+    and the avis batch being filled.
+    """
+
+    def __init__(self, profile, skip_history=True, party_cache=None):
+        self.profile = profile
+        self.conn = pyodbc.connect(profile.target)
+        self.cursor = self.conn.cursor()
+        if skip_history:
+            set_skip_history(self.cursor)
+        self.party_cache = party_cache if party_cache is not None else PartyCache()
+        self.batch = AvisBatch(profile.awards)
+        self.written = 0
+
+    def add_avis(self, rows):
+        add_avis(self.batch, rows)
+        if self.batch.avis_count >= AVIS_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.written += self.batch.flush(self.cursor, self.party_cache)
+        self.batch = AvisBatch(self.profile.awards)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+class Checkpointer:
+    """
+    Periodic commits of a run. The scans report each numeroseao before
+    writing its rows; every `every` rows, at the next numeroseao, the targets
+    write what they hold and commit it with a checkpoint (see checkpoints.py).
+    `full` and `marks` are the run's, recorded for a resumed run; a parallel
+    worker passes its `key_range`, which has checkpoints of its own.
+    """
+
+    def __init__(self, targets, full, marks, every=CHECKPOINT_EVERY, key_range=None):
+        self.targets = targets
+        self.full = full
+        self.marks = marks
+        self.every = every
+        self.key_range = key_range
+        self.pending = 0
+        self.last_key = None
+
+    def reached(self, stage, key):
+        if key != self.last_key:
+            if self.pending >= self.every:
+                self.commit(stage, self.last_key)
+            self.last_key = key
+        self.pending += 1
+
+    def commit(self, stage, last_key):
+        for target in self.targets:
+            target.flush()
+            save_checkpoint(target.cursor, target.profile.name,
+                            Checkpoint(stage, last_key, self.full, self.marks), self.key_range)
+            target.commit()
+        self.pending = 0
+        logging.info(f"[{stage_name(stage, self.key_range)}] checkpoint after numeroseao {last_key}")
+
+    def finish(self, stage):
+        """Commits the end of `stage`; a resumed run starts at the next one."""
+        following = STAGES.index(stage) + 1
+        if following < len(STAGES):
+            self.commit(STAGES[following], None)
+        else:
+            self.commit(stage, self.last_key)
+        self.last_key = None
+
+# ---------------------------------------------------------------------------
+# Scans (one query per source table, for every target)
+# ---------------------------------------------------------------------------
+def avis_rows(source, profiles, changed_only=False, key_range=None, after=None):
+    """
+    Streams the avis wanted by at least one profile, with their suppliers (one
+    row per supplier, f_neq is NULL if it has none) and a flag per profile,
+    ordered by numeroseao. Yields the rows of one avis at a time.
+    """
+    filters = [p.avis_filter for p in profiles]
+    scope, params = avis_scope('a', changed_only, key_range, after)
+    sql_avis = f"""
+    WITH a AS (
+        SELECT a.numeroseao, a.numero, a.organisme, a.municipal, a.adresse1, a.adresse2, a.ville, a.province, a.pays, a.codepostal,
+               a.titre, a.datepublication, a.datefermeture, a.hyperlienseao, a.unspscprincipale, a.disposition, a.categorieseao,
+               a.type, a.precision, a.nature{profile_flags(filters)}
+        FROM avis a
+        WHERE ({any_profile(filters)}){scope}
+    )
+    SELECT a.*,
+           af.adjudicataire, af.admissible, af.conforme, af.montantsoumis,
+           af.montantssoumisunite, af.montantcontrat, af.montanttotalcontrat,
+           f.neq AS f_neq, f.nomorganisation AS f_nomorganisation, f.adresse1 AS f_adresse1,
+           f.adresse2 AS f_adresse2, f.ville AS f_ville, f.province AS f_province,
+           f.pays AS f_pays, f.codepostal AS f_codepostal
+    FROM a
+    LEFT JOIN (avis_fournisseurs af
+               JOIN fournisseurs f ON af.neq = f.neq)
+           ON af.numeroseao = a.numeroseao
+    ORDER BY a.numeroseao
+    """
+    for _, rows in groupby(source.rows(sql_avis, params), key=attrgetter('numeroseao')):
+        yield list(rows)
+
+def count_avis(source, profiles, changed_only=False, key_range=None, after=None):
+    """Number of avis avis_rows() will yield (the total of the avis progress)."""
+    filters = [p.avis_filter for p in profiles]
+    scope, params = avis_scope('a', changed_only, key_range, after)
+    sql_count = f"""
+    SELECT COUNT(*) FROM avis a
+    WHERE ({any_profile(filters)}){scope}
+    """
+    return next(iter(source.rows(sql_count, params)))[0]
+
+def range_label(key_range):
+    return f"[{key_range[0] or ''} .. {key_range[1] or ''}]"
+
+def stage_name(stage, key_range=None):
+    return stage if key_range is None else f"{stage} {range_label(key_range)}"
+
+def transform_avis(source, targets, changed_only=False, key_range=None, after=None,
+                   checkpointer=None):
+    """
+    Loads avis + suppliers + bids (and awards / suppliers_awards for the
+    winning suppliers, if the profile has awards) into every target.
+
+    One query (avis_rows) returns the avis of all the targets, ordered by
+    numeroseao; it is streamed from `source` (a SourceReader) and each avis is
+    added to the batch of the targets that want it. A target writes its batch
+    every AVIS_BATCH_SIZE avis (see AvisBatch). With `changed_only`, only the
+    avis in #changed_avis are read (see load_changed_avis); with `key_range`,
+    only those with a numeroseao in that range; with `after`, only those past
+    it. A `checkpointer` commits the targets as the scan goes.
+    Returns the stage's Progress.
+    """
+    profiles = [t.profile for t in targets]
+    for target in targets:
+        target.written = 0
+    progress = Progress(stage_name('avis', key_range),
+                        total=count_avis(source, profiles, changed_only, key_range, after),
+                        unit='avis')
+    for rows in avis_rows(source, profiles, changed_only, key_range, after):
+        if checkpointer is not None:
+            checkpointer.reached('avis', rows[0].numeroseao)
+        for target in wanted_by(targets, rows[0]):
+            target.add_avis(rows)
+        progress.advance()
+    for target in targets:
+        target.flush()
+        logging.info(f"[{target.profile.name}] Loaded {target.written} avis rows")
+    return progress.done()
+
+SQL_STUB_RELEASE = """
+IF NOT EXISTS (SELECT 1 FROM releases WHERE ocid = ?)
+    INSERT INTO releases (ocid, release_id, tag, initiation_type, language)
+    VALUES (?, ?, ?, 'tender', 'fr')
+"""
+
+# contracts are not keyed by ocid, so two parallel workers can write the same
+# contract: the existence check takes a key-range lock (held until the worker's
+# next checkpoint, see SQL_INSERT_AWARD)
+SQL_UPSERT_CONTRACT = """
+IF EXISTS (SELECT 1 FROM contracts WITH (UPDLOCK, HOLDLOCK) WHERE contract_id = ?)
+BEGIN
+    UPDATE contracts
+    SET ocid = ?, status = ?, period_end_date = ?, value_amount = ?, date_signed = ?
+    WHERE contract_id = ?
+END
+ELSE
+BEGIN
+    INSERT INTO contracts
+    (contract_id, ocid, status, period_end_date, value_amount, date_signed)
+    VALUES (?, ?, ?, ?, ?, ?)
+END
+"""
+
+SQL_UPSERT_TRANSACTION = """
+IF EXISTS (SELECT 1 FROM contract_transactions WHERE ocid = ? AND transaction_id = ?)
+BEGIN
+    UPDATE contract_transactions
+    SET contract_id = NULL, source = ?, date = ?, value_amount = ?, value_currency = 'CAD'
+    WHERE ocid = ? AND transaction_id = ?
+END
+ELSE
+BEGIN
+    INSERT INTO contract_transactions
+    (ocid, transaction_id, contract_id, source, date, value_amount, value_currency)
+    VALUES (?, ?, NULL, ?, ?, ?, 'CAD')
+END
+"""
+
+def transform_contrats(source, targets, changed_only=False, key_range=None, after=None,
+                       checkpointer=None):
+    filters = [t.profile.contrat_filter for t in targets]
+    scope, params = avis_scope('c', changed_only, key_range, after)
+    sql_contrats = f"""
+    SELECT c.numeroseao, c.numero, c.datefinale, c.datepublicationfinale, c.montantfinal{profile_flags(filters)}
+    FROM contrats c
+    WHERE ({any_profile(filters)}){scope}
+    ORDER BY c.numeroseao
+    """
+    counts = [0] * len(targets)
+    progress = Progress(stage_name('contrats', key_range))
+    for r in source.rows(sql_contrats, params):
+        if checkpointer is not None:
+            checkpointer.reached('contrats', r.numeroseao)
+        ocid = "ocds-ec9k95-" + safe_str(r.numeroseao)
+        contract_id = safe_str(r.numero)
+        period_end_date = format_date(r.datepublicationfinale)
+        date_signed = format_date(r.datefinale or r.datepublicationfinale)
+        status = "active" if not r.datepublicationfinale else "terminated"
+        amount = float(r.montantfinal or 0)
+
+        for i, target in enumerate(targets):
+            if not getattr(r, f"p{i}"):
+                continue
+            if target.profile.stub_releases:
+                target.cursor.execute(SQL_STUB_RELEASE, (ocid, ocid, ocid, 'contrat'))
+            target.cursor.execute(
+                SQL_UPSERT_CONTRACT,
+                (contract_id, ocid, status, period_end_date, amount, date_signed,
+                 contract_id, contract_id, ocid, status, period_end_date, amount, date_signed)
+            )
+            counts[i] += 1
+        progress.advance()
+
+    for target, count in zip(targets, counts):
+        logging.info(f"[{target.profile.name}] Loaded {count} contrats rows")
+    return progress.done()
+
+def transform_depenses(source, targets, changed_only=False, key_range=None, after=None,
+                       checkpointer=None):
+    filters = [t.profile.depense_filter for t in targets]
+    scope, params = avis_scope('d', changed_only, key_range, after)
+    sql_dep = f"""
+    SELECT d.depense_id, d.numeroseao, d.datedepense, d.montantdepense, d.description{profile_flags(filters)}
+    FROM depenses d
+    WHERE ({any_profile(filters)}){scope}
+    ORDER BY d.numeroseao
+    """
+    counts = [0] * len(targets)
+    progress = Progress(stage_name('depenses', key_range))
+    for r in source.rows(sql_dep, params):
+        if checkpointer is not None:
+            checkpointer.reached('depenses', r.numeroseao)
+        ocid = "ocds-ec9k95-" + safe_str(r.numeroseao)
+        txn_id = "txn-" + safe_str(r.depense_id)
+        txn_date = format_date(r.datedepense)
+        amount = float(r.montantdepense or 0)
+        source_desc = safe_str(r.description)
+
+        for i, target in enumerate(targets):
+            if not getattr(r, f"p{i}"):
+                continue
+            if target.profile.stub_releases:
+                target.cursor.execute(SQL_STUB_RELEASE, (ocid, ocid, ocid, 'depense'))
+            target.cursor.execute(
+                SQL_UPSERT_TRANSACTION,
+                (ocid, txn_id, source_desc, txn_date, amount, ocid, txn_id,
+                 ocid, txn_id, source_desc, txn_date, amount)
+            )
+            counts[i] += 1
+        progress.advance()
+
+    for target, count in zip(targets, counts):
+        logging.info(f"[{target.profile.name}] Loaded {count} depenses rows")
+    return progress.done()
+
+STAGE_TRANSFORMS = (
+    ('avis', "transform_avis (+awards)", transform_avis),
+    ('contrats', "transform_contrats", transform_contrats),
+    ('depenses', "transform_depenses", transform_depenses),
+)
+
+def run_stages(source, targets, changed_only, checkpointer, checkpoint=None, key_range=None):
+    """
+    Runs the stages of STAGE_TRANSFORMS (those of `key_range`), from
+    `checkpoint` if a failed run left one, committing through `checkpointer`.
+    Returns the Progress of each stage run.
+    """
+    stages = []
+    for stage, stage_label, transform in STAGE_TRANSFORMS:
+        label = stage_name(stage_label, key_range)
+        if checkpoint is not None and checkpoint.skips(stage):
+            logging.info(f"{label}: done by the interrupted run")
+            continue
+        logging.info(f"{label} …")
+        after = checkpoint.after(stage) if checkpoint is not None else None
+        stages.append(transform(source, targets, changed_only, key_range, after, checkpointer))
+        checkpointer.finish(stage)
+    return stages
+
+# ---------------------------------------------------------------------------
+# Parallel mode (migrate(workers=N))
+# ---------------------------------------------------------------------------
+# Each worker migrates one numeroseao range into every target, with its own
+# source and target connections, committing every AVIS_BATCH_SIZE rows with a
+# checkpoint of its range. Workers are threads: the time goes into the database
+# round trips, during which pyodbc releases the GIL. Parties are shared between
+# ranges, so they are resolved once, beforehand, by resolve_parties(); the
+# workers then only map names to party ids.
+
+# retries of a range whose worker is chosen as a deadlock victim
+DEADLOCK_RETRIES = 3
+
+class ResolvedParties(PartyCache):
+    """
+    PartyCache shared by the workers: the parties were resolved beforehand, so
+    names are only mapped to their party_id and nothing is written. A party
+    imported into the source after resolve_parties() read it is resolved on
+    the spot, one worker at a time, and committed before the other workers
+    can use its party_id: a worker waiting for the lock must not wait on the
+    row locks of the one holding it, which SQL Server could not see as a
+    deadlock. The commit also covers the worker's rows since its last
+    checkpoint; they are upserts, written again if the range is resumed.
+    """
+
+    def __init__(self, entries=None):
+        super().__init__(entries)
+        self.lock = threading.Lock()
+
+    def resolve(self, cursor, parties):
+        missing = {key: party for key, party in parties.items() if key not in self.entries}
+        if missing:
+            with self.lock:
+                super().resolve(cursor, missing)
+                cursor.connection.commit()
+        return {key: self.entries[key][0] for key in parties}
+
+
+def resolve_parties(source, targets, changed_only=False):
+    """
+    Shared resolution step: upserts the parties of every avis to migrate into
+    each target, in numeroseao order and AVIS_BATCH_SIZE avis at a time,
+    exactly as a serial transform_avis would. Returns the number of avis read.
+    """
+    profiles = [t.profile for t in targets]
+    batches = [AvisBatch() for _ in targets]
+    progress = Progress('parties', total=count_avis(source, profiles, changed_only), unit='avis')
+    for rows in avis_rows(source, profiles, changed_only):
+        for i, target in enumerate(targets):
+            if not getattr(rows[0], f"p{i}"):
+                continue
+            add_avis(batches[i], rows)
+            if batches[i].avis_count >= AVIS_BATCH_SIZE:
+                target.party_cache.resolve(target.cursor, batches[i].parties)
+                batches[i] = AvisBatch()
+        progress.advance()
+    for target, batch in zip(targets, batches):
+        if batch.avis_count:
+            target.party_cache.resolve(target.cursor, batch.parties)
+    return progress.done().count
+
+def avis_ranges(source, profiles, workers, changed_only=False):
+    """
+    Splits the numeroseao key space into `workers` ranges [lo, hi) holding
+    about the same number of avis to migrate. The first range has no lower
+    bound and the last no upper bound (None), so the contrats and depenses
+    without an avis are covered too.
+    """
+    filters = [p.avis_filter for p in profiles]
+    scope, params = avis_scope('a', changed_only)
+    sql_ranges = f"""
+    SELECT MIN(numeroseao) AS lo
+    FROM (
+        SELECT a.numeroseao, NTILE({int(workers)}) OVER (ORDER BY a.numeroseao) AS part
+        FROM avis a
+        WHERE ({any_profile(filters)}){scope}
+    ) t
+    GROUP BY part
+    ORDER BY part
+    """
+    bounds = [r.lo for r in source.rows(sql_ranges, params)][1:]
+    return list(zip([None] + bounds, bounds + [None]))
+
+def is_deadlock(error):
+    """True if `error` is SQL Server's 'chosen as deadlock victim' (SQLSTATE 40001)."""
+    return isinstance(error, pyodbc.Error) and bool(error.args) and error.args[0] == '40001'
+
+def migrate_range(key_range, profiles, parties, since, marks, skip_history, fetch_batch_size):
+    """
+    Worker: migrates the avis, contrats and depenses of one numeroseao range
+    into every target, from the range's checkpoint if it has one. `parties`
+    are the ResolvedParties of each profile; `since` is None on a full run,
+    else the Watermarks the changed avis are selected from; `marks` are the
+    run's current source marks. A deadlock victim is rolled back to its last
+    checkpoint and resumed from there, up to DEADLOCK_RETRIES times.
+    """
+    label = range_label(key_range)
+    changed_only = since is not None
+    for attempt in range(DEADLOCK_RETRIES + 1):
+        source = None
+        targets = []
+        try:
+            source = SourceReader(SOURCE_CONN_STR, batch_size=fetch_batch_size)
+            for profile, profile_parties in zip(profiles, parties):
+                targets.append(Target(profile, skip_history, profile_parties))
+            if changed_only:
+                load_changed_avis(source, since, marks)
+
+            checkpoint = earliest_checkpoint([load_checkpoint(t.cursor, t.profile.name, key_range)
+                                              for t in targets])
+            checkpointer = Checkpointer(targets, not changed_only, marks,
+                                        every=AVIS_BATCH_SIZE, key_range=key_range)
+            stages = run_stages(source, targets, changed_only, checkpointer, checkpoint, key_range)
+            log_summary(stages, f"{label} done")
+            return
+        except Exception as e:
+            for target in targets:
+                target.rollback()
+            if not is_deadlock(e) or attempt == DEADLOCK_RETRIES:
+                raise
+            logging.warning(f"{label} chosen as deadlock victim, resuming from its last checkpoint")
+        finally:
+            if source is not None:
+                source.close()
+            for target in targets:
+                target.close()
+
+def migrate_parallel(source, targets, workers, since, marks, skip_history, fetch_batch_size,
+                     checkpoints=None):
+    """
+    Resolves the parties, then runs migrate_range() on `workers` ranges at
+    once. `checkpoints` ({(lo, hi): checkpoint}, see
+    checkpoints.earliest_range_checkpoints) are the ranges of an interrupted
+    parallel run to resume; without them the checkpoints of the targets are
+    cleared and the key space is split anew.
+    """
+    changed_only = since is not None
+    profiles = [t.profile for t in targets]
+    logging.info("Resolving parties …")
+    count = resolve_parties(source, targets, changed_only)
+    if not checkpoints:
+        for target in targets:
+            clear_checkpoint(target.cursor, target.profile.name)
+    for target in targets:
+        target.commit()
+    logging.info(f"Parties of {count} avis resolved")
+
+    ranges = list(checkpoints) if checkpoints else avis_ranges(source, profiles, workers, changed_only)
+    parties = [ResolvedParties(t.party_cache.entries) for t in targets]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(migrate_range, key_range, profiles, parties, since, marks,
+                        skip_history, fetch_batch_size)
+            for key_range in ranges
+        ]
+        failed = []
+        for key_range, future in zip(ranges, futures):
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Range {key_range} failed: {e}")
+                failed.append(key_range)
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(ranges)} ranges failed")
+
+# ---------------------------------------------------------------------------
+# MAIN MIGRATION
+# ---------------------------------------------------------------------------
+def party_cache_file(party_cache_dir, profile):
+    return os.path.join(party_cache_dir, f"{profile.name}.parties.json") if party_cache_dir else None
+
+def migrate(profiles, fetch_batch_size=FETCH_BATCH_SIZE, party_cache_dir=None, skip_history=True,
+            incremental=True, workers=1, resume=True):
+    """
+    Migrates XMLData into the target of each of `profiles`, reading the
+    source once for all of them.
+
+    Source rows are streamed fetch_batch_size at a time on a dedicated
+    XMLData connection (streaming.SourceReader), while the targets are written.
+    With `party_cache_dir`, each profile's party name cache is reloaded from
+    and saved to a file of that directory (see PartyCache).
+    With `skip_history` (default) the target sessions set the skip_history
+    flag, so the history triggers archive nothing during the load; history
+    written by earlier runs or by other sessions is kept.
+    With `incremental` (default), once every profile has recorded its
+    watermarks, only the avis with source rows written or archived since the
+    oldest of them are migrated (see load_changed_avis); each profile's
+    watermarks are saved after every successful run.
+    With `workers` > 1, the key space is split into that many numeroseao
+    ranges migrated in parallel (see migrate_parallel).
+    A serial run commits every CHECKPOINT_EVERY rows with a checkpoint, a
+    parallel one every AVIS_BATCH_SIZE rows with a checkpoint per range (see
+    Checkpointer). With `resume` (default), a run that finds the checkpoints
+    of a failed one continues from the least advanced of them, with the failed
+    run's mode and source marks (a parallel run on the ranges it had, with
+    `workers` threads); resume=False starts over.
+    Two profiles writing the same target database are refused (ValueError).
+    """
+    shared = shared_targets(profiles)
+    if shared:
+        raise ValueError("Profiles writing the same database cannot run together: " +
+                         "; ".join(", ".join(n) for n in shared.values()))
+    source = None
+    targets = []
+    try:
+        source = SourceReader(SOURCE_CONN_STR, batch_size=fetch_batch_size)
+        for profile in profiles:
+            target = Target(profile, skip_history,
+                            PartyCache.load(party_cache_file(party_cache_dir, profile)))
+            targets.append(target)
+            logging.info(f"[{profile.name}] Ensuring tables exist …")
+            create_tables(target.cursor)
+            target.commit()
+
+        marks = [Watermarks.load(t.cursor, t.profile.name) for t in targets]
+        checkpoint = None
+        range_checkpoints = {}
+        if resume:
+            checkpoint = earliest_checkpoint([load_checkpoint(t.cursor, t.profile.name)
+                                              for t in targets])
+            if checkpoint is None:
+                range_checkpoints = earliest_range_checkpoints(
+                    [load_range_checkpoints(t.cursor, t.profile.name) for t in targets]
+                )
+        if checkpoint is not None:
+            logging.info(f"Resuming the interrupted run at {checkpoint.stage}, "
+                         f"after numeroseao {checkpoint.last_key}")
+            current_marks = checkpoint.marks
+            changed_only = not checkpoint.full
+        elif range_checkpoints:
+            resumed = next(c for c in range_checkpoints.values() if c is not None)
+            logging.info(f"Resuming the {len(range_checkpoints)} ranges of the interrupted parallel run")
+            current_marks = resumed.marks
+            changed_only = not resumed.full
+        else:
+            current_marks = read_marks(source, WATERMARK_COLUMNS)
+            changed_only = incremental and all(m.complete(WATERMARK_COLUMNS) for m in marks)
+        since = None
+        if changed_only:
+            since = earliest(marks)
+            changed = load_changed_avis(source, since, current_marks)
+            logging.info(f"Incremental run: {changed} avis changed since the last run")
+        else:
+            logging.info("Full run: every avis wanted by a profile is migrated")
+
+        if range_checkpoints or (workers > 1 and checkpoint is None):
+            migrate_parallel(source, targets, max(workers, 1), since, current_marks,
+                             skip_history, fetch_batch_size, range_checkpoints)
+        else:
+            checkpointer = Checkpointer(targets, not changed_only, current_marks)
+            stages = run_stages(source, targets, changed_only, checkpointer, checkpoint)
+            log_summary(stages, "Stage summary")
+
+        for target, target_marks in zip(targets, marks):
+            if party_cache_dir:
+                target.party_cache.save(party_cache_file(party_cache_dir, target.profile))
+            if not skip_history:
+                logging.info(f"[{target.profile.name}] Cleaning history tables …")
+                cleanup_history_tables(target.cursor)
+                target.commit()
+            target_marks.save(target.cursor, current_marks)
+            clear_checkpoint(target.cursor, target.profile.name)
+            target.commit()
+
+        logging.info("Migration completed successfully.")
+        print("Migration completed successfully.")
+
+    except Exception as e:
+        logging.error(f"Migration failed: {e}")
+        print("Migration failed:", e)
+        for target in targets:
+            target.rollback()
+    finally:
+        if source is not None:
+            source.close()
+        for target in targets:
+            target.close()
+        logging.info("🔌 All connections closed.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XMLData -> OCDS tables, several profiles in one pass.")
+    parser.add_argument("profiles", nargs='+', choices=sorted(PROFILES), help="profiles to migrate")
+    parser.add_argument("--workers", type=int, default=1, help="parallel numeroseao ranges")
+    parser.add_argument("--full", action='store_true', help="ignore the watermarks, migrate everything")
+    parser.add_argument("--restart", action='store_true',
+                        help="ignore the checkpoints of an interrupted run, start over")
+    parser.add_argument("--keep-history", action='store_true',
+                        help="let the triggers archive the rows the load updates, then delete them (legacy)")
+    parser.add_argument("--fetch-batch-size", type=int, default=FETCH_BATCH_SIZE)
+    parser.add_argument("--party-cache-dir", help="directory of the party name caches")
+    args = parser.parse_args(argv)
+    profiles = [PROFILES[name] for name in dict.fromkeys(args.profiles)]
+    for names in shared_targets(profiles).values():
+        parser.error(f"profiles {', '.join(names)} write the same database, run them separately")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler("etl.log", mode='w', encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    migrate(
+        profiles,
+        fetch_batch_size=args.fetch_batch_size,
+        party_cache_dir=args.party_cache_dir,
+        skip_history=not args.keep_history,
+        incremental=not args.full,
+        workers=args.workers,
+        resume=not args.restart,
+    )
+
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
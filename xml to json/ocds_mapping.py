@@ -0,0 +1,234 @@
+"""
+ocds_mapping.py
+SEAO XML records -> OCDS release, following 'xml to json Prototype .json'.
+
+Used by stream_converter.py, which reads the Avis, Contrats and Depenses XML
+files directly instead of going through XMLData. The values are cleaned the
+way the XML loader stores them (shared/cleaning.py, as normalize.py does) and
+mapped with migration_engine.py's helpers, so a release carries the same
+values the migration would have written to ConstructionDB.
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+from migration_engine import (
+    get_first_something, map_additional_procurement_categories, map_main_procurement_category,
+    map_tender_procurement_method, map_tender_procurement_method_details, safe_int,
+)
+
+# categories.py and cleaning.py are shared with the loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from categories import in_category_set
+from cleaning import clean_date, clean_text
+
+OCID_PREFIX = "ocds-ec9k95-"
+
+# --------------------------------------------------------
+# Records read from the XML files (stripped text, as in the files)
+# --------------------------------------------------------
+Avis = namedtuple('Avis', (
+    'numeroseao', 'numero', 'organisme', 'municipal',
+    'adresse1', 'adresse2', 'ville', 'province', 'pays', 'codepostal',
+    'titre', 'type', 'nature', 'precision', 'categorieseao',
+    'datepublication', 'datefermeture',
+    'unspscprincipale', 'disposition', 'hyperlienseao',
+))
+# avis_fournisseurs link; the supplier itself comes from the latest Supplier of that neq
+Link = namedtuple('Link', (
+    'neq', 'admissible', 'conforme', 'adjudicataire',
+    'montantsoumis', 'montantssoumisunite', 'montantcontrat', 'montanttotalcontrat',
+))
+Supplier = namedtuple('Supplier', (
+    'nomorganisation', 'adresse1', 'adresse2', 'ville', 'province', 'pays', 'codepostal',
+))
+Contrat = namedtuple('Contrat', ('numero', 'datefinale', 'datepublicationfinale', 'montantfinal'))
+Depense = namedtuple('Depense', ('numero', 'datedepense', 'montantdepense', 'description'))
+
+# The construction set of categories.CATEGORY_SETS, which the migrations select
+# through avis.category_id.
+def is_construction(avis):
+    return in_category_set(avis.categorieseao, 'construction')
+
+# --------------------------------------------------------
+# Value cleaning: the XML loader's (shared/cleaning.py), except that empty
+# text stays '' in a release
+# --------------------------------------------------------
+def text(value):
+    return clean_text(value) or ''
+
+def iso_date(value):
+    """clean_date() as 'YYYY-MM-DDTHH:MM:SS', or None."""
+    clean = clean_date(value)
+    return clean.replace(' ', 'T') if clean else None
+
+def safe_float(val, default=0.0):
+    try:
+        return float(val) if val else default
+    except ValueError:
+        return default
+
+def bit(val):
+    """1 / 0 as the BIT columns end up for the migration ('1', or any non-zero number)."""
+    return 1 if val.isdigit() and int(val) != 0 else 0
+
+# --------------------------------------------------------
+# Release
+# --------------------------------------------------------
+def _address(rec):
+    return {
+        "streetAddress": text(rec.adresse1) + " " + text(rec.adresse2),
+        "locality":      text(rec.ville),
+        "region":        text(rec.province),
+        "countryName":   text(rec.pays),
+        "postalCode":    text(rec.codepostal),
+    }
+
+def build_release(avis, links, suppliers, contrats, depenses):
+    """
+    One OCDS release for an avis.
+
+    links     : the avis' Link records (from its latest version in the Avis files)
+    suppliers : neq -> latest Supplier
+    contrats  : latest Contrat of each contract numero
+    depenses  : (depense_id, Depense) pairs, in load order
+    """
+    numeroseao = avis.numeroseao
+    ocid       = OCID_PREFIX + numeroseao
+    release_id = text(avis.numero)
+    published  = iso_date(avis.datepublication)
+
+    buyer = {"id": "OP-" + numeroseao, "name": text(avis.organisme)}
+    parties = {buyer["id"]: {
+        **buyer,
+        "address": _address(avis),
+        "roles": ["buyer"],
+        "details": {"Municipal": "1" if bit(avis.municipal) else "0"},
+    }}
+
+    # Suppliers, bids and one award shared by the winners (award id = release id)
+    bids = []
+    award = None
+    for link in links:
+        supplier = suppliers.get(link.neq)
+        if supplier is None:
+            continue
+        party_id = "FO-" + link.neq
+        name = text(supplier.nomorganisation)
+        role = "supplier" if link.adjudicataire == '1' else "tenderer"
+        party = parties.get(party_id)
+        if party is None:
+            parties[party_id] = {
+                "id": party_id,
+                "name": name,
+                "address": _address(supplier),
+                "roles": [role],
+                "details": {"NEQ": link.neq},
+            }
+        elif role not in party["roles"]:
+            party["roles"].append(role)
+
+        bids.append({
+            "id": party_id,
+            "admissible": 1 if link.admissible == '1' else 0,
+            "conform": 1 if link.conforme == '1' else 0,
+            "value": safe_float(link.montantsoumis),
+            "valueUnit": text(link.montantssoumisunite) or "CAD",
+        })
+
+        if role == "supplier":
+            if award is None:
+                award = {
+                    "id": release_id,
+                    "status": "active",
+                    "value": {
+                        "amount": safe_float(link.montantcontrat),
+                        "currency": "CAD",
+                        "totalAmount": safe_float(link.montanttotalcontrat),
+                    },
+                    "suppliers": [],
+                }
+            award["suppliers"].append({"id": party_id, "name": name})
+
+    # Contracts; a depense goes to the contract with its numero, else the first one
+    contracts = []
+    by_numero = {}
+    for contrat in contrats:
+        final = iso_date(contrat.datepublicationfinale)
+        contract = {
+            "id": text(contrat.numero),
+            "awardID": release_id,
+            "status": "terminated" if final else "active",
+            "period": {"endDate": iso_date(contrat.datefinale) or final},
+            "value": {"amount": safe_float(contrat.montantfinal), "currency": "CAD"},
+            "dateSigned": final,
+            "implementation": {"transactions": []},
+        }
+        contracts.append(contract)
+        by_numero.setdefault(contract["id"], contract)
+
+    if contracts:
+        for depense_id, depense in depenses:
+            contract = by_numero.get(text(depense.numero), contracts[0])
+            contract["implementation"]["transactions"].append({
+                "ocid": ocid,
+                "id": f"txn-{depense_id}",
+                "source": text(depense.description),
+                "date": iso_date(depense.datedepense),
+                "value": {"amount": safe_float(depense.montantdepense), "currency": "CAD"},
+            })
+
+    avis_type  = safe_int(avis.type)
+    category   = text(avis.categorieseao)
+    item_id    = get_first_something(category)
+    tender = {
+        "id": release_id,
+        "title": text(avis.titre),
+        "status": "complete",
+        "procuringEntity": buyer,
+        "items": [{
+            "id": item_id,
+            "description": category,
+            "classification": {
+                "scheme": "UNSPSC",
+                "id": text(avis.unspscprincipale),
+                "description": text(avis.disposition),
+            },
+            "additionalClassifications": [
+                {"scheme": "CATEGORY", "id": item_id, "description": category}
+            ],
+        }],
+        "procurementMethod": map_tender_procurement_method(avis_type),
+        "procurementMethodDetails": map_tender_procurement_method_details(avis_type),
+        "mainProcurementCategory": map_main_procurement_category(safe_int(avis.precision)),
+        "additionalProcurementCategories": map_additional_procurement_categories(safe_int(avis.nature)),
+        "tenderPeriod": {"startDate": published, "endDate": iso_date(avis.datefermeture)},
+        "numberOfTenderers": len(bids),
+    }
+    link_url = text(avis.hyperlienseao)
+    if link_url:
+        tender["documents"] = [{"url": link_url}]
+
+    tag = ["avis"]
+    if contracts:
+        tag.append("contrat")
+        if depenses:
+            tag.append("depense")
+
+    release = {
+        "ocid": ocid,
+        "id": release_id,
+        "date": published,
+        "language": "fr",
+        "tag": tag,
+        "initiationType": "tender",
+        "parties": list(parties.values()),
+        "buyer": buyer,
+        "tender": tender,
+        "bids": bids,
+        "awards": [award] if award else [],
+        "contracts": contracts,
+    }
+    return release
@@ -1,6 +1,14 @@
 import pyodbc
 import logging
+import os
+import sys
 from datetime import datetime
+
+# table_creation.py is in the parent folder, progress.py in the shared one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'shared'))
+
+from progress import Progress
 from table_creation import create_tables  # Ensure this creates your *_history tables* as well
 
 # ---------------------------------------------------------------------------
@@ -140,7 +148,9 @@ def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
     )
     """
 
+    progress = Progress('avis_history', total=len(ocid_list), unit='ocids')
     for ocid in ocid_list:
+        progress.advance()
         numeroseao = get_numeroseao_from_ocid(ocid)
 
         # Query old DB's avis_history for this numeroseao (no category filter)
@@ -231,6 +241,7 @@ def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
             tgt_cursor.execute(insert_sql, vals)
             count_inserted += 1
 
+    progress.done()
     logging.info(f"→ transform_avis_history: inserted {count_inserted} rows into releases_history.")
 
 
@@ -276,7 +287,9 @@ def transform_fournisseurs_history(src_cursor, tgt_cursor, ocid_list):
     VALUES (?, ?, NULL, ?, ?, ?, ?, GETDATE())
     """
 
+    progress = Progress('fournisseurs_history', total=len(ocid_list), unit='ocids')
     for ocid in ocid_list:
+        progress.advance()
         numeroseao = get_numeroseao_from_ocid(ocid)
 
         # Grab old 'avis_fournisseurs' for this numeroseao
@@ -354,6 +367,7 @@ def transform_fournisseurs_history(src_cursor, tgt_cursor, ocid_list):
             ))
             count_bids_inserted += 1
 
+    progress.done()
     logging.info(f"→ transform_fournisseurs_history: inserted {count_parties_inserted} rows into parties_history.")
     logging.info(f"→ transform_bids_history: inserted {count_bids_inserted} rows into bids_history.")
 
@@ -379,7 +393,9 @@ def transform_contrats_history(src_cursor, tgt_cursor, ocid_list):
     VALUES (?, ?, ?, ?, ?, ?, GETDATE())
     """
 
+    progress = Progress('contrats_history', total=len(ocid_list), unit='ocids')
     for ocid in ocid_list:
+        progress.advance()
         numeroseao = get_numeroseao_from_ocid(ocid)
 
         sql_ch = """
@@ -414,6 +430,7 @@ def transform_contrats_history(src_cursor, tgt_cursor, ocid_list):
             tgt_cursor.execute(insert_sql, vals)
             count_inserted += 1
 
+    progress.done()
     logging.info(f"→ transform_contrats_history: inserted {count_inserted} rows into contracts_history.")
 
 
@@ -439,7 +456,9 @@ def transform_depenses_history(src_cursor, tgt_cursor, ocid_list):
     VALUES (?, ?, NULL, ?, ?, ?, 'CAD', GETDATE())
     """
 
+    progress = Progress('depenses_history', total=len(ocid_list), unit='ocids')
     for ocid in ocid_list:
+        progress.advance()
         numeroseao = get_numeroseao_from_ocid(ocid)
 
         sql_dh = """
@@ -471,6 +490,7 @@ def transform_depenses_history(src_cursor, tgt_cursor, ocid_list):
             tgt_cursor.execute(insert_sql, vals)
             count_inserted += 1
 
+    progress.done()
     logging.info(f"→ transform_depenses_history: inserted {count_inserted} rows into contract_transactions_history.")
 
 
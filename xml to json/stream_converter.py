@@ -0,0 +1,409 @@
+"""
+stream_converter.py
+SEAO XML files -> OCDS releases, without the XMLData database.
+
+The database route loads XMLData row by row ('Contracts in XML formats'),
+reads it back per avis and writes ConstructionDB row by row again. Here the
+Avis, Contrats and Depenses files are streamed once and joined on numeroseao
+with an external sort-merge, so memory stays bounded whatever the number of
+years converted:
+
+  1. scan  : each file is read with iterparse (one record in memory at a time)
+             by a worker process, its records are sorted by numeroseao and
+             spilled to run files of RUN_SIZE records.
+  2. merge : the runs are merged (MERGE_FAN_IN at a time) and grouped by
+             numeroseao; each group becomes one release (ocds_mapping).
+  3. write : release packages of PACKAGE_SIZE releases ({"releases": [...]},
+             the layout the JSON loader reads), or one release per line.
+
+Files are taken in the order main.py loads them (dates in the file name,
+revisions last) and the latest version of a record wins, as in XMLData:
+  - avis      : latest version, with the fournisseurs of that version;
+  - suppliers : latest version of each neq, over all the Avis files (kept in
+                memory: one entry per supplier, not per record);
+  - contrats  : latest version of each (numeroseao, numero);
+  - depenses  : all of them, numbered in load order like depense_id.
+
+    python stream_converter.py [xml dir] [output dir] [--construction] [--format jsonl]
+
+--construction keeps the releases of the construction migration script
+(construction category and at least one contract). The packages can be loaded
+into ConstructionDB with the JSON loader ('Contracts in JSON formats all').
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import groupby, islice
+from operator import itemgetter
+
+from ocds_mapping import Avis, Contrat, Depense, Link, Supplier, build_release, is_construction
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        logging.FileHandler("stream_converter.log", mode='w', encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+)
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+RUN_SIZE = 50_000        # records sorted in memory before spilling a run
+RUN_CHUNK = 5_000        # records per pickle in a run file
+MERGE_FAN_IN = 64        # runs open at once while merging
+PACKAGE_SIZE = 1_000     # releases per package file
+
+# Record kinds, in the order they are applied within a numeroseao
+AVIS, CONTRAT, DEPENSE = 0, 1, 2
+
+# --------------------------------------------------------
+# Reading the XML files
+# --------------------------------------------------------
+class _AmpEscaper:
+    """
+    File wrapper escaping every '&', like the XML loader does on the whole
+    file (the SEAO exports contain bare ampersands). Safe on UTF-8 bytes.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def read(self, size=-1):
+        return self._raw.read(size).replace(b"&", b"&amp;")
+
+def iter_elements(file_path, tag):
+    """
+    Yields the <tag> elements of an XML file one at a time; each is detached
+    from the tree once the caller is done with it.
+    """
+    with open(file_path, 'rb') as raw:
+        stack = []
+        for event, elem in ET.iterparse(_AmpEscaper(raw), events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag == tag:
+                yield elem
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+
+def _text(parent, tag):
+    node = parent.find(tag)
+    if node is not None and node.text is not None:
+        return node.text.strip()
+    return ''
+
+def file_kind(filename):
+    lower_file = filename.lower()
+    if "avis" in lower_file:
+        return AVIS
+    if "contrats" in lower_file:
+        return CONTRAT
+    if "depenses" in lower_file:
+        return DEPENSE
+    return None
+
+def list_xml_files(xml_dir):
+    """(kind, path) of the XML files in the order main.py loads them."""
+    files = []
+    for filename in os.listdir(xml_dir):
+        if not filename.lower().endswith(".xml"):
+            continue
+        kind = file_kind(filename)
+        if kind is None:
+            logging.warning(f"Unknown file type: {filename}")
+            continue
+        match = re.search(r"_(\d{8})_(\d{8})\.xml", filename)
+        start_date, end_date = match.groups() if match else ('', '')
+        is_revision = "revisions" in filename.lower()
+        files.append((start_date, end_date, is_revision, kind, os.path.join(xml_dir, filename)))
+    files.sort(key=lambda x: (x[0], x[1], x[2]))
+    return [(kind, path) for _, _, _, kind, path in files]
+
+def _scan_avis(file_path, suppliers):
+    for a_node in iter_elements(file_path, 'avis'):
+        avis = Avis._make(_text(a_node, field) for field in Avis._fields)
+        if not avis.numeroseao:
+            continue
+        links = []
+        fournisseur_parent = a_node.find('fournisseurs')
+        if fournisseur_parent is not None:
+            for f_elem in fournisseur_parent.findall('fournisseur'):
+                neq = _text(f_elem, 'neq')
+                # avis_fournisseurs is joined to fournisseurs on neq: no neq, no supplier
+                if not neq:
+                    continue
+                suppliers[neq] = Supplier._make(_text(f_elem, field) for field in Supplier._fields)
+                links.append(Link._make(_text(f_elem, field) for field in Link._fields))
+        yield avis.numeroseao, (avis, tuple(links))
+
+def _scan_contrats(file_path):
+    for c_node in iter_elements(file_path, 'contrat'):
+        numeroseao = _text(c_node, 'numeroseao')
+        contrat = Contrat._make(_text(c_node, field) for field in Contrat._fields)
+        if numeroseao and contrat.numero:
+            yield numeroseao, contrat
+
+def _scan_depenses(file_path, counter):
+    for a_node in iter_elements(file_path, 'avis'):
+        numeroseao = _text(a_node, 'numeroseao')
+        numero     = _text(a_node, 'numero')
+        depenses_parent = a_node.find('depenses')
+        if depenses_parent is None:
+            continue
+        for d_node in depenses_parent.findall('depense'):
+            # numbered even without numeroseao: depense_id is assigned to every row
+            ordinal = counter[0]
+            counter[0] += 1
+            yield numeroseao, (ordinal, Depense(
+                numero,
+                _text(d_node, 'datedepense'),
+                _text(d_node, 'montantdepense'),
+                _text(d_node, 'description'),
+            ))
+
+# --------------------------------------------------------
+# Run files
+# --------------------------------------------------------
+def _write_run(path, records):
+    with open(path, 'wb') as f:
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, RUN_CHUNK))
+            if not chunk:
+                break
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+def scan_file(file_index, kind, file_path, run_dir):
+    """
+    Runs in a worker process. Spills the records of one file as sorted runs of
+    (numeroseao, file_index, position, kind, payload).
+
+    Returns (run paths, records, depenses numbered, {neq: Supplier}, busy seconds).
+    """
+    start = time.perf_counter()
+    suppliers = {}
+    depense_counter = [0]
+    if kind == AVIS:
+        records = _scan_avis(file_path, suppliers)
+    elif kind == CONTRAT:
+        records = _scan_contrats(file_path)
+    else:
+        records = _scan_depenses(file_path, depense_counter)
+
+    runs = []
+    buffer = []
+    total = 0
+    for position, (numeroseao, payload) in enumerate(records):
+        if not numeroseao:
+            continue
+        buffer.append((numeroseao, file_index, position, kind, payload))
+        if len(buffer) >= RUN_SIZE:
+            runs.append(_spill(buffer, run_dir, file_index, len(runs)))
+            total += len(buffer)
+            buffer = []
+    if buffer:
+        runs.append(_spill(buffer, run_dir, file_index, len(runs)))
+        total += len(buffer)
+
+    return runs, total, depense_counter[0], suppliers, time.perf_counter() - start
+
+def _spill(buffer, run_dir, file_index, run_number):
+    # (numeroseao, file_index, position) is unique: payloads are never compared
+    buffer.sort()
+    path = os.path.join(run_dir, f"scan-{file_index:05d}-{run_number:03d}.run")
+    _write_run(path, buffer)
+    return path
+
+def reduce_runs(runs, run_dir):
+    """Merges runs MERGE_FAN_IN at a time until at most MERGE_FAN_IN are left."""
+    level = 0
+    while len(runs) > MERGE_FAN_IN:
+        merged = []
+        for i in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[i:i + MERGE_FAN_IN]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            path = os.path.join(run_dir, f"merge-{level}-{i:05d}.run")
+            _write_run(path, heapq.merge(*map(_read_run, group)))
+            for run in group:
+                os.remove(run)
+            merged.append(path)
+        runs = merged
+        level += 1
+    return runs
+
+# --------------------------------------------------------
+# Merge + releases
+# --------------------------------------------------------
+def iter_releases(runs, suppliers, depense_offsets, construction=False, stats=None):
+    """
+    Merges the sorted runs and yields one release per numeroseao that has an avis.
+    `depense_offsets[file_index]` is the number of depenses in the files before it.
+    """
+    stats = stats if stats is not None else {}
+    for key in ('releases', 'without_avis', 'filtered'):
+        stats.setdefault(key, 0)
+
+    merged = heapq.merge(*map(_read_run, runs))
+    for _, group in groupby(merged, key=itemgetter(0)):
+        avis = None
+        links = ()
+        contrats = {}
+        depenses = []
+        for _, file_index, _, kind, payload in group:
+            if kind == AVIS:
+                avis, links = payload
+            elif kind == CONTRAT:
+                contrats[payload.numero] = payload
+            else:
+                ordinal, depense = payload
+                depenses.append((depense_offsets[file_index] + ordinal + 1, depense))
+
+        if avis is None:
+            stats['without_avis'] += 1
+            continue
+        if construction and not (contrats and is_construction(avis)):
+            stats['filtered'] += 1
+            continue
+
+        stats['releases'] += 1
+        yield build_release(avis, links, suppliers, list(contrats.values()), depenses)
+
+class PackageWriter:
+    """Release packages of PACKAGE_SIZE releases: releases_00001.json, ..."""
+
+    def __init__(self, out_dir, package_size=PACKAGE_SIZE):
+        self.out_dir = out_dir
+        self.package_size = package_size
+        self.releases = []
+        self.files = 0
+
+    def write(self, release):
+        self.releases.append(release)
+        if len(self.releases) >= self.package_size:
+            self._flush()
+
+    def _flush(self):
+        self.files += 1
+        path = os.path.join(self.out_dir, f"releases_{self.files:05d}.json")
+        package = {
+            "version": "1.1",
+            "publishedDate": datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            "releases": self.releases,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(package, f, ensure_ascii=False)
+        self.releases = []
+
+    def close(self):
+        if self.releases:
+            self._flush()
+
+class JsonLinesWriter:
+    """One release per line in releases.jsonl."""
+
+    def __init__(self, out_dir):
+        self.file = open(os.path.join(out_dir, "releases.jsonl"), 'w', encoding='utf-8')
+
+    def write(self, release):
+        self.file.write(json.dumps(release, ensure_ascii=False))
+        self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+# --------------------------------------------------------
+# Main
+# --------------------------------------------------------
+def convert(xml_dir, out_dir, construction=False, output_format='package',
+            workers=DEFAULT_WORKERS, tmp_dir=None):
+    files = list_xml_files(xml_dir)
+    logging.info(f"Converting {len(files)} XML files from '{xml_dir}' → '{out_dir}'")
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix='seao-runs-', dir=tmp_dir) as run_dir:
+        # 1. scan (results come back in file order)
+        runs = []
+        suppliers = {}
+        depense_offsets = []
+        records = 0
+        busy = 0.0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                scan_file,
+                range(len(files)),
+                [kind for kind, _ in files],
+                [path for _, path in files],
+                [run_dir] * len(files),
+            )
+            depenses_before = 0
+            for (kind, path), (file_runs, total, depenses, file_suppliers, seconds) in zip(files, results):
+                runs.extend(file_runs)
+                suppliers.update(file_suppliers)
+                depense_offsets.append(depenses_before)
+                depenses_before += depenses
+                records += total
+                busy += seconds
+                logging.info(f"  scanned {path}: {total} records")
+        scanned = time.perf_counter()
+        logging.info(
+            f"Scan: {records} records in {len(runs)} runs, {len(suppliers)} suppliers "
+            f"({scanned - started:.1f}s, {busy:.1f}s busy over {workers} workers)"
+        )
+
+        # 2. merge + 3. write
+        runs = reduce_runs(runs, run_dir)
+        writer = PackageWriter(out_dir) if output_format == 'package' else JsonLinesWriter(out_dir)
+        stats = {}
+        try:
+            for release in iter_releases(runs, suppliers, depense_offsets, construction, stats):
+                writer.write(release)
+        finally:
+            writer.close()
+
+    logging.info(
+        f"Merge: {stats['releases']} releases written, {stats['filtered']} filtered out, "
+        f"{stats['without_avis']} numeroseao without avis ({time.perf_counter() - scanned:.1f}s)"
+    )
+    logging.info(f"Conversion completed in {time.perf_counter() - started:.1f}s.")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="SEAO XML → OCDS releases, without XMLData.")
+    parser.add_argument('xml_dir', nargs='?', default='xml')
+    parser.add_argument('out_dir', nargs='?', default='ocds')
+    parser.add_argument('--construction', action='store_true',
+                        help="only construction releases with a contract")
+    parser.add_argument('--format', choices=('package', 'jsonl'), default='package')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--tmp-dir', default=None, help="where the sorted runs are spilled")
+    args = parser.parse_args()
+
+    convert(args.xml_dir, args.out_dir, args.construction, args.format, args.workers, args.tmp_dir)
+
+if __name__ == "__main__":
+    main()
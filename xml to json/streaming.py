@@ -0,0 +1,107 @@
+"""
+streaming.py
+Source reads for the migration scripts, streamed in fetchmany() batches
+instead of fetchall().
+
+SourceReader has its own connection to the source database. Each query runs
+in a background thread that fetches the next batches while the caller is
+still writing the previous ones to the target (pyodbc releases the GIL while
+it waits on the server), so reading XMLData and writing the target overlap.
+At most PREFETCH_BATCHES batches are held in memory, whatever the size of
+the result set.
+
+    source = SourceReader(conn_str, batch_size=5000)
+    for row in source.rows("SELECT ... WHERE x = ?", (x,)):
+        ...
+    source.close()
+
+Statements run with execute() / executemany() share the reader's session, so
+a temp table filled that way can be joined by the queries that follow.
+"""
+
+import queue
+import threading
+
+import pyodbc
+
+FETCH_BATCH_SIZE = 5000
+PREFETCH_BATCHES = 2
+
+_DONE = object()  # end of a result set, put on the batch queue by the reader
+
+
+class SourceReader:
+    """Streams the rows of source queries, one query at a time."""
+
+    def __init__(self, conn_str, batch_size=FETCH_BATCH_SIZE):
+        self.conn = pyodbc.connect(conn_str)
+        self.batch_size = batch_size
+
+    def rows(self, sql, params=()):
+        """
+        Yields the rows of `sql`. Stopping early (break, exception) cancels the
+        rest of the result set.
+        """
+        batches = queue.Queue(maxsize=PREFETCH_BATCHES)
+        stop = threading.Event()
+
+        def read():
+            cursor = self.conn.cursor()
+            try:
+                if params:
+                    cursor.execute(sql, params)
+                else:
+                    cursor.execute(sql)
+                while not stop.is_set():
+                    batch = cursor.fetchmany(self.batch_size)
+                    if not batch:
+                        break
+                    batches.put(batch)
+            except Exception as ex:
+                batches.put(ex)
+            finally:
+                cursor.close()
+                batches.put(_DONE)
+
+        reader = threading.Thread(target=read, name='source-reader', daemon=True)
+        reader.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is _DONE:
+                    return
+                if isinstance(batch, Exception):
+                    raise batch
+                yield from batch
+        finally:
+            # unblock the reader if it is waiting on a full queue
+            stop.set()
+            while reader.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            reader.join()
+
+    def execute(self, sql, params=()):
+        """Runs a statement on the source connection (not while rows() is being read)."""
+        cursor = self.conn.cursor()
+        try:
+            if params:
+                cursor.execute(sql, params)
+            else:
+                cursor.execute(sql)
+        finally:
+            cursor.close()
+
+    def executemany(self, sql, rows):
+        """executemany() on the source connection, e.g. to fill a temp table of keys."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.fast_executemany = True
+            cursor.executemany(sql, rows)
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.conn.close()
@@ -95,13 +95,16 @@ def create_tables(cursor):
 
     sql_trg_releases_update = """
     IF OBJECT_ID('dbo.trg_releases_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_releases_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_releases_update
+        CREATE OR ALTER TRIGGER dbo.trg_releases_update
         ON dbo.releases
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.releases_history
                 (ocid, release_id, date, tag, initiation_type, language,
                  tender_id, tender_title, tender_status,
@@ -176,6 +179,22 @@ def create_tables(cursor):
     """
     cursor.execute(sql_parties)
 
+    # Hash of the upper-cased name, indexed: the xml-to-json migration looks
+    # parties up by name (PartyCache), and 'name' itself has no index.
+    sql_parties_name_hash = """
+    IF COL_LENGTH('dbo.parties', 'name_hash') IS NULL
+        ALTER TABLE dbo.parties
+        ADD name_hash AS CAST(HASHBYTES('SHA2_256', UPPER(name)) AS BINARY(32)) PERSISTED;
+    """
+    cursor.execute(sql_parties_name_hash)
+
+    sql_parties_name_hash_index = """
+    IF NOT EXISTS (SELECT 1 FROM sys.indexes
+                   WHERE name = 'IX_parties_name_hash' AND object_id = OBJECT_ID('dbo.parties'))
+        CREATE INDEX IX_parties_name_hash ON dbo.parties (name_hash) INCLUDE (name);
+    """
+    cursor.execute(sql_parties_name_hash_index)
+
     sql_parties_history = """
     IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'parties_history')
     BEGIN
@@ -199,13 +218,16 @@ def create_tables(cursor):
 
     sql_trg_parties_update = """
     IF OBJECT_ID('dbo.trg_parties_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_parties_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_parties_update
+        CREATE OR ALTER TRIGGER dbo.trg_parties_update
         ON dbo.parties
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.parties_history
                 (party_id, name, role, street_address, locality, region, postal_code,
                  country_name, details, alias_parties, modified_date)
@@ -259,13 +281,16 @@ def create_tables(cursor):
 
     sql_trg_release_parties_update = """
     IF OBJECT_ID('dbo.trg_release_parties_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_release_parties_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_release_parties_update
+        CREATE OR ALTER TRIGGER dbo.trg_release_parties_update
         ON dbo.release_parties
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.release_parties_history
                 (ocid, party_id, role, modified_date)
             SELECT
@@ -318,13 +343,16 @@ def create_tables(cursor):
 
     sql_trg_lots_update = """
     IF OBJECT_ID('dbo.trg_lots_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_lots_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_lots_update
+        CREATE OR ALTER TRIGGER dbo.trg_lots_update
         ON dbo.lots
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.lots_history
                 (lot_id, ocid, title, status, contract_period_start_date,
                  contract_period_end_date, modified_date)
@@ -386,13 +414,16 @@ def create_tables(cursor):
 
     sql_trg_bids_update = """
     IF OBJECT_ID('dbo.trg_bids_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_bids_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_bids_update
+        CREATE OR ALTER TRIGGER dbo.trg_bids_update
         ON dbo.bids
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.bids_history
                 (bid_row_id, party_id, ocid, related_lot, admissible, conform,
                  value, value_unit, modified_date)
@@ -453,13 +484,16 @@ def create_tables(cursor):
 
     sql_trg_awards_update = """
     IF OBJECT_ID('dbo.trg_awards_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_awards_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_awards_update
+        CREATE OR ALTER TRIGGER dbo.trg_awards_update
         ON dbo.awards
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.awards_history
                 (award_id, ocid, status, date, value_amount, value_currency,
                  value_total_amount, modified_date)
@@ -512,13 +546,16 @@ def create_tables(cursor):
 
     sql_trg_suppliers_awards_update = """
     IF OBJECT_ID('dbo.trg_suppliers_awards_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_suppliers_awards_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_suppliers_awards_update
+        CREATE OR ALTER TRIGGER dbo.trg_suppliers_awards_update
         ON dbo.suppliers_awards
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.suppliers_awards_history
                 (award_id, supplier_id, supplier_ocid, modified_date)
             SELECT
@@ -576,13 +613,16 @@ def create_tables(cursor):
 
     sql_trg_contracts_update = """
     IF OBJECT_ID('dbo.trg_contracts_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_contracts_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_contracts_update
+        CREATE OR ALTER TRIGGER dbo.trg_contracts_update
         ON dbo.contracts
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.contracts_history
                 (contract_id, ocid, award_id, status, period_end_date, value_amount,
                  value_currency, date_signed, modified_date)
@@ -638,13 +678,16 @@ def create_tables(cursor):
 
     sql_trg_amendments_update = """
     IF OBJECT_ID('dbo.trg_contract_amendments_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_contract_amendments_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_contract_amendments_update
+        CREATE OR ALTER TRIGGER dbo.trg_contract_amendments_update
         ON dbo.contract_amendments
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.contract_amendments_history
                 (amendment_id, contract_id, rationale, amendment_date, modified_date)
             SELECT
@@ -707,13 +750,16 @@ def create_tables(cursor):
 
     sql_trg_contract_transactions_update = """
     IF OBJECT_ID('dbo.trg_contract_transactions_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_contract_transactions_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_contract_transactions_update
+        CREATE OR ALTER TRIGGER dbo.trg_contract_transactions_update
         ON dbo.contract_transactions
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.contract_transactions_history
                 (ocid, transaction_id, contract_id, source, date, value_amount,
                  value_currency, modified_date)
@@ -773,13 +819,16 @@ def create_tables(cursor):
 
     sql_trg_related_processes_update = """
     IF OBJECT_ID('dbo.trg_related_processes_update', 'TR') IS NULL
+       OR OBJECT_DEFINITION(OBJECT_ID('dbo.trg_related_processes_update')) NOT LIKE '%skip_history%'
     BEGIN
         EXEC('
-        CREATE TRIGGER dbo.trg_related_processes_update
+        CREATE OR ALTER TRIGGER dbo.trg_related_processes_update
         ON dbo.related_processes
         AFTER UPDATE
         AS
         BEGIN
+            IF SESSION_CONTEXT(N''skip_history'') = 1 RETURN;
+
             INSERT INTO dbo.related_processes_history
                 (id, ocid, identifier, uri, relationship, title, scheme, modified_date)
             SELECT
@@ -797,3 +846,57 @@ def create_tables(cursor):
     END;
     """
     cursor.execute(sql_trg_related_processes_update)
+
+    # --------------------------------------------------------
+    # 12. 'migration_watermarks' (see watermarks.py)
+    # --------------------------------------------------------
+    sql_migration_watermarks = """
+    IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'migration_watermarks')
+    BEGIN
+        CREATE TABLE dbo.migration_watermarks (
+            migration    NVARCHAR(100) NOT NULL,
+            source_table NVARCHAR(128) NOT NULL,
+            watermark    DATETIME NULL,
+            updated_at   DATETIME DEFAULT GETDATE(),
+            PRIMARY KEY (migration, source_table)
+        );
+    END;
+    """
+    cursor.execute(sql_migration_watermarks)
+
+    # --------------------------------------------------------
+    # 13. 'migration_checkpoints' (see checkpoints.py)
+    # --------------------------------------------------------
+    sql_migration_checkpoints = """
+    IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'migration_checkpoints')
+    BEGIN
+        CREATE TABLE dbo.migration_checkpoints (
+            migration  NVARCHAR(100) NOT NULL PRIMARY KEY,
+            stage      NVARCHAR(20)  NOT NULL,
+            last_key   NVARCHAR(50)  NULL,
+            full_run   BIT           NOT NULL,
+            marks      NVARCHAR(MAX) NOT NULL,
+            updated_at DATETIME DEFAULT GETDATE(),
+            parent     NVARCHAR(100) NULL,
+            range_lo   NVARCHAR(50)  NULL,
+            range_hi   NVARCHAR(50)  NULL
+        );
+    END;
+    """
+    cursor.execute(sql_migration_checkpoints)
+
+    # checkpoint tables created before the parallel runs had their own
+    sql_migration_checkpoint_ranges = """
+    IF COL_LENGTH('dbo.migration_checkpoints', 'parent') IS NULL
+        ALTER TABLE dbo.migration_checkpoints
+        ADD parent NVARCHAR(100) NULL, range_lo NVARCHAR(50) NULL, range_hi NVARCHAR(50) NULL;
+    """
+    cursor.execute(sql_migration_checkpoint_ranges)
+
+# Session flag the history triggers honor: with skip_history = 1 an UPDATE
+# archives nothing. create_tables() replaces triggers created before the flag.
+def set_skip_history(cursor, skip=True):
+    cursor.execute(
+        "EXEC sp_set_session_context @key = N'skip_history', @value = ?",
+        1 if skip else None
+    )
@@ -0,0 +1,105 @@
+"""
+watermarks.py
+Per-source-table high-water marks for incremental migrations.
+
+The XML loader stamps imported_at on every XMLData row it inserts or updates,
+and archived_at on the *_history rows it writes. After a successful run, a
+migration records in the target table migration_watermarks the highest value
+of that column in each source table it depends on; the next run only looks at
+the rows past it.
+
+    marks = Watermarks.load(tgt_cur, 'construction')
+    current = read_marks(source, {'avis': 'imported_at', ...})
+    predicate, params = window('a.imported_at', marks.since('avis'), current['avis'])
+    ...
+    marks.save(tgt_cur, current)      # once the migrated rows are committed
+
+The current marks are read before the rows, and the rows are selected in
+(previous mark, current mark], so a row imported while the migration runs is
+left to the next run.
+"""
+
+SQL_SELECT_MARKS = """
+SELECT source_table, watermark
+FROM dbo.migration_watermarks
+WHERE migration = ?
+"""
+
+SQL_UPSERT_MARK = """
+IF EXISTS (SELECT 1 FROM dbo.migration_watermarks WHERE migration = ? AND source_table = ?)
+    UPDATE dbo.migration_watermarks
+    SET watermark = ?, updated_at = GETDATE()
+    WHERE migration = ? AND source_table = ?
+ELSE
+    INSERT INTO dbo.migration_watermarks (migration, source_table, watermark)
+    VALUES (?, ?, ?)
+"""
+
+
+class Watermarks:
+    """The marks of one migration: source table -> datetime (None if the table was empty)."""
+
+    def __init__(self, migration, marks=None):
+        self.migration = migration
+        self.marks = dict(marks or {})
+
+    @classmethod
+    def load(cls, cursor, migration):
+        cursor.execute(SQL_SELECT_MARKS, migration)
+        return cls(migration, {r.source_table: r.watermark for r in cursor.fetchall()})
+
+    def complete(self, tables):
+        """True if a previous run recorded a mark for every table in `tables`."""
+        return all(t in self.marks for t in tables)
+
+    def since(self, table):
+        return self.marks.get(table)
+
+    def save(self, cursor, current):
+        """Records `current` (source table -> mark); the caller commits."""
+        cursor.executemany(SQL_UPSERT_MARK, [
+            (self.migration, table, mark, self.migration, table,
+             self.migration, table, mark)
+            for table, mark in current.items()
+        ])
+        self.marks.update(current)
+
+
+def earliest(marks):
+    """
+    Watermarks holding, for each table, the oldest mark of `marks` (a list of
+    Watermarks); None if any of them is None. Several migrations fed by one
+    read of the source select their changed rows from there.
+    """
+    tables = set().union(*(m.marks for m in marks))
+    merged = {}
+    for table in tables:
+        values = [m.since(table) for m in marks]
+        merged[table] = None if None in values else min(values)
+    return Watermarks(None, merged)
+
+
+def read_marks(source, columns):
+    """
+    Current mark of each source table, in one query. `columns` maps a table to
+    its timestamp column; `source` is a streaming.SourceReader.
+    """
+    tables = list(columns)
+    sql = "SELECT " + ",\n       ".join(
+        f"(SELECT MAX({columns[t]}) FROM {t})" for t in tables
+    )
+    row = next(iter(source.rows(sql)))
+    return dict(zip(tables, row))
+
+
+def window(column, since, until):
+    """
+    WHERE predicate (and its parameters) for the rows of `column` in
+    (since, until]. An empty table at the previous run (since is None) puts
+    no lower bound, an empty table now (until is None) selects nothing.
+    """
+    if until is None:
+        return "1 = 0", ()
+    if since is None:
+        return f"{column} <= ?", (until,)
+    return f"{column} > ? AND {column} <= ?", (since, until)
@@ -1,7 +1,15 @@
 import pyodbc
 import logging
+import os
+import sys
 from datetime import datetime
 from table_creation import create_tables  
+from streaming import FETCH_BATCH_SIZE, SourceReader
+
+# progress.py is shared with the loaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from progress import Progress
 
 # ---------------------------------------------------------------------------
 # logging 
@@ -92,16 +100,66 @@ def map_additional_procurement_categories(nature_val):
     }
     return [mapping[nature_val]] if nature_val in mapping else []
 
+# ---------------------------------------------------------------------------
+# ocid key set + batched inserts
+# ---------------------------------------------------------------------------
+# rows per executemany into the target history tables
+HISTORY_BATCH_SIZE = 1000
+
+SQL_OCID_KEYS_RESET = """
+IF OBJECT_ID('tempdb..#ocid_keys') IS NULL
+    CREATE TABLE #ocid_keys (
+        numeroseao NVARCHAR(100) COLLATE DATABASE_DEFAULT NOT NULL,
+        ocid       NVARCHAR(100) COLLATE DATABASE_DEFAULT NOT NULL,
+        PRIMARY KEY (numeroseao, ocid)
+    );
+ELSE
+    TRUNCATE TABLE #ocid_keys;
+"""
+
+def load_ocid_keys(source, ocid_list):
+    """
+    Ships the target's ocids to the source session once, as the temp table
+    #ocid_keys (numeroseao, ocid); the history queries join it instead of
+    running one query per ocid.
+    """
+    source.execute(SQL_OCID_KEYS_RESET)
+    source.executemany(
+        "INSERT INTO #ocid_keys (numeroseao, ocid) VALUES (?, ?)",
+        [(get_numeroseao_from_ocid(ocid), ocid) for ocid in set(ocid_list)]
+    )
+
+def insert_batches(tgt_cursor, insert_sql, rows, label):
+    """
+    Inserts `rows` (an iterable of parameter tuples) HISTORY_BATCH_SIZE at a
+    time with fast_executemany. Returns the number of rows inserted.
+    """
+    tgt_cursor.fast_executemany = True
+    progress = Progress(label)
+    batch = []
+    try:
+        for vals in rows:
+            batch.append(vals)
+            if len(batch) >= HISTORY_BATCH_SIZE:
+                tgt_cursor.executemany(insert_sql, batch)
+                progress.advance(len(batch))
+                batch = []
+        if batch:
+            tgt_cursor.executemany(insert_sql, batch)
+            progress.advance(len(batch))
+    finally:
+        tgt_cursor.fast_executemany = False
+    return progress.done().count
+
 # ---------------------------------------------------------------------------
 # 1) releases_history
 # ---------------------------------------------------------------------------
-def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
+def transform_avis_history(source, tgt_cursor):
     """
-    For each ocid in new DB, parse numeroseao, then read from 'avis_history'
-    and insert into 'releases_history' (no category filter).
+    For each ocid in new DB (#ocid_keys), read from 'avis_history' and
+    insert into 'releases_history' (no category filter).
     """
     logging.info("→ transform_avis_history: start.")
-    count_inserted = 0
 
     insert_sql = """
     INSERT INTO releases_history (
@@ -140,41 +198,36 @@ def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
     )
     """
 
-    for idx, ocid in enumerate(ocid_list, start=1):
-        total_ocids = len(ocid_list)
-        numeroseao = get_numeroseao_from_ocid(ocid)
-
-        logging.info(f"[avis_history] Processing ocid {idx}/{total_ocids} ({ocid}). Remaining: {total_ocids - idx}")
-
-        sql_avis_h = """
-        SELECT
-            ah.numeroseao,
-            ah.numero,
-            ah.organisme,
-            ah.municipal,
-            ah.adresse1,
-            ah.adresse2,
-            ah.ville,
-            ah.province,
-            ah.pays,
-            ah.codepostal,
-            ah.titre,
-            ah.datepublication,
-            ah.datefermeture,
-            ah.hyperlienseao,
-            ah.unspscprincipale,
-            ah.disposition,
-            ah.categorieseao,
-            ah.type,
-            ah.nature,
-            ah.[precision]
-        FROM avis_history ah
-        WHERE ah.numeroseao = ?
-        """
-        src_cursor.execute(sql_avis_h, (numeroseao,))
-        rows = src_cursor.fetchall()
-
-        for row in rows:
+    sql_avis_h = """
+    SELECT
+        k.ocid,
+        k.numeroseao AS ocid_numeroseao,
+        ah.numeroseao,
+        ah.numero,
+        ah.organisme,
+        ah.municipal,
+        ah.adresse1,
+        ah.adresse2,
+        ah.ville,
+        ah.province,
+        ah.pays,
+        ah.codepostal,
+        ah.titre,
+        ah.datepublication,
+        ah.datefermeture,
+        ah.hyperlienseao,
+        ah.unspscprincipale,
+        ah.disposition,
+        ah.categorieseao,
+        ah.type,
+        ah.nature,
+        ah.[precision]
+    FROM avis_history ah
+    JOIN #ocid_keys k ON k.numeroseao = ah.numeroseao
+    """
+
+    def rows():
+        for row in source.rows(sql_avis_h):
             release_id = safe_str(row.numero)
             date_val = format_date(row.datepublication)
 
@@ -201,8 +254,8 @@ def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
             tender_addl_cat_str = ",".join(tender_addl_cat)
             item_id = get_first_something(safe_str(row.categorieseao))
 
-            vals = (
-                ocid,
+            yield (
+                row.ocid,
                 release_id,
                 date_val,
                 "avis_history",
@@ -216,7 +269,7 @@ def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
                 tender_proc_method_details,
                 tender_main_cat,
                 tender_addl_cat_str,
-                "OP-" + numeroseao,
+                "OP-" + row.ocid_numeroseao,
                 date_val,
                 format_date(row.datefermeture),
                 safe_str(row.hyperlienseao),
@@ -230,16 +283,15 @@ def transform_avis_history(src_cursor, tgt_cursor, ocid_list):
                 item_id,
                 safe_str(row.categorieseao)
             )
-            tgt_cursor.execute(insert_sql, vals)
-            count_inserted += 1
 
+    count_inserted = insert_batches(tgt_cursor, insert_sql, rows(), "avis_history")
     logging.info(f"→ transform_avis_history: inserted {count_inserted} rows into releases_history.")
 
 
 # ---------------------------------------------------------------------------
 # 2) bids_history 
 # ---------------------------------------------------------------------------
-def transform_bids_history(src_cursor, tgt_cursor, ocid_list):
+def transform_bids_history(source, tgt_cursor):
     """
     If you want to track historical 'bids' from the main 'avis_fournisseurs' table,
     ignoring 'fournisseurs_history' entirely. We'll just do a direct insert into
@@ -247,7 +299,6 @@ def transform_bids_history(src_cursor, tgt_cursor, ocid_list):
     you asked to skip fournisseurs_history and still do bids.)
     """
     logging.info("→ transform_bids_history: start.")
-    count_inserted = 0
 
     insert_bids_sql = """
     INSERT INTO bids_history (
@@ -263,53 +314,45 @@ def transform_bids_history(src_cursor, tgt_cursor, ocid_list):
     VALUES (?, ?, NULL, ?, ?, ?, ?, GETDATE())
     """
 
-    for idx, ocid in enumerate(ocid_list, start=1):
-        total_ocids = len(ocid_list)
-        numeroseao = get_numeroseao_from_ocid(ocid)
-
-        logging.info(f"[bids_history] Processing ocid {idx}/{total_ocids} ({ocid}). Remaining: {total_ocids - idx}")
-
-
-        sql_af = """
-        SELECT
-            af.admissible,
-            af.conforme,
-            af.montantsoumis,
-            af.montantssoumisunite,
-            f.neq
-        FROM avis_fournisseurs af
-        JOIN fournisseurs f ON af.neq = f.neq
-        WHERE af.numeroseao = ?
-        """
-        src_cursor.execute(sql_af, (numeroseao,))
-        rows_af = src_cursor.fetchall()
+    sql_af = """
+    SELECT
+        k.ocid,
+        af.admissible,
+        af.conforme,
+        af.montantsoumis,
+        af.montantssoumisunite,
+        f.neq
+    FROM avis_fournisseurs af
+    JOIN fournisseurs f ON af.neq = f.neq
+    JOIN #ocid_keys k ON k.numeroseao = af.numeroseao
+    """
 
-        for row_af in rows_af:
+    def rows():
+        for row_af in source.rows(sql_af):
             party_id = "FO-" + safe_str(row_af.neq) if row_af.neq else "FO-MISSING"
             admissible = 1 if row_af.admissible else 0
             conform = 1 if row_af.conforme else 0
             value = float(row_af.montantsoumis or 0.0)
             value_unit = str(row_af.montantssoumisunite) if row_af.montantssoumisunite else "CAD"
 
-            tgt_cursor.execute(insert_bids_sql, (
+            yield (
                 party_id,
-                ocid,
+                row_af.ocid,
                 admissible,
                 conform,
                 value,
                 value_unit
-            ))
-            count_inserted += 1
+            )
 
+    count_inserted = insert_batches(tgt_cursor, insert_bids_sql, rows(), "bids_history")
     logging.info(f"→ transform_bids_history: inserted {count_inserted} rows into bids_history.")
 
 
 # ---------------------------------------------------------------------------
 # 3) contrats_history 
 # ---------------------------------------------------------------------------
-def transform_contrats_history(src_cursor, tgt_cursor, ocid_list):
+def transform_contrats_history(source, tgt_cursor):
     logging.info("→ transform_contrats_history: start.")
-    count_inserted = 0
 
     insert_sql = """
     INSERT INTO contracts_history (
@@ -324,53 +367,45 @@ def transform_contrats_history(src_cursor, tgt_cursor, ocid_list):
     VALUES (?, ?, ?, ?, ?, ?, GETDATE())
     """
 
-    for idx, ocid in enumerate(ocid_list, start=1):
-        total_ocids = len(ocid_list)
-        numeroseao = get_numeroseao_from_ocid(ocid)
-
-        logging.info(f"[contrats_history] Processing ocid {idx}/{total_ocids} ({ocid}). Remaining: {total_ocids - idx}")
-
-        sql_ch = """
-        SELECT
-            ch.contrats_history_id,
-            ch.numeroseao,
-            ch.numero,
-            ch.datefinale,
-            ch.datepublicationfinale,
-            ch.montantfinal
-        FROM contrats_history ch
-        WHERE ch.numeroseao = ?
-        """
-        src_cursor.execute(sql_ch, (numeroseao,))
-        rows_ch = src_cursor.fetchall()
-
-        for row in rows_ch:
+    sql_ch = """
+    SELECT
+        k.ocid,
+        ch.contrats_history_id,
+        ch.numeroseao,
+        ch.numero,
+        ch.datefinale,
+        ch.datepublicationfinale,
+        ch.montantfinal
+    FROM contrats_history ch
+    JOIN #ocid_keys k ON k.numeroseao = ch.numeroseao
+    """
+
+    def rows():
+        for row in source.rows(sql_ch):
             contract_id = safe_str(row.numero)
             period_end_date = format_date(row.datepublicationfinale)  # SWAP
             date_signed = format_date(row.datefinale if row.datefinale else row.datepublicationfinale)
             status = "active" if not row.datepublicationfinale else "terminated"
             amount = float(row.montantfinal or 0.0)
 
-            vals = (
+            yield (
                 contract_id,
-                ocid,
+                row.ocid,
                 status,
                 period_end_date,
                 amount,
                 date_signed
             )
-            tgt_cursor.execute(insert_sql, vals)
-            count_inserted += 1
 
+    count_inserted = insert_batches(tgt_cursor, insert_sql, rows(), "contrats_history")
     logging.info(f"→ transform_contrats_history: inserted {count_inserted} rows into contracts_history.")
 
 
 # ---------------------------------------------------------------------------
 # 4) depenses_history 
 # ---------------------------------------------------------------------------
-def transform_depenses_history(src_cursor, tgt_cursor, ocid_list):
+def transform_depenses_history(source, tgt_cursor):
     logging.info("→ transform_depenses_history: start.")
-    count_inserted = 0
 
     insert_sql = """
     INSERT INTO contract_transactions_history (
@@ -386,57 +421,56 @@ def transform_depenses_history(src_cursor, tgt_cursor, ocid_list):
     VALUES (?, ?, NULL, ?, ?, ?, 'CAD', GETDATE())
     """
 
-    for idx, ocid in enumerate(ocid_list, start=1):
-        total_ocids = len(ocid_list)
-        numeroseao = get_numeroseao_from_ocid(ocid)
-
-        logging.info(f"[depenses_history] Processing ocid {idx}/{total_ocids} ({ocid}). Remaining: {total_ocids - idx}")
-
-        sql_dh = """
-        SELECT
-            dh.depense_hist_id,
-            dh.numeroseao,
-            dh.datedepense,
-            dh.montantdepense,
-            dh.description
-        FROM depenses_history dh
-        WHERE dh.numeroseao = ?
-        """
-        src_cursor.execute(sql_dh, (numeroseao,))
-        rows_dh = src_cursor.fetchall()
-
-        for row in rows_dh:
+    sql_dh = """
+    SELECT
+        k.ocid,
+        dh.depense_hist_id,
+        dh.numeroseao,
+        dh.datedepense,
+        dh.montantdepense,
+        dh.description
+    FROM depenses_history dh
+    JOIN #ocid_keys k ON k.numeroseao = dh.numeroseao
+    """
+
+    def rows():
+        for row in source.rows(sql_dh):
             txn_id = "txn-" + safe_str(row.depense_hist_id)
             txn_date = format_date(row.datedepense)
             amount = float(row.montantdepense or 0.0)
             desc = safe_str(row.description)
 
-            vals = (
-                ocid,
+            yield (
+                row.ocid,
                 txn_id,
                 desc,
                 txn_date,
                 amount
             )
-            tgt_cursor.execute(insert_sql, vals)
-            count_inserted += 1
 
+    count_inserted = insert_batches(tgt_cursor, insert_sql, rows(), "depenses_history")
     logging.info(f"→ transform_depenses_history: inserted {count_inserted} rows into contract_transactions_history.")
 
 
 # ---------------------------------------------------------------------------
 # MAIN MIGRATION FUNCTION
 # ---------------------------------------------------------------------------
-def migrate_history_data():
+# Source DB with history tables
+SOURCE_CONN_STR = (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=DESKTOP-91AK8MU\\SQLEXPRESS;"
+    "DATABASE=XMLData;"
+    "Trusted_Connection=yes;"
+)
+
+def migrate_history_data(fetch_batch_size=FETCH_BATCH_SIZE):
+    """
+    Source rows are streamed fetch_batch_size at a time on a dedicated
+    XMLData connection (streaming.SourceReader), while the target is written.
+    """
+    source = tgt_conn = tgt_cursor = None
     try:
-        # Source DB with history tables
-        src_conn = pyodbc.connect(
-            "DRIVER={ODBC Driver 17 for SQL Server};"
-            "SERVER=DESKTOP-91AK8MU\\SQLEXPRESS;"
-            "DATABASE=XMLData;"
-            "Trusted_Connection=yes;"
-        )
-        src_cursor = src_conn.cursor()
+        source = SourceReader(SOURCE_CONN_STR, batch_size=fetch_batch_size)
 
         # Target DB with main 
         tgt_conn = pyodbc.connect(
@@ -457,22 +491,23 @@ def migrate_history_data():
         ocid_rows = tgt_cursor.fetchall()
         ocid_list = [r.ocid for r in ocid_rows]
         logging.info(f"Found {len(ocid_list)} ocids in new DB's 'releases' main table.")
+        load_ocid_keys(source, ocid_list)
 
 
         logging.info(" transform_avis_history ...")
-        transform_avis_history(src_cursor, tgt_cursor, ocid_list)
+        transform_avis_history(source, tgt_cursor)
         tgt_conn.commit()
 
         logging.info("transform_bids_history (from main 'avis_fournisseurs' only) ...")
-        transform_bids_history(src_cursor, tgt_cursor, ocid_list)
+        transform_bids_history(source, tgt_cursor)
         tgt_conn.commit()
 
         logging.info("transform_contrats_history (SWAP logic) ...")
-        transform_contrats_history(src_cursor, tgt_cursor, ocid_list)
+        transform_contrats_history(source, tgt_cursor)
         tgt_conn.commit()
 
         logging.info("transform_depenses_history ...")
-        transform_depenses_history(src_cursor, tgt_cursor, ocid_list)
+        transform_depenses_history(source, tgt_cursor)
         tgt_conn.commit()
 
         logging.info("History migration completed successfully.")
@@ -481,12 +516,15 @@ def migrate_history_data():
     except Exception as e:
         logging.error(f" History migration failed: {str(e)}")
         print(f" History migration failed: {str(e)}")
-        tgt_conn.rollback()
+        if tgt_conn is not None:
+            tgt_conn.rollback()
     finally:
-        src_cursor.close()
-        src_conn.close()
-        tgt_cursor.close()
-        tgt_conn.close()
+        if source is not None:
+            source.close()
+        if tgt_cursor is not None:
+            tgt_cursor.close()
+        if tgt_conn is not None:
+            tgt_conn.close()
         logging.info("🔌 All connections closed.")
         print("🔌 All connections closed.")
 